@@ -0,0 +1,48 @@
+"""Benchmarks for opening runs from compiled artifacts."""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+import arviz as az
+
+from arviz_dashboard.artifact import compile_artifact, open_artifact
+from arviz_dashboard.summary import PosteriorSummary
+
+from .synthetic import inference_data
+
+
+class OpenArtifact:
+    """Time opening the summaries and densities of a run, from the run or from its artifact."""
+
+    params = [1_000, 10_000]
+    param_names = ["num_draws"]
+    timeout = 300
+
+    def setup(self, num_draws: int) -> None:
+        self.directory = Path(tempfile.mkdtemp())
+        self.run = self.directory / "run.nc"
+        self.artifact = self.directory / "run.dashboard.nc"
+        inference_data(num_draws=num_draws, coordinate_sizes=(20, 5)).to_netcdf(self.run)
+        compile_artifact(self.run, self.artifact)
+
+    def teardown(self, _num_draws: int) -> None:
+        shutil.rmtree(self.directory)
+
+    def time_summary_from_run(self, _num_draws: int) -> None:
+        PosteriorSummary(az.from_netcdf(self.run).posterior)
+
+    def time_summary_from_artifact(self, _num_draws: int) -> None:
+        open_artifact(self.artifact).summary
+
+    def time_elpd_from_run(self, _num_draws: int) -> None:
+        az.loo(az.from_netcdf(self.run), pointwise=True)
+
+    def time_elpd_from_artifact(self, _num_draws: int) -> None:
+        open_artifact(self.artifact).elpd("loo")
+
+    def track_run_bytes(self, _num_draws: int) -> int:
+        return self.run.stat().st_size
+
+    def track_artifact_bytes(self, _num_draws: int) -> int:
+        return self.artifact.stat().st_size
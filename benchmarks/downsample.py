@@ -0,0 +1,19 @@
+"""Benchmarks for `arviz_dashboard.downsample`."""
+
+import numpy as np
+
+from arviz_dashboard.downsample import downsample
+
+
+class Downsample:
+    """Time the downsampling of one long chain."""
+
+    params = ([10_000, 100_000, 1_000_000], ["lttb", "minmax"])
+    param_names = ["num_draws", "method"]
+
+    def setup(self, num_draws: int, _method: str) -> None:
+        rng = np.random.default_rng(0)
+        self.draws = np.cumsum(rng.normal(size=num_draws))
+
+    def time_downsample(self, _num_draws: int, method: str) -> None:
+        downsample(self.draws, 2000, method)
@@ -0,0 +1,77 @@
+"""Benchmarks for the ELPD comparison dashboard."""
+
+import arviz as az
+import numpy as np
+import xarray as xr
+
+from arviz_dashboard.panel import elpd
+from arviz_dashboard.panel.elpd import count_observations, pointwise_differences
+
+from .synthetic import inference_data, toggle
+
+
+class ObservationCounts:
+    """Time the pointwise differences and observation counts of two models."""
+
+    params = [1_000, 1_000_000]
+    param_names = ["num_observations"]
+
+    def setup(self, num_observations: int) -> None:
+        rng = np.random.default_rng(0)
+        base = az.loo(az.load_arviz_data("centered_eight"), pointwise=True)
+        self.elpd1 = base.copy()
+        self.elpd2 = base.copy()
+        for elpd_data in (self.elpd1, self.elpd2):
+            elpd_data["loo_i"] = xr.DataArray(rng.normal(size=num_observations), dims=["obs"])
+
+    def time_count_observations(self, _num_observations: int) -> None:
+        differences = pointwise_differences(self.elpd1, self.elpd2, "loo")
+        count_observations(differences)
+
+
+class ELPDCallbacks:
+    """Time computing the ELPD of the models and the callbacks of the ELPD dashboard."""
+
+    params = [100, 10_000]
+    param_names = ["num_observations"]
+    timeout = 300
+
+    def setup(self, num_observations: int) -> None:
+        self.idatas = {
+            f"model{i}": inference_data(
+                num_draws=500,
+                num_observations=num_observations,
+                seed=i,
+            )
+            for i in range(3)
+        }
+        outputs = []
+        elpd.display = outputs.append
+        elpd.dashboard_elpd(self.idatas, prefetch=False)
+        layout = outputs[-1]
+        self.model_selection2 = layout[0][1]
+        self.ic_group = layout[1][1][1]
+        self.thre_slider = layout[2]
+        self.store = elpd.ELPDStore(self.idatas)
+        self.store.select(list(self.idatas), "loo")
+        # Compute the LOO and WAIC of all the models once.
+        toggle(self.model_selection2, "model1", "model2")
+        toggle(self.ic_group, "waic", "loo")
+        toggle(self.model_selection2, "model1", "model2")
+        toggle(self.ic_group, "waic", "loo")
+
+    def time_loo(self, _num_observations: int) -> None:
+        elpd.compute_elpd(self.idatas["model0"], "loo")
+
+    def time_pairwise(self, _num_observations: int) -> None:
+        self.store._pairwise.clear()
+        self.store.pairwise("loo")
+
+    def time_select_models(self, _num_observations: int) -> None:
+        toggle(self.model_selection2, "model1", "model2")
+
+    def time_information_criterion(self, _num_observations: int) -> None:
+        toggle(self.ic_group, "waic", "loo")
+
+    def time_threshold(self, _num_observations: int) -> None:
+        toggle(self.thre_slider, 1.5, 2.5)
@@ -0,0 +1,69 @@
+"""Benchmarks for the forest dashboard."""
+
+import arviz as az
+
+from arviz_dashboard import cache
+from arviz_dashboard.panel import forest
+from arviz_dashboard.summary import PosteriorSummary
+
+from .synthetic import posterior_dataset, toggle
+
+
+class ForestCallbacks:
+    """Time the callbacks of the forest and ridge plots."""
+
+    params = ([2, 8], [1_000, 10_000])
+    param_names = ["num_models", "num_draws"]
+    timeout = 300
+
+    def setup(self, num_models: int, num_draws: int) -> None:
+        self.idatas = {
+            f"model{i}": az.InferenceData(
+                posterior=posterior_dataset(
+                    num_draws=num_draws,
+                    coordinate_sizes=(20,),
+                    num_variables=3,
+                    seed=i,
+                ),
+            )
+            for i in range(num_models)
+        }
+        outputs = []
+        forest.display = outputs.append
+        self.dashboard = forest.ForestDashboard(self.idatas, prefetch=False)
+        self.dashboard.dashboard_forest()
+        layout = outputs[-1]
+        self.models = list(self.idatas)
+        self.models_widget = layout[0][0]
+        self.hdi_slider = layout[1]
+        self.rope_slider = layout[2][0][0][2]
+        self.truncate_checkbox = layout[2][1][0][0]
+        self.overlap_slider = layout[2][1][1][1]
+        # Fill the summaries of all the models once.
+        self.models_widget.value = self.models
+
+    def time_summary(self, _num_models: int, _num_draws: int) -> None:
+        PosteriorSummary(self.idatas["model0"].posterior)
+
+    def time_select_models(self, _num_models: int, _num_draws: int) -> None:
+        toggle(self.models_widget, self.models, self.models[:1])
+
+    def time_select_models_uncached(self, _num_models: int, _num_draws: int) -> None:
+        cache.results.clear()
+        toggle(self.models_widget, self.models, self.models[:1])
+
+    def time_hdi(self, _num_models: int, _num_draws: int) -> None:
+        toggle(self.hdi_slider, 0.5, 0.9)
+
+    def time_rope(self, _num_models: int, _num_draws: int) -> None:
+        toggle(self.rope_slider, (2, 5), (-1, 1))
+
+    def time_select_variable(self, _num_models: int, _num_draws: int) -> None:
+        variable = "theta1" if self.dashboard.data_variable == "theta" else "theta"
+        self.dashboard.data_variable = variable
+
+    def time_ridge_overlap(self, _num_models: int, _num_draws: int) -> None:
+        toggle(self.overlap_slider, 0.7, 0.2)
+
+    def time_ridge_truncate(self, _num_models: int, _num_draws: int) -> None:
+        toggle(self.truncate_checkbox, True, False)
@@ -0,0 +1,44 @@
+"""Benchmarks for the time to import the package and its dashboards."""
+
+import subprocess
+import sys
+
+MODULES = [
+    "arviz_dashboard",
+    "arviz_dashboard.panel.elpd",
+    "arviz_dashboard.panel.forest",
+    "arviz_dashboard.panel.ppc",
+    "arviz_dashboard.panel.trace.trace",
+]
+
+# Dependencies that `import arviz_dashboard` must not import.
+HEAVY_MODULES = ["anywidget", "arviz", "bokeh", "panel", "xarray"]
+
+
+class ImportTime:
+    """Time a cold import of every module in a fresh interpreter."""
+
+    params = MODULES
+    param_names = ["module"]
+
+    def timeraw_import(self, module: str) -> str:
+        return f"import {module}"
+
+
+class ImportSideEffects:
+    """Track what importing the package pulls in, and that imports do not set up output."""
+
+    def track_heavy_modules_imported(self) -> int:
+        code = (
+            "import sys, arviz_dashboard; "
+            f"print(sum(name in sys.modules for name in {HEAVY_MODULES!r}))"
+        )
+        return int(subprocess.check_output([sys.executable, "-c", code], text=True))
+
+    def track_notebook_output_on_import(self) -> int:
+        code = (
+            "import arviz_dashboard.panel.elpd, arviz_dashboard.panel.forest, "
+            "arviz_dashboard.panel.ppc, bokeh.io.state; "
+            "print(int(bokeh.io.state.curstate().notebook))"
+        )
+        return int(subprocess.check_output([sys.executable, "-c", code], text=True))
@@ -0,0 +1,25 @@
+"""Benchmarks for `arviz_dashboard.kde`."""
+
+import arviz as az
+import numpy as np
+
+from arviz_dashboard.kde import kde
+
+
+class ChainDensities:
+    """Time the densities of every chain, batched on a shared grid or one chain at a time."""
+
+    params = ([4, 16], [1_000, 100_000])
+    param_names = ["num_chains", "num_draws"]
+
+    def setup(self, num_chains: int, num_draws: int) -> None:
+        rng = np.random.default_rng(0)
+        self.draws = rng.normal(size=(num_chains, num_draws))
+
+    def time_batched(self, _num_chains: int, _num_draws: int) -> None:
+        kde(self.draws, aggregate=True)
+
+    def time_per_chain(self, _num_chains: int, _num_draws: int) -> None:
+        for chain_draws in self.draws:
+            az.stats.kde(chain_draws, bw_return=True)
+        az.stats.kde(self.draws.ravel(), bw_return=True)
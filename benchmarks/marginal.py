@@ -0,0 +1,34 @@
+"""Benchmarks for the one-dimensional marginal dashboard."""
+
+import arviz as az
+
+from arviz_dashboard import cache
+from arviz_dashboard.panel.marginal.one_d import posterior_marginal1d
+
+from .synthetic import posterior_dataset
+
+
+class MarginalCallbacks:
+    """Time computing and drawing the selection of the marginal dashboard."""
+
+    params = ([4, 16], [1_000, 100_000])
+    param_names = ["num_chains", "num_draws"]
+
+    def setup(self, num_chains: int, num_draws: int) -> None:
+        idata = az.InferenceData(
+            posterior=posterior_dataset(num_chains=num_chains, num_draws=num_draws),
+        )
+        # Without persistent figures, the layout shows the bound `plot` of the dashboard.
+        self.dashboard = posterior_marginal1d(idata, persistent=False)[1].object.__self__
+
+    def clear(self) -> None:
+        cache.results.clear()
+        self.dashboard.resident.clear()
+
+    def time_compute(self, _num_chains: int, _num_draws: int) -> None:
+        self.clear()
+        self.dashboard._compute()
+
+    def time_plot(self, _num_chains: int, _num_draws: int) -> None:
+        self.clear()
+        self.dashboard._plot()
@@ -0,0 +1,78 @@
+"""Benchmarks for `arviz_dashboard.py.models`."""
+
+from arviz_dashboard.py.models import PosteriorModel
+
+from .synthetic import posterior_dataset
+
+
+class ParsePosteriorData:
+    """Compare the NumPy and pandas paths of `PosteriorModel.parse_posterior_data`."""
+
+    params = ([(10,), (100, 10), (100, 100)], ["numpy", "pandas"])
+    param_names = ["coordinate_sizes", "engine"]
+    timeout = 600
+
+    def setup(self, coordinate_sizes: tuple[int, ...], _engine: str) -> None:
+        self.idata = {"posterior": posterior_dataset(coordinate_sizes=coordinate_sizes)}
+        self.model = PosteriorModel()
+
+    def time_parse_posterior_data(self, _coordinate_sizes: tuple[int, ...], engine: str) -> None:
+        self.model.parse_posterior_data(self.idata, engine=engine)
+
+    def peakmem_parse_posterior_data(self, _coordinate_sizes: tuple[int, ...], engine: str) -> None:
+        self.model.parse_posterior_data(self.idata, engine=engine)
+
+
+class ParsePosteriorDataAgreement:
+    """Check that both paths of `parse_posterior_data` give the same result."""
+
+    params = [(10,), (20, 5)]
+    param_names = ["coordinate_sizes"]
+
+    def setup(self, coordinate_sizes: tuple[int, ...]) -> None:
+        self.idata = {"posterior": posterior_dataset(coordinate_sizes=coordinate_sizes)}
+        self.model = PosteriorModel()
+
+    def track_engines_agree(self, _coordinate_sizes: tuple[int, ...]) -> int:
+        numpy_output = self.model.parse_posterior_data(self.idata, engine="numpy")
+        pandas_output = self.model.parse_posterior_data(self.idata, engine="pandas")
+        if numpy_output != pandas_output:
+            raise AssertionError("The numpy and pandas engines disagree.")
+        return 1
+
+
+class ParsePosteriorBuffers:
+    """Time the binary transport of `PosteriorModel.parse_posterior_buffers`."""
+
+    params = [(10,), (100, 10), (100, 100)]
+    param_names = ["coordinate_sizes"]
+
+    def setup(self, coordinate_sizes: tuple[int, ...]) -> None:
+        self.idata = {"posterior": posterior_dataset(coordinate_sizes=coordinate_sizes)}
+        self.model = PosteriorModel()
+
+    def time_parse_posterior_buffers(self, _coordinate_sizes: tuple[int, ...]) -> None:
+        self.model.parse_posterior_buffers(self.idata)
+
+    def peakmem_parse_posterior_buffers(self, _coordinate_sizes: tuple[int, ...]) -> None:
+        self.model.parse_posterior_buffers(self.idata)
+
+
+class ParsePosteriorIndex:
+    """Time the startup of the lazy mode, which only reads the coordinates."""
+
+    params = [(10,), (100, 10), (100, 100)]
+    param_names = ["coordinate_sizes"]
+
+    def setup(self, coordinate_sizes: tuple[int, ...]) -> None:
+        self.idata = {"posterior": posterior_dataset(coordinate_sizes=coordinate_sizes)}
+        self.model = PosteriorModel()
+
+    def time_parse_posterior_index(self, _coordinate_sizes: tuple[int, ...]) -> None:
+        self.model.parse_posterior_index(self.idata)
+
+    def time_select_chain_data(self, coordinate_sizes: tuple[int, ...]) -> None:
+        self.model.select_chain_data(
+            self.idata["posterior"]["theta"],
+            [0] * len(coordinate_sizes),
+        )
@@ -0,0 +1,44 @@
+"""Benchmarks for the posterior predictive check dashboard."""
+
+import numpy as np
+
+from arviz_dashboard.panel import ppc
+
+from .synthetic import inference_data, toggle
+
+
+class PPCCallbacks:
+    """Time the callbacks of the PPC and k-hat plots."""
+
+    params = [100, 10_000]
+    param_names = ["num_observations"]
+    timeout = 300
+
+    def setup(self, num_observations: int) -> None:
+        self.idatas = {
+            f"model{i}": inference_data(
+                num_draws=100,
+                num_observations=num_observations,
+                seed=i,
+            )
+            for i in range(2)
+        }
+        outputs = []
+        ppc.display = outputs.append
+        ppc.dashboard_ppc(self.idatas)
+        self.model_selection = outputs[-1][0][0]
+        # Compute the LOO of both models once.
+        toggle(self.model_selection, "model0", "model1")
+        toggle(self.model_selection, "model0", "model1")
+        rng = np.random.default_rng(0)
+        self.observed = rng.normal(size=num_observations)
+        self.khat = rng.uniform(size=num_observations)
+
+    def time_select_model(self, _num_observations: int) -> None:
+        toggle(self.model_selection, "model0", "model1")
+
+    def time_rug_khat(self, _num_observations: int) -> None:
+        ppc.rug_khat(self.observed, self.khat)
+
+    def time_threshold_colors(self, _num_observations: int) -> None:
+        ppc.threshold_colors(self.khat, 0.7)
@@ -0,0 +1,22 @@
+"""Benchmarks for `arviz_dashboard.streaming`."""
+
+import numpy as np
+
+from arviz_dashboard.streaming import RunningDensity
+
+
+class RunningDensityUpdate:
+    """Time adding a batch of new draws to running densities that already hold many draws."""
+
+    params = [1_000, 100_000]
+    param_names = ["num_draws"]
+
+    def setup(self, num_draws: int) -> None:
+        rng = np.random.default_rng(0)
+        self.density = RunningDensity(4)
+        self.density.update(rng.normal(size=(4, num_draws)))
+        self.new_draws = rng.normal(size=(4, 100))
+
+    def time_update(self, _num_draws: int) -> None:
+        self.density.update(self.new_draws)
+        self.density.density()
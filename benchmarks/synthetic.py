@@ -0,0 +1,99 @@
+"""Synthetic posteriors and inference data, and widget interactions, for the benchmarks."""
+
+from __future__ import annotations
+
+import arviz as az
+import numpy as np
+import xarray as xr
+
+
+def posterior_dataset(
+    num_chains: int = 4,
+    num_draws: int = 1000,
+    coordinate_sizes: tuple[int, ...] = (10,),
+    num_variables: int = 1,
+    seed: int = 0,
+) -> xr.Dataset:
+    """Create a posterior with one scalar and some hierarchical variables.
+
+    Parameters
+    ----------
+    num_chains : int, default 4
+        Number of chains.
+    num_draws : int, default 1000
+        Number of draws per chain.
+    coordinate_sizes : tuple[int, ...], default (10,)
+        Number of labels of each coordinate of the hierarchical variables.
+    num_variables : int, default 1
+        Number of hierarchical variables, named "theta", "theta1", "theta2", and so on.
+    seed : int, default 0
+        Seed for the random number generator.
+
+    Returns
+    -------
+    xr.Dataset
+        The posterior samples.
+    """
+    rng = np.random.default_rng(seed)
+    dims = [f"level{i}" for i in range(len(coordinate_sizes))]
+    coords = {"chain": np.arange(num_chains), "draw": np.arange(num_draws)}
+    for dim, size in zip(dims, coordinate_sizes):
+        coords[dim] = [f"{dim}_{i}" for i in range(size)]
+    data_vars = {"mu": (("chain", "draw"), rng.normal(size=(num_chains, num_draws)))}
+    for i in range(num_variables):
+        data_vars[f"theta{i or ''}"] = (
+            ("chain", "draw", *dims),
+            rng.normal(size=(num_chains, num_draws, *coordinate_sizes)),
+        )
+    return xr.Dataset(data_vars, coords=coords)
+
+
+def inference_data(
+    num_chains: int = 4,
+    num_draws: int = 1000,
+    coordinate_sizes: tuple[int, ...] = (10,),
+    num_variables: int = 1,
+    num_observations: int = 100,
+    seed: int = 0,
+) -> az.InferenceData:
+    """Create inference data of a normal model with unknown mean, for one observed variable "y".
+
+    Parameters
+    ----------
+    num_chains, num_draws, coordinate_sizes, num_variables, seed
+        See `posterior_dataset`. The draws of "mu" are scaled to look like a posterior of the
+        mean of the observations.
+    num_observations : int, default 100
+        Number of observations, with their pointwise log likelihood and posterior predictive
+        draws, along an "obs" dimension.
+
+    Returns
+    -------
+    az.InferenceData
+        Inference data with posterior, log likelihood, posterior predictive and observed data
+        groups.
+    """
+    rng = np.random.default_rng(seed + 1)
+    posterior = posterior_dataset(num_chains, num_draws, coordinate_sizes, num_variables, seed)
+    observed = rng.normal(size=num_observations)
+    mu = observed.mean() + posterior["mu"].values[..., None] / np.sqrt(num_observations)
+    obs = {"obs": np.arange(num_observations)}
+    sample_dims = ("chain", "draw", "obs")
+    sample_coords = {"chain": posterior["chain"], "draw": posterior["draw"], **obs}
+    log_likelihood = -0.5 * ((observed - mu) ** 2 + np.log(2 * np.pi))
+    predictive = mu + rng.normal(size=mu.shape[:-1] + (num_observations,))
+    return az.InferenceData(
+        posterior=posterior,
+        log_likelihood=xr.Dataset({"y": (sample_dims, log_likelihood)}, coords=sample_coords),
+        posterior_predictive=xr.Dataset({"y": (sample_dims, predictive)}, coords=sample_coords),
+        observed_data=xr.Dataset({"y": (("obs",), observed)}, coords=obs),
+    )
+
+
+def toggle(widget, first, second) -> None:
+    """Set a widget to `first`, or to `second` if it already holds `first`.
+
+    Benchmarks of dashboard callbacks call it on every run, so every run changes the value and
+    triggers the callbacks watching the widget.
+    """
+    widget.value = second if widget.value == first else first
@@ -0,0 +1,41 @@
+"""Benchmarks for the trace dashboard."""
+
+import arviz as az
+
+from arviz_dashboard import cache
+from arviz_dashboard.panel.trace.trace import trace
+
+from .synthetic import posterior_dataset
+
+
+class TraceCallbacks:
+    """Time computing and drawing the selection of the trace dashboard."""
+
+    params = ([1_000, 100_000], ["separate", "aggregate"])
+    param_names = ["num_draws", "chain_aggregation"]
+
+    def setup(self, num_draws: int, chain_aggregation: str) -> None:
+        idata = az.InferenceData(posterior=posterior_dataset(num_draws=num_draws))
+        # Without persistent figures, the layout shows the bound `plot` of the dashboard.
+        layout = trace(idata, chain_aggregation=chain_aggregation, persistent=False)
+        self.dashboard = layout[1].object.__self__
+        self.dashboard._create_figures()
+
+    def clear(self) -> None:
+        cache.results.clear()
+        self.dashboard.resident.clear()
+
+    def time_compute(self, _num_draws: int, _chain_aggregation: str) -> None:
+        self.clear()
+        self.dashboard._compute()
+
+    def time_compute_cached(self, _num_draws: int, _chain_aggregation: str) -> None:
+        self.dashboard._compute()
+
+    def time_plot(self, _num_draws: int, _chain_aggregation: str) -> None:
+        self.clear()
+        self.dashboard._plot()
+
+    def time_update(self, _num_draws: int, _chain_aggregation: str) -> None:
+        self.clear()
+        self.dashboard.update()
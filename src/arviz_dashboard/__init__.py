@@ -1,5 +1,34 @@
 """Dashboards for inspecting Bayesian models."""
 
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from arviz_dashboard.py import models
+    from arviz_dashboard.py.traceplot import Traceplot
+
 __version__ = "0.1.0"
-from arviz_dashboard.py import models
-from arviz_dashboard.py.traceplot import Traceplot
+__all__ = ["Traceplot", "models"]
+
+# Public names and the modules defining them. They are imported on first access, so importing
+# the package does not import anywidget, xarray or any dashboard.
+_LAZY_ATTRIBUTES = {
+    "models": ("arviz_dashboard.py.models", None),
+    "Traceplot": ("arviz_dashboard.py.traceplot", "Traceplot"),
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    module = importlib.import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
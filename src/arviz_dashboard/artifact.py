@@ -0,0 +1,367 @@
+"""Dashboard artifacts: the statistics of a run, computed once in a batch job.
+
+`compile_artifact` reads a run once and writes everything the dashboards compute from it to a
+netCDF file, or a zarr store, with one group per result:
+
+- "posterior": the draws thinned to at most `max_draws` per chain. They hold every variable and
+  coordinate label, so the selectors and the coordinate catalog are built from them, and the
+  trace plots draw them.
+- "marginal_support", "marginal_density" and "marginal_bandwidth": the density of every chain,
+  and of all chains aggregated, of every coordinate of every variable, on one grid per
+  coordinate shared by its chains, see `arviz_dashboard.kde.kde`.
+- "summary_mean", "summary_hdi" and "summary_quantile": the means, highest density intervals
+  and quantiles of every variable, see `arviz_dashboard.summary.PosteriorSummary`.
+- "ridge_support" and "ridge_density": the densities of the ridge plots.
+- "loo" and "waic": the pointwise ELPD, with the Pareto k of every observation for "loo", if
+  the run has a log likelihood group.
+
+`open_artifact` reads an artifact back into a `PosteriorArtifact`, which `trace`,
+`posterior_marginal1d`, `Traceplot`, `ForestDashboard` and `dashboard_elpd` take in place of
+inference data, or of its path. They then only look the results up.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import xarray as xr
+
+from arviz_dashboard.io import open_dataset, open_inference_data
+from arviz_dashboard.kde import kde
+from arviz_dashboard.summary import HDI_PROBS, PosteriorSummary
+
+if TYPE_CHECKING:
+    import arviz as az
+
+# Root attribute marking artifacts, holding the version of their layout.
+ARTIFACT_ATTRIBUTE = "arviz_dashboard_artifact"
+ARTIFACT_VERSION = 1
+
+# Every quantile the ridge plot sliders can ask for, and the midpoints of their ranges.
+QUANTILES = tuple(np.round(np.linspace(0, 1, 201), 3))
+
+GROUPS = (
+    "posterior",
+    "marginal_support",
+    "marginal_density",
+    "marginal_bandwidth",
+    "summary_mean",
+    "summary_hdi",
+    "summary_quantile",
+    "ridge_support",
+    "ridge_density",
+    "loo",
+    "waic",
+)
+
+ICS = ("loo", "waic")
+
+
+def marginal_densities(
+    posterior: xr.Dataset,
+    num_bins: int = 512,
+) -> tuple[xr.Dataset, xr.Dataset, xr.Dataset]:
+    """Densities of every chain, and of all chains, of every coordinate of every variable.
+
+    Parameters
+    ----------
+    posterior : xr.Dataset
+        Posterior with "chain" and "draw" dimensions.
+    num_bins : int, default 512
+        Number of points of the grid of every coordinate.
+
+    Returns
+    -------
+    tuple[xr.Dataset, xr.Dataset, xr.Dataset]
+        The grids, with a "bin" dimension, the densities, with "kde_row" and "bin" dimensions,
+        and the bandwidths, with a "kde_row" dimension. The rows are the chains and, last, the
+        chains aggregated. Densities integrate to one, and are stored as single precision.
+    """
+    supports = {}
+    densities = {}
+    bandwidths = {}
+    for name, data_array in posterior.data_vars.items():
+        data_array = data_array.transpose("chain", "draw", ...)
+        dims = data_array.dims[2:]
+        shape = data_array.shape[2:]
+        values = np.moveaxis(data_array.values, (0, 1), (-2, -1))
+        values = values.reshape(-1, *values.shape[-2:])
+        num_rows = values.shape[1] + 1
+        support = np.empty((len(values), num_bins))
+        density = np.empty((len(values), num_rows, num_bins), dtype=np.float32)
+        bandwidth = np.empty((len(values), num_rows))
+        for i, coordinate_values in enumerate(values):
+            support[i], density[i], bandwidth[i] = kde(
+                coordinate_values,
+                num_bins=num_bins,
+                aggregate=True,
+            )
+        supports[name] = ((*dims, "bin"), support.reshape(*shape, num_bins))
+        densities[name] = ((*dims, "kde_row", "bin"), density.reshape(*shape, num_rows, num_bins))
+        bandwidths[name] = ((*dims, "kde_row"), bandwidth.reshape(*shape, num_rows))
+    return xr.Dataset(supports), xr.Dataset(densities), xr.Dataset(bandwidths)
+
+
+def elpd_dataset(elpd: az.ELPDData) -> xr.Dataset:
+    """Pointwise arrays of an `ELPDData` as variables, and its other values as attributes."""
+    data_vars = {}
+    attrs = {"index": list(elpd.index)}
+    for key, value in elpd.items():
+        if isinstance(value, xr.DataArray):
+            data_vars[key] = value
+        elif isinstance(value, (bool, np.bool_)):
+            # netCDF has no boolean attributes.
+            attrs[key] = int(value)
+        else:
+            attrs[key] = value.item() if isinstance(value, np.generic) else value
+    return xr.Dataset(data_vars, attrs=attrs)
+
+
+def elpd_from_dataset(dataset: xr.Dataset) -> az.ELPDData:
+    """Inverse of `elpd_dataset`."""
+    import arviz as az
+
+    index = list(dataset.attrs["index"])
+    values = []
+    for key in index:
+        if key in dataset.data_vars:
+            values.append(dataset[key])
+        elif key == "warning":
+            values.append(bool(dataset.attrs[key]))
+        else:
+            values.append(dataset.attrs[key])
+    return az.ELPDData(data=values, index=index)
+
+
+def compile_artifact(
+    idata: az.InferenceData | str | Path,
+    path: str | Path,
+    max_draws: int = 1000,
+    num_bins: int = 512,
+    ics: tuple[str, ...] = ICS,
+) -> Path:
+    """Compute the results the dashboards show for a run, and write them to an artifact.
+
+    Parameters
+    ----------
+    idata : az.InferenceData | str | Path
+        Run with a posterior group, and optionally a log likelihood group, or the path to a
+        netCDF file or zarr store written by ArviZ.
+    path : str | Path
+        Path of the artifact. It is a zarr store if the path ends in `.zarr`, and a netCDF
+        file otherwise. An existing artifact is overwritten.
+    max_draws : int, default 1000
+        Maximum number of draws kept per chain for the trace plots. The other results are
+        computed from every draw.
+    num_bins : int, default 512
+        Number of points of the grid of every density.
+    ics : tuple[str, ...], default `ICS`
+        Information criteria whose pointwise ELPD is computed, if the run has a log likelihood.
+
+    Returns
+    -------
+    Path
+        Path of the artifact.
+    """
+    import arviz as az
+
+    if isinstance(idata, (str, Path)):
+        idata = open_inference_data(idata)
+    path = Path(path)
+    posterior = idata["posterior"]
+    num_draws = posterior.sizes["draw"]
+    stride = max(-(-num_draws // max_draws), 1)
+
+    groups = {}
+    # The kept draws keep their draw numbers in the run, so traces are drawn at their positions.
+    thinned = posterior.isel(draw=slice(None, None, stride))
+    groups["posterior"] = thinned.assign_coords(
+        draw=np.arange(num_draws)[::stride],
+    ).assign_attrs(num_draws=num_draws, draw_stride=stride)
+    (
+        groups["marginal_support"],
+        groups["marginal_density"],
+        groups["marginal_bandwidth"],
+    ) = marginal_densities(posterior, num_bins)
+
+    summary = PosteriorSummary(posterior, hdi_probs=HDI_PROBS, quantiles=QUANTILES)
+    groups["summary_mean"] = summary.mean
+    groups["summary_hdi"] = summary.hdis
+    groups["summary_quantile"] = summary.quantiles
+    ridge_supports = {}
+    ridge_densities = {}
+    for name in summary.mean.data_vars:
+        support, density = summary.density(name)
+        ridge_supports[name] = (("bin",), support)
+        ridge_densities[name] = ((f"{name}_row", "bin"), density.astype(np.float32))
+    groups["ridge_support"] = xr.Dataset(ridge_supports)
+    groups["ridge_density"] = xr.Dataset(ridge_densities)
+
+    if hasattr(idata, "log_likelihood"):
+        compute = {"loo": az.loo, "waic": az.waic}
+        for ic in ics:
+            if ic not in ICS:
+                raise ValueError(f"Unknown information criterion {ic!r}, expected 'loo' or 'waic'.")
+            groups[ic] = elpd_dataset(compute[ic](idata, pointwise=True))
+
+    root = xr.Dataset(attrs={ARTIFACT_ATTRIBUTE: ARTIFACT_VERSION})
+    if path.suffix == ".zarr":
+        root.to_zarr(path, mode="w")
+        for group, dataset in groups.items():
+            dataset.to_zarr(path, group=group, mode="a")
+    else:
+        root.to_netcdf(path, mode="w", engine="h5netcdf")
+        for group, dataset in groups.items():
+            dataset.to_netcdf(path, group=group, mode="a", engine="h5netcdf")
+    return path
+
+
+def is_artifact(path: str | Path) -> bool:
+    """Whether `path` is an artifact written by `compile_artifact`, rather than a run."""
+    path = Path(path)
+    if not path.exists():
+        return False
+    with open_dataset(path, group=None) as root:
+        return ARTIFACT_ATTRIBUTE in root.attrs
+
+
+class PosteriorArtifact:
+    """Results of a run read from an artifact, see `compile_artifact`.
+
+    Like `InferenceData`, the posterior is available as `artifact.posterior` and
+    `artifact["posterior"]`, so the dashboards take artifacts in place of runs.
+
+    Parameters
+    ----------
+    groups : dict[str, xr.Dataset]
+        Groups of the artifact, loaded in memory, see `open_artifact`.
+
+    Attributes
+    ----------
+    posterior : xr.Dataset
+        The thinned draws, whose "draw" coordinate holds their draw numbers in the run.
+    draw_stride : int
+        Number of draws of the run per thinned draw.
+    num_draws : int
+        Number of draws per chain of the run.
+    summary : PosteriorSummary
+        The precomputed summary of the run.
+    """
+
+    def __init__(self, groups: dict[str, xr.Dataset]) -> None:
+        self.groups = groups
+        self.posterior = groups["posterior"]
+        self.draw_stride = int(self.posterior.attrs["draw_stride"])
+        self.num_draws = int(self.posterior.attrs["num_draws"])
+        densities = {
+            name: (
+                groups["ridge_support"][name].values,
+                groups["ridge_density"][name].values.astype(float),
+            )
+            for name in groups["ridge_support"].data_vars
+        }
+        # Quantiles other than the precomputed ones are read from the thinned draws.
+        self.summary = PosteriorSummary.restore(
+            self.posterior,
+            groups["summary_mean"],
+            groups["summary_hdi"],
+            groups["summary_quantile"],
+            densities,
+        )
+        self._elpd = {}
+
+    def __getitem__(self, group: str) -> xr.Dataset:
+        return self.groups[group]
+
+    def __contains__(self, group: str) -> bool:
+        return group in self.groups
+
+    def marginal(
+        self,
+        name: str,
+        selection: dict[str, list[int]],
+        aggregate: bool = False,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Precomputed densities of the selected chains of a coordinate of a variable.
+
+        Parameters
+        ----------
+        name : str
+            Name of the variable.
+        selection : dict[str, list[int]]
+            Positions of the selected chains, and of the selected label of every dimension of
+            the variable, see `DashboardBaseClass.selection`.
+        aggregate : bool, default False
+            If `True`, add the density of the selected chains aggregated as a last row. For a
+            subset of the chains, it is the mixture of their densities.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, np.ndarray]
+            The grid, the densities and the bandwidths, as returned by
+            `arviz_dashboard.kde.kde`.
+        """
+        density = self["marginal_density"][name]
+        position = tuple(selection[dim][0] for dim in density.dims[:-2])
+        support = self["marginal_support"][name].values[position]
+        density = density.values[position].astype(float)
+        bandwidth = self["marginal_bandwidth"][name].values[position]
+        chains = list(selection["chain"])
+        if not aggregate:
+            return support, density[chains], bandwidth[chains]
+        if sorted(chains) != list(range(len(density) - 1)):
+            # Chains have as many draws, so the density of a subset is the mean of theirs.
+            density[-1] = density[chains].mean(axis=0)
+            bandwidth = bandwidth.copy()
+            bandwidth[-1] = bandwidth[chains].mean()
+        rows = [*chains, -1]
+        return support, density[rows], bandwidth[rows]
+
+    def elpd(self, ic: str) -> az.ELPDData:
+        """Pointwise ELPD of the run for the information criterion `ic`, "loo" or "waic"."""
+        if ic not in ICS:
+            raise ValueError(f"Unknown information criterion {ic!r}, expected 'loo' or 'waic'.")
+        if ic not in self.groups:
+            raise ValueError(
+                f"The artifact has no {ic!r} ELPD, it was compiled from a run without a log "
+                "likelihood group or without this information criterion.",
+            )
+        if ic not in self._elpd:
+            self._elpd[ic] = elpd_from_dataset(self.groups[ic])
+        return self._elpd[ic]
+
+
+def open_artifact(path: str | Path) -> PosteriorArtifact:
+    """Read an artifact written by `compile_artifact` in memory.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to the netCDF file or zarr store of the artifact.
+
+    Returns
+    -------
+    PosteriorArtifact
+        The results of the run.
+    """
+    if not is_artifact(path):
+        raise ValueError(f"{path} is not an artifact written by `compile_artifact`.")
+    groups = {}
+    for group in GROUPS:
+        try:
+            dataset = open_dataset(path, group=group)
+        except (OSError, KeyError):
+            # The ELPD groups are only written for runs with a log likelihood.
+            continue
+        with dataset:
+            groups[group] = dataset.load()
+    return PosteriorArtifact(groups)
+
+
+def open_run(path: str | Path) -> az.InferenceData | PosteriorArtifact:
+    """Open an artifact written by `compile_artifact`, or else a run written by ArviZ."""
+    if is_artifact(path):
+        return open_artifact(path)
+    return open_inference_data(path)
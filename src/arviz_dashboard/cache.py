@@ -0,0 +1,196 @@
+"""Bounded caches for posterior slices and computed results.
+
+`results` is the cache shared by every dashboard in the process. Its keys start with a token
+from `token`, which identifies the posterior the result was computed from. `runs` holds the
+inference data opened from files by served dashboards, see `arviz_dashboard.serve`. Once a run
+is evicted and no session uses it anymore, its results are discarded too.
+"""
+
+from __future__ import annotations
+
+import itertools
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import numpy as np
+
+
+def nbytes(value: Any) -> int:
+    """Approximate memory used by a value, following arrays inside dicts, lists and tuples.
+
+    Other objects are measured by their `nbytes` attribute, e.g. xarray objects or
+    `arviz_dashboard.summary.PosteriorSummary`, and pandas objects holding other objects, e.g.
+    `ELPDData`, by their items.
+
+    Parameters
+    ----------
+    value : Any
+        Value to measure.
+
+    Returns
+    -------
+    int
+        Number of bytes.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(item) for item in value)
+    if getattr(value, "dtype", None) == object and hasattr(value, "items"):
+        # The `nbytes` of an object column only counts its pointers.
+        return sum(nbytes(item) for _, item in value.items())
+    size = getattr(value, "nbytes", None)
+    if isinstance(size, (int, np.integer)):
+        return int(size)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Least recently used cache, bounded by its number of entries and by its size in bytes.
+
+    Parameters
+    ----------
+    max_items : int | None, default None
+        Maximum number of entries. If `None`, the number of entries is not bounded.
+    max_bytes : int | None, default None
+        Maximum total size of the entries, see `nbytes`. If `None`, the size is not bounded. A
+        single entry larger than `max_bytes` is not stored at all.
+    """
+
+    def __init__(self, max_items: int | None = None, max_bytes: int | None = None) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value stored for `key`, marking it as the most recently used."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store `value` for `key`, evicting the least recently used entries when full."""
+        size = nbytes(value)
+        with self._lock:
+            self.pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while (self.max_items is not None and len(self._entries) > self.max_items) or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove the value stored for `key`, and return it."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value, size = self._entries.pop(key)
+            self.nbytes -= size
+            return value
+
+    def discard(self, prefix: Hashable) -> None:
+        """Remove every entry whose key is a tuple starting with `prefix`."""
+        with self._lock:
+            keys = [key for key in self._entries if isinstance(key, tuple) and key[:1] == (prefix,)]
+            for key in keys:
+                self.pop(key)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the value stored for `key`, or compute, store and return it.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the value.
+        compute : Callable[[], Any]
+            Function computing the value when it is not stored.
+
+        Returns
+        -------
+        Any
+            The stored or computed value.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Remove every entry, and reset the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Number of hits, misses, entries and bytes of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "items": len(self._entries),
+            "nbytes": self.nbytes,
+        }
+
+
+results = LRUCache(max_items=1024, max_bytes=2**28)
+runs = LRUCache(max_items=8)
+
+_tokens = {}
+_counter = itertools.count()
+
+
+def token(obj: Any) -> int:
+    """A key for `obj` to use in the keys of `results`.
+
+    Tokens are never reused. When `obj` is garbage collected, the results computed from it are
+    discarded from `results`.
+
+    Parameters
+    ----------
+    obj : Any
+        Object results are computed from, usually a posterior. It must support weak references.
+
+    Returns
+    -------
+    int
+        The token of `obj`.
+    """
+    # `id` alone could be reused by a new object once `obj` is collected, so it only maps to a
+    # token while `obj` is alive.
+    obj_id = id(obj)
+    if obj_id not in _tokens:
+        _tokens[obj_id] = next(_counter)
+        weakref.finalize(obj, _release, obj_id, _tokens[obj_id])
+    return _tokens[obj_id]
+
+
+def _release(obj_id: int, obj_token: int) -> None:
+    _tokens.pop(obj_id, None)
+    results.discard(obj_token)
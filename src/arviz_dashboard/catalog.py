@@ -0,0 +1,96 @@
+"""Catalog of the variables and coordinates of several models.
+
+Multi-model dashboards fill their selectors from a `ModelCatalog`. It is built once when a
+model is registered, so switching models or variables only looks up dictionaries and never
+walks the xarray objects again.
+"""
+
+from __future__ import annotations
+
+import itertools
+from typing import Any, TypedDict
+
+import xarray as xr
+
+
+class VariableEntry(TypedDict):
+    dims: list[str]
+    shape: list[int]
+    coords: dict[str, list]
+
+
+class ModelCatalog:
+    """Dimensions, shapes and coordinate labels of every variable of every registered model.
+
+    Only the dimensions other than "chain" and "draw" are cataloged. A selection of one label
+    per dimension is named by its labels joined with ", ", e.g. "Choate" or "a, 2".
+    """
+
+    def __init__(self) -> None:
+        self.models: dict[str, dict[str, VariableEntry]] = {}
+        self._selections: dict[tuple[str, str], dict[str, dict[str, Any]]] = {}
+
+    def __contains__(self, model: str) -> bool:
+        return model in self.models
+
+    def register(self, model: str, posterior: xr.Dataset) -> None:
+        """Catalog the variables of a model.
+
+        Parameters
+        ----------
+        model : str
+            Name of the model.
+        posterior : xr.Dataset
+            Posterior of the model.
+        """
+        labels = {}
+        entries = {}
+        for name, data_array in posterior.data_vars.items():
+            dims = [dim for dim in data_array.dims if dim not in ("chain", "draw")]
+            for dim in dims:
+                if dim not in labels:
+                    if dim in posterior.indexes:
+                        labels[dim] = posterior.indexes[dim].tolist()
+                    else:
+                        labels[dim] = list(range(posterior.sizes[dim]))
+            entries[name] = {
+                "dims": dims,
+                "shape": [posterior.sizes[dim] for dim in dims],
+                "coords": {dim: labels[dim] for dim in dims},
+            }
+        self.models[model] = entries
+        for key in [key for key in self._selections if key[0] == model]:
+            del self._selections[key]
+
+    def variables(self, model: str) -> list[str]:
+        """Names of the variables of a model."""
+        return list(self.models[model])
+
+    def entry(self, model: str, variable: str) -> VariableEntry:
+        """Dimensions, shape and coordinate labels of a variable."""
+        return self.models[model][variable]
+
+    def selections(self, model: str, variable: str) -> dict[str, dict[str, Any]]:
+        """Every selection of one label per dimension of a variable, by name.
+
+        Parameters
+        ----------
+        model : str
+            Name of the model.
+        variable : str
+            Name of the variable.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            Selection names as keys, and dimension names and labels as values, in C order. A
+            variable without dimensions has one empty selection named "".
+        """
+        key = (model, variable)
+        if key not in self._selections:
+            entry = self.entry(model, variable)
+            self._selections[key] = {
+                ", ".join(str(label) for label in labels): dict(zip(entry["dims"], labels))
+                for labels in itertools.product(*entry["coords"].values())
+            }
+        return self._selections[key]
@@ -0,0 +1,135 @@
+"""Command line interface, installed as `arviz-dashboard`.
+
+Serve a dashboard of one or more runs to several users:
+
+    arviz-dashboard serve run.nc --dashboard trace --port 5006
+
+Compute the results of the dashboards for a run once, e.g. in a batch job, and serve them:
+
+    arviz-dashboard compile run.nc --output run.dashboard.nc
+    arviz-dashboard serve run.dashboard.nc --dashboard forest
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from arviz_dashboard.serve import DASHBOARDS
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Parser of the `arviz-dashboard` command and its subcommands."""
+    parser = argparse.ArgumentParser(prog="arviz-dashboard", description="Bayesian dashboards.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser(
+        "serve",
+        help="Serve a dashboard with Panel, sharing loaded runs and results across sessions.",
+    )
+    serve.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="netCDF files or zarr stores, of runs or of compiled artifacts.",
+    )
+    serve.add_argument("--dashboard", choices=DASHBOARDS, default="trace")
+    serve.add_argument("--port", type=int, default=5006)
+    serve.add_argument("--address", default=None, help="Address to listen on.")
+    serve.add_argument(
+        "--allow-websocket-origin",
+        action="append",
+        default=None,
+        help="Host allowed to connect, e.g. example.com:80. Can be repeated.",
+    )
+    serve.add_argument("--show", action="store_true", help="Open the dashboard in a browser.")
+    serve.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Read posteriors lazily from disk, one selected slice at a time.",
+    )
+    serve.add_argument("--max-runs", type=int, default=None, help="Runs kept open at most.")
+    serve.add_argument(
+        "--max-result-bytes",
+        type=int,
+        default=None,
+        help="Bytes of computed results kept at most, shared by all sessions.",
+    )
+    serve.set_defaults(func=run_serve)
+
+    compile_ = subparsers.add_parser(
+        "compile",
+        help="Precompute the results of the dashboards for a run, and write them to an artifact.",
+    )
+    compile_.add_argument("path", type=Path, help="netCDF file or zarr store of the run.")
+    compile_.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        default=None,
+        help="Path of the artifact, a zarr store if it ends in .zarr. Defaults to the path of "
+        "the run with a .dashboard.nc suffix.",
+    )
+    compile_.add_argument(
+        "--max-draws",
+        type=int,
+        default=1000,
+        help="Draws kept per chain for the trace plots.",
+    )
+    compile_.add_argument(
+        "--num-bins",
+        type=int,
+        default=512,
+        help="Points of the grid of every density.",
+    )
+    compile_.set_defaults(func=run_compile)
+    return parser
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    """Serve the dashboard of the `serve` subcommand, until the server is stopped."""
+    from arviz_dashboard.serve import serve
+
+    serve(
+        args.paths,
+        dashboard=args.dashboard,
+        lazy=args.lazy,
+        max_runs=args.max_runs,
+        max_result_bytes=args.max_result_bytes,
+        port=args.port,
+        address=args.address,
+        websocket_origin=args.allow_websocket_origin,
+        show=args.show,
+        title=f"ArviZ {args.dashboard} dashboard",
+    )
+    return 0
+
+
+def run_compile(args: argparse.Namespace) -> int:
+    """Compile the artifact of the `compile` subcommand, and print its path."""
+    from arviz_dashboard.artifact import compile_artifact
+
+    output = args.output
+    if output is None:
+        output = args.path.with_name(f"{args.path.stem}.dashboard.nc")
+    compile_artifact(args.path, output, max_draws=args.max_draws, num_bins=args.num_bins)
+    sys.stdout.write(f"{output}\n")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the `arviz-dashboard` command.
+
+    Parameters
+    ----------
+    argv : list[str] | None, default None
+        Arguments, without the program name. If None, read from `sys.argv`.
+
+    Returns
+    -------
+    int
+        Exit status.
+    """
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,176 @@
+"""Visual downsampling of trace lines.
+
+Long chains have far more draws than there are pixels to draw them on. The functions in this
+module pick a subset of the draws that keeps the visual shape of a trace, so only that subset
+needs to be sent to the browser.
+"""
+
+from __future__ import annotations
+
+from typing import Literal
+
+import numpy as np
+
+MIN_POINTS = 4
+
+
+def lttb(y: np.ndarray, num_points: int) -> np.ndarray:
+    """Select points with the largest-triangle-three-buckets algorithm.
+
+    The first and last points are always kept. The remaining points are split into
+    `num_points - 2` buckets, and from each bucket we keep the point forming the largest
+    triangle with the point kept from the previous bucket and the average of the next bucket.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        One-dimensional array of values, with the draw index as the implicit x-value.
+    num_points : int
+        Number of points to keep, at least three.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of the points to keep.
+    """
+    if num_points < 3:
+        raise ValueError(f"LTTB keeps at least 3 points, got num_points={num_points}.")
+    num_values = y.shape[0]
+    if num_points >= num_values:
+        return np.arange(num_values)
+
+    # Bucket `i` holds the values in `[edges[i], edges[i + 1])`. The spacing of the edges is at
+    # least one, so every bucket holds at least one value.
+    edges = np.linspace(1, num_values - 1, num_points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    x_means = (edges[:-1] + edges[1:] - 1) / 2
+    y_means = np.add.reduceat(y[: edges[-1]], edges[:-1]) / counts
+
+    indices = np.empty(num_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = num_values - 1
+    selected = 0
+    num_buckets = num_points - 2
+    for i in range(num_buckets):
+        start, stop = edges[i], edges[i + 1]
+        if i + 1 < num_buckets:
+            next_x, next_y = x_means[i + 1], y_means[i + 1]
+        else:
+            next_x, next_y = num_values - 1, y[-1]
+        bucket_x = np.arange(start, stop)
+        areas = np.abs(
+            (selected - next_x) * (y[start:stop] - y[selected])
+            - (selected - bucket_x) * (next_y - y[selected]),
+        )
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+def minmax(y: np.ndarray, num_points: int) -> np.ndarray:
+    """Select the minimum and maximum of equally sized buckets.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        One-dimensional array of values, with the draw index as the implicit x-value.
+    num_points : int
+        Maximum number of points to keep, at least four. The first and last points are always
+        kept, and two points are kept per bucket.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of the points to keep.
+    """
+    if num_points < MIN_POINTS:
+        raise ValueError(f"Min-max keeps at least 4 points, got num_points={num_points}.")
+    num_values = y.shape[0]
+    if num_points >= num_values:
+        return np.arange(num_values)
+    num_buckets = (num_points - 2) // 2
+
+    bucket_size = -(-num_values // num_buckets)
+    # Pad with the last value so the buckets can be reshaped into a two-dimensional array. A
+    # padded position can only be selected when it ties with the last value, so we clip it.
+    padded = np.pad(y, (0, num_buckets * bucket_size - num_values), mode="edge")
+    buckets = padded.reshape(num_buckets, bucket_size)
+    offsets = np.arange(num_buckets) * bucket_size
+    indices = np.concatenate(
+        [
+            [0, num_values - 1],
+            offsets + np.argmin(buckets, axis=1),
+            offsets + np.argmax(buckets, axis=1),
+        ],
+    )
+    return np.unique(np.minimum(indices, num_values - 1))
+
+
+def downsample(
+    y: np.ndarray,
+    num_points: int | None,
+    method: Literal["lttb", "minmax"] = "lttb",
+    start: int = 0,
+    stop: int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Downsample the draws of one chain between `start` and `stop`.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        One-dimensional array with the draws of a chain.
+    num_points : int | None
+        Maximum number of points, at least `MIN_POINTS`. If `None`, or if the range has fewer
+        draws than that, every draw in the range is kept.
+    method : {"lttb", "minmax"}, default "lttb"
+        Downsampling algorithm, see `lttb` and `minmax`.
+    start : int, default 0
+        First draw of the range.
+    stop : int | None, default None
+        Draw after the last draw of the range. If `None`, the range goes to the last draw.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The draw indices and values of the points to draw.
+    """
+    if num_points is not None and num_points < MIN_POINTS:
+        raise ValueError(f"Downsampling keeps at least {MIN_POINTS} points, got {num_points}.")
+    num_draws = y.shape[0]
+    start = min(max(int(start), 0), num_draws)
+    stop = num_draws if stop is None else min(max(int(stop), start), num_draws)
+    window = y[start:stop]
+    if num_points is None or num_points >= window.shape[0]:
+        return np.arange(start, stop), window
+    if method == "lttb":
+        indices = lttb(window, num_points)
+    elif method == "minmax":
+        indices = minmax(window, num_points)
+    else:
+        raise ValueError(f"Unknown method {method!r}, expected 'lttb' or 'minmax'.")
+    return start + indices, window[indices]
+
+
+def thin(y: np.ndarray, num_points: int | None) -> np.ndarray:
+    """Keep evenly spaced draws along the last axis.
+
+    Unlike `downsample`, thinning does not favour extreme values, so the thinned draws are
+    still a fair sample for density estimates.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        Array with the draws along the last axis.
+    num_points : int | None
+        Maximum number of draws to keep. If `None`, every draw is kept.
+
+    Returns
+    -------
+    np.ndarray
+        The thinned draws.
+    """
+    num_draws = y.shape[-1]
+    if num_points is None or num_points >= num_draws:
+        return y
+    step = -(-num_draws // num_points)
+    return y[..., ::step]
@@ -0,0 +1,151 @@
+"""Timings, payload sizes and cache hits of every interaction with a dashboard.
+
+A dashboard created with `instrument=True` records an `Interaction` each time it shows a
+selection, with the time spent in every phase:
+
+- "select": reading the selected slice of the posterior.
+- "statistics": computing the densities, downsampled traces, and so on, from the slice.
+- "render": creating or updating the Bokeh models.
+- "serialize": encoding the Bokeh models, or the data of the updated sources, as they are sent
+  to the browser.
+
+Every interaction is logged at the INFO level to the "arviz_dashboard.instrumentation" logger
+and passed to the functions registered with `add_hook`, e.g. to export metrics.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypedDict
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("select", "statistics", "render", "serialize")
+
+
+class Interaction(TypedDict):
+    dashboard: str
+    variable: str
+    selection: dict[str, Any]
+    phases: dict[str, float]
+    total: float
+    payload_bytes: int
+    cache_hits: int
+    cache_misses: int
+
+
+_hooks: list[Callable[[Interaction], None]] = []
+
+
+def add_hook(hook: Callable[[Interaction], None]) -> None:
+    """Call `hook` with every interaction recorded by an instrumented dashboard."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[Interaction], None]) -> None:
+    """Stop calling a hook registered with `add_hook`."""
+    _hooks.remove(hook)
+
+
+class Recorder:
+    """Time spent in every phase of one interaction.
+
+    Phases can be nested, e.g. "select" within "statistics". The time of a nested phase is
+    only counted in the nested phase, so no time is counted twice. Time outside every phase,
+    e.g. building cache keys, is only counted in the total of the interaction.
+
+    Attributes
+    ----------
+    phases : dict[str, float]
+        Seconds spent in every phase.
+    models : list
+        Bokeh models, or data dicts, sent to the browser, see `payload_bytes`.
+    """
+
+    def __init__(self: Recorder) -> None:
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.models = []
+        self._nested = [0.0]
+
+    @contextmanager
+    def phase(self: Recorder, name: str) -> Iterator[None]:
+        """Add the time spent within the context, outside nested phases, to `name`."""
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] += elapsed - self._nested.pop()
+            self._nested[-1] += elapsed
+
+
+def payload_bytes(models: list) -> int:
+    """Size of Bokeh models, or of dicts of their data, once encoded as Bokeh sends them.
+
+    Parameters
+    ----------
+    models : list
+        Bokeh models, e.g. figures, with the models they reference, or data dicts of
+        `ColumnDataSource` objects.
+
+    Returns
+    -------
+    int
+        Number of bytes of the JSON content and of the binary buffers of the arrays.
+    """
+    from bokeh.core.serialization import Serializer
+
+    size = 0
+    for model in models:
+        serialized = Serializer(deferred=True).serialize(model)
+        size += len(json.dumps(serialized.content, default=lambda buffer: buffer.ref))
+        size += sum(memoryview(buffer.data).nbytes for buffer in serialized.buffers)
+    return size
+
+
+def format_interaction(interaction: Interaction) -> str:
+    """Markdown table of the phases of an interaction, with its payload and cache hits."""
+    selection = ", ".join(f"{name}: {value}" for name, value in interaction["selection"].items())
+    rows = [
+        f"| {phase} | {1000 * seconds:.1f} ms |"
+        for phase, seconds in interaction["phases"].items()
+    ]
+    return "\n".join(
+        [
+            f"**{interaction['variable']}** ({selection})",
+            "",
+            "| Phase | Time |",
+            "| --- | --- |",
+            *rows,
+            f"| total | {1000 * interaction['total']:.1f} ms |",
+            "",
+            f"Payload: {interaction['payload_bytes'] / 1024:.1f} KiB, cache hits: "
+            f"{interaction['cache_hits']}, misses: {interaction['cache_misses']}",
+        ],
+    )
+
+
+def emit(interaction: Interaction) -> None:
+    """Log an interaction and pass it to the hooks."""
+    if logger.isEnabledFor(logging.INFO):
+        phases = " ".join(
+            f"{phase}={1000 * seconds:.1f}ms" for phase, seconds in interaction["phases"].items()
+        )
+        logger.info(
+            "%s %s %s %s total=%.1fms payload=%dB cache_hits=%d cache_misses=%d",
+            interaction["dashboard"],
+            interaction["variable"],
+            interaction["selection"],
+            phases,
+            1000 * interaction["total"],
+            interaction["payload_bytes"],
+            interaction["cache_hits"],
+            interaction["cache_misses"],
+        )
+    for hook in list(_hooks):
+        hook(interaction)
@@ -0,0 +1,125 @@
+"""Open posteriors and inference data stored in netCDF files or zarr stores."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import xarray as xr
+
+if TYPE_CHECKING:
+    import arviz as az
+
+# Files rewritten by zarr whenever an array or group of a store is written, in zarr v2 and v3.
+ZARR_METADATA = frozenset({".zmetadata", ".zgroup", ".zarray", ".zattrs", "zarr.json"})
+
+
+def open_dataset(
+    path: str | Path,
+    group: str | None = "posterior",
+    chunks: int | str | dict | None = None,
+) -> xr.Dataset:
+    """Open a group of a netCDF file or zarr store without reading its data.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to a netCDF file, or to a zarr store (a directory or a path ending in `.zarr`).
+    group : str | None, default "posterior"
+        Group of the file to open. If `None`, the root group.
+    chunks : int | str | dict | None, default None
+        Dask chunks for the variables. If `None`, the variables are backed by lazily indexed
+        arrays, so indexing them only reads the selected values from disk.
+
+    Returns
+    -------
+    xr.Dataset
+        The lazily opened group. Close it, or use it as a context manager, to release the file.
+    """
+    path = Path(path)
+    if path.is_dir() or path.suffix == ".zarr":
+        return xr.open_zarr(path, group=group, chunks=chunks)
+    # Without `cache=False`, xarray keeps every variable that is read in full in memory.
+    return xr.open_dataset(path, group=group, chunks=chunks, cache=False)
+
+
+def open_posterior(
+    path: str | Path,
+    group: str = "posterior",
+    lazy: bool = False,
+    chunks: int | str | dict | None = None,
+) -> xr.Dataset:
+    """Open the posterior group of a netCDF file or zarr store.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to a netCDF file, or to a zarr store (a directory or a path ending in `.zarr`).
+    group : str, default "posterior"
+        Group of the file holding the posterior.
+    lazy : bool, default False
+        If `True`, the posterior is not read into memory. Only the slices the dashboards select
+        are read from disk, see `open_dataset`.
+    chunks : int | str | dict | None, default None
+        Dask chunks for the variables of a lazily opened posterior.
+
+    Returns
+    -------
+    xr.Dataset
+        The posterior samples.
+    """
+    dataset = open_dataset(path, group=group, chunks=chunks)
+    if lazy:
+        return dataset
+    with dataset:
+        return dataset.load()
+
+
+def open_inference_data(path: str | Path) -> az.InferenceData:
+    """Open every group of a netCDF file or zarr store written by ArviZ.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to a netCDF file, or to a zarr store (a directory or a path ending in `.zarr`).
+
+    Returns
+    -------
+    az.InferenceData
+        The inference data, with every group read into memory.
+    """
+    import arviz as az
+
+    path = Path(path)
+    if path.is_dir() or path.suffix == ".zarr":
+        return az.from_zarr(str(path))
+    return az.from_netcdf(path)
+
+
+def modified_time_ns(path: str | Path) -> int:
+    """Time a netCDF file or zarr store was last written, in nanoseconds.
+
+    Rewriting the chunks of a zarr store does not change the modification time of its
+    directory, so a store is timed by the newest of its metadata files instead.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to a netCDF file, or to a zarr store.
+
+    Returns
+    -------
+    int
+        The modification time, as `os.stat_result.st_mtime_ns`.
+    """
+    path = Path(path)
+    if not path.is_dir():
+        return path.stat().st_mtime_ns
+    return max(
+        (
+            metadata.stat().st_mtime_ns
+            for metadata in path.rglob("*")
+            if metadata.name in ZARR_METADATA
+        ),
+        default=path.stat().st_mtime_ns,
+    )
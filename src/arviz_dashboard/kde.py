@@ -0,0 +1,120 @@
+"""Kernel density estimates of several chains at once.
+
+The draws of every chain are counted in bins on one grid shared by all chains, and the counts
+are smoothed with a Gaussian kernel by a single FFT convolution. The cost grows with the
+number of bins rather than with the number of chains, and the densities of different chains
+can be compared point by point.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def scott_bandwidth(variance: np.ndarray, count: np.ndarray) -> np.ndarray:
+    """Bandwidth of Scott's rule of thumb for series with the given variances and counts.
+
+    Parameters
+    ----------
+    variance : np.ndarray
+        Sample variance of every series.
+    count : np.ndarray
+        Number of draws of every series.
+
+    Returns
+    -------
+    np.ndarray
+        The bandwidths. Series with fewer than two draws get a bandwidth of NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 1.06 * np.sqrt(variance) * count ** (-1 / 5)
+
+
+def smooth_counts(counts: np.ndarray, bin_width: float, bandwidth: np.ndarray) -> np.ndarray:
+    """Convolve binned counts with a Gaussian kernel of one bandwidth per series.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Counts with shape `(num_series, num_bins)`.
+    bin_width : float
+        Width of the bins.
+    bandwidth : np.ndarray
+        Standard deviation of the kernel of every series.
+
+    Returns
+    -------
+    np.ndarray
+        The smoothed counts, with the same shape as `counts`.
+    """
+    num_bins = counts.shape[-1]
+    # Zero-pad to twice the length so the FFT convolution does not wrap around the edges.
+    frequencies = np.fft.rfftfreq(2 * num_bins, d=bin_width)
+    kernel = np.exp(-0.5 * (2 * np.pi * frequencies[None, :] * bandwidth[:, None]) ** 2)
+    smoothed = np.fft.irfft(np.fft.rfft(counts, n=2 * num_bins) * kernel, n=2 * num_bins)
+    return np.clip(smoothed[..., :num_bins], 0, None)
+
+
+def kde(
+    samples: np.ndarray,
+    num_bins: int = 512,
+    aggregate: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Kernel density estimates of several chains on a shared grid.
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        Draws with shape `(num_chains, num_draws)`. Non-finite draws are ignored.
+    num_bins : int, default 512
+        Number of points of the grid.
+    aggregate : bool, default False
+        If `True`, add a last row with the density of the draws of all chains together.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        The grid with shape `(num_bins,)`, the densities with shape `(num_chains, num_bins)`,
+        or `(num_chains + 1, num_bins)` when aggregated, and the bandwidth of every row. The
+        grid extends three bandwidths beyond the draws, so the tails are not cut off.
+    """
+    samples = np.atleast_2d(np.asarray(samples, dtype=float))
+    finite = np.isfinite(samples)
+    count = finite.sum(axis=1)
+    values = np.where(finite, samples, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = values.sum(axis=1) / count
+        variance = (np.where(finite, samples - mean[:, None], 0.0) ** 2).sum(axis=1) / (count - 1)
+    total = count.sum()
+    if aggregate:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            total_mean = values.sum() / total
+            total_variance = (np.where(finite, samples - total_mean, 0.0) ** 2).sum() / (total - 1)
+        count = np.append(count, total)
+        variance = np.append(variance, total_variance)
+    bandwidth = scott_bandwidth(variance, count)
+
+    if total == 0:
+        support = np.linspace(-0.5, 0.5, num_bins)
+        return support, np.zeros((count.shape[0], num_bins)), bandwidth
+    minimum = samples[finite].min()
+    maximum = samples[finite].max()
+    valid = np.isfinite(bandwidth) & (bandwidth > 0)
+    padding = 3 * bandwidth[valid].max() if valid.any() else 0.5
+    lower = minimum - padding
+    bin_width = (maximum - minimum + 2 * padding) / num_bins
+    # Degenerate series, with fewer than two draws or a single value, get a kernel of one bin.
+    bandwidth = np.where(valid, np.maximum(bandwidth, bin_width), bin_width)
+
+    bins = np.clip(((values - lower) / bin_width).astype(np.int64), 0, num_bins - 1)
+    offsets = np.arange(samples.shape[0])[:, None] * num_bins
+    counts = np.bincount(
+        (bins + offsets)[finite],
+        minlength=samples.shape[0] * num_bins,
+    ).reshape(samples.shape[0], num_bins)
+    if aggregate:
+        counts = np.concatenate([counts, counts.sum(axis=0, keepdims=True)])
+    density = smooth_counts(counts.astype(float), bin_width, bandwidth)
+    density /= np.maximum(count, 1)[:, None] * bin_width
+    support = lower + (np.arange(num_bins) + 0.5) * bin_width
+    return support, density, bandwidth
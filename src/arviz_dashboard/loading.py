@@ -0,0 +1,168 @@
+"""Open the models of multi-model dashboards in the background.
+
+A `ModelLoader` maps model names to inference data like a dict, but its values can be given as
+paths or loader callables. Each model is opened at most once, in a thread pool, the first time
+it is asked for or prefetched, so dashboards can render before every model is read.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Union
+
+from arviz_dashboard.artifact import open_run
+
+if TYPE_CHECKING:
+    import arviz as az
+
+ModelSource = Union["az.InferenceData", str, Path, Callable[[], "az.InferenceData"]]
+
+
+class ModelLoader(Mapping):
+    """Models opened on demand, or prefetched, in a bounded thread pool.
+
+    Parameters
+    ----------
+    sources : Mapping[str, ModelSource]
+        Model names as keys. Values are paths to netCDF files or zarr stores, of runs or of
+        artifacts, see `arviz_dashboard.artifact`, callables returning the model, or already
+        loaded objects such as `InferenceData`, which are used as they are.
+    max_workers : int, default 4
+        Maximum number of models opened at the same time.
+    """
+
+    def __init__(self, sources: Mapping[str, ModelSource], max_workers: int = 4) -> None:
+        self.sources = dict(sources)
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model")
+
+    def __getitem__(self, name: str) -> az.InferenceData:
+        """Return a model, waiting for it to be opened if needed."""
+        if name not in self.sources:
+            raise KeyError(name)
+        return self.submit(name).result()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sources)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def submit(self, name: str) -> Future:
+        """Start opening a model, if it is not opened or being opened already.
+
+        Parameters
+        ----------
+        name : str
+            Name of the model.
+
+        Returns
+        -------
+        Future
+            Future resolving to the model, e.g. its `InferenceData`.
+        """
+        with self._lock:
+            if name not in self._futures:
+                source = self.sources[name]
+                if isinstance(source, (str, Path)):
+                    future = self._executor.submit(open_run, source)
+                elif callable(source):
+                    future = self._executor.submit(source)
+                else:
+                    future = Future()
+                    future.set_result(source)
+                self._futures[name] = future
+            return self._futures[name]
+
+    def is_loaded(self, name: str) -> bool:
+        """Whether a model is opened, without starting to open it."""
+        future = self._futures.get(name)
+        if future is None:
+            source = self.sources[name]
+            return not isinstance(source, (str, Path)) and not callable(source)
+        return future.done()
+
+    def prefetch(self, names: list[str] | None = None) -> None:
+        """Start opening several models, at most `max_workers` at a time.
+
+        Parameters
+        ----------
+        names : list[str] | None, default None
+            Names of the models. If None, every model is prefetched, in order.
+        """
+        for name in self.sources if names is None else names:
+            self.submit(name)
+
+    async def wait(self, names: list[str]) -> None:
+        """Wait, without blocking the event loop, until all the given models are opened."""
+        await asyncio.gather(*(asyncio.wrap_future(self.submit(name)) for name in names))
+
+    def when_loaded(self, names: list[str], callback: Callable[[], None]) -> bool:
+        """Call `callback` once all the given models are opened.
+
+        Parameters
+        ----------
+        names : list[str]
+            Names of the models, which are submitted if needed.
+        callback : Callable[[], None]
+            Function called without arguments. If a model is still being opened it is called
+            from a worker thread, so it should hand the work over to the dashboard, e.g. with
+            `panel_callback`.
+
+        Returns
+        -------
+        bool
+            True if all the models were already opened, in which case `callback` was called
+            before returning.
+        """
+        futures = [self.submit(name) for name in names]
+        pending = [future for future in futures if not future.done()]
+        if not pending:
+            callback()
+            return True
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def done(_: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                callback()
+
+        for future in pending:
+            future.add_done_callback(done)
+        return False
+
+
+def panel_callback(callback: Callable[..., None]) -> Callable[..., None]:
+    """Wrap a callback so it runs on the Bokeh document of the current Panel session.
+
+    Parameters
+    ----------
+    callback : Callable[..., None]
+        Function updating the dashboard.
+
+    Returns
+    -------
+    Callable[..., None]
+        Function that can be called from any thread, with the arguments of `callback`. In a
+        Panel server it schedules `callback` on the session's document, holding its lock,
+        elsewhere it calls `callback` directly.
+    """
+    import panel as pn
+    from panel.io.state import set_curdoc
+
+    doc = pn.state.curdoc
+
+    def run(*args) -> None:
+        with set_curdoc(doc):
+            pn.state.execute(partial(callback, *args))
+
+    return run
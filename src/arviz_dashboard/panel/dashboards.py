@@ -1,56 +1,502 @@
 from __future__ import annotations
 
+import contextlib
+import sys
+import time
+from collections.abc import Iterator
+
 import arviz as az
+import numpy as np
 import panel as pn
 import param
+import xarray as xr
+from bokeh.models.renderers import GlyphRenderer
+from bokeh.models.sources import ColumnDataSource
+from bokeh.models.tools import HoverTool
 from bokeh.palettes import Colorblind8
 from bokeh.plotting import figure
 
+from arviz_dashboard import cache
+from arviz_dashboard.artifact import PosteriorArtifact
+from arviz_dashboard.cache import LRUCache
+from arviz_dashboard.instrumentation import (
+    Interaction,
+    Recorder,
+    emit,
+    format_interaction,
+    payload_bytes,
+)
+from arviz_dashboard.kde import kde
+from arviz_dashboard.panel import plots
+from arviz_dashboard.panel.notebook import load_extension
+
+
+class CoordinateIndex:
+    """Positions of the coordinate labels of a posterior, and the dimensions of its variables.
+
+    The index is built once per posterior, so selecting a label is a dictionary lookup rather
+    than a scan of the coordinate values.
+
+    Parameters
+    ----------
+    posterior : xr.Dataset
+        Posterior to index.
+
+    Attributes
+    ----------
+    positions : dict[str, dict[Hashable, int]]
+        Dimension names as keys, and dictionaries from labels to positions as values, for every
+        dimension except "draw". Dimensions without a coordinate are labelled by position.
+    variable_dims : dict[str, tuple[str, ...]]
+        Data variable names as keys, and their dimensions other than "chain" and "draw" as
+        values.
+    """
+
+    def __init__(self: CoordinateIndex, posterior: xr.Dataset) -> None:
+        self.positions = {
+            dimension_name: {
+                label: position
+                for position, label in enumerate(self.labels(posterior, dimension_name))
+            }
+            for dimension_name in posterior.sizes
+            if dimension_name != "draw"
+        }
+        self.variable_dims = {
+            name: tuple(
+                dimension_name
+                for dimension_name in posterior[name].dims
+                if dimension_name not in ["chain", "draw"]
+            )
+            for name in posterior.data_vars
+        }
+
+    @property
+    def nbytes(self: CoordinateIndex) -> int:
+        """Approximate bytes used by the dictionaries of positions, and their labels."""
+        return sum(
+            sys.getsizeof(positions) + sum(sys.getsizeof(label) for label in positions)
+            for positions in self.positions.values()
+        )
+
+    @staticmethod
+    def labels(posterior: xr.Dataset, dimension_name: str) -> list:
+        """Labels of a dimension, or its positions if it has no coordinate."""
+        if dimension_name in posterior.indexes:
+            return posterior.indexes[dimension_name].tolist()
+        return list(range(posterior.sizes[dimension_name]))
+
+    @classmethod
+    def of(cls: type[CoordinateIndex], posterior: xr.Dataset) -> CoordinateIndex:
+        """The index of `posterior`, shared by every dashboard showing it."""
+        return cache.results.get_or_compute(
+            (cache.token(posterior), "coordinate_index"),
+            lambda: cls(posterior),
+        )
+
 
 class DashboardBaseClass(param.Parameterized):
-    """Base class for creation dashboards."""
+    """Base class for creation dashboards.
+
+    Parameters
+    ----------
+    idata : az.InferenceData | PosteriorArtifact
+        An ArviZ `InferenceData` object that contains the posterior for the model. The posterior
+        may be opened lazily, with dask chunks or backed by a file, in which case only the
+        selected slices are ever read from disk. With an artifact, see
+        `arviz_dashboard.artifact`, the densities are looked up rather than computed, and the
+        thinned draws are shown.
+    max_resident_bytes : int | None, default 2**28
+        Maximum size of the selected slices kept in memory. Slices are evicted least recently
+        used first. If `None`, every selected slice is kept.
+    persistent : bool, default True
+        If `True`, the figures and their glyphs are created once, and later interactions only
+        replace the data of their `ColumnDataSource` objects, so only the changed arrays are
+        sent to the browser. If `False`, the figures are created again on every interaction.
+    instrument : bool, default False
+        If `True`, record the time spent in every phase of every interaction, the size of the
+        Bokeh payload and the cache hits, see `arviz_dashboard.instrumentation`.
+
+    Attributes
+    ----------
+    results : LRUCache
+        Cache of computed results, see `cached`. By default it is shared by every dashboard in
+        the process.
+    artifact : PosteriorArtifact | None
+        The artifact the dashboard was created from, if any.
+    last_interaction : Interaction | None
+        The last interaction recorded with `instrument`.
+    """
 
     figure_names = []
+    results = cache.results
 
-    def __init__(self: DashboardBaseClass, idata: az.InferenceData, **params) -> None:
+    def __init__(
+        self: DashboardBaseClass,
+        idata: az.InferenceData,
+        max_resident_bytes: int | None = 2**28,
+        persistent: bool = True,
+        instrument: bool = False,
+        **params,
+    ) -> None:
         # Input data.
         self.posterior = idata["posterior"]
-        self.chains = self.posterior.coords["chain"].data.tolist()
+        self.artifact = idata if isinstance(idata, PosteriorArtifact) else None
+        self.resident = LRUCache(max_bytes=max_resident_bytes)
+        self.index = CoordinateIndex.of(self.posterior)
+        self.chains = list(self.index.positions["chain"])
         self.dimension_names = [
             dimension_name
-            for dimension_name in self.posterior.coords.dims
+            for dimension_name in self.index.positions
             if dimension_name not in ["chain", "draw"]
         ]
         self.dimensions = {
-            dimension_name: self.posterior.coords[dimension_name].values.tolist()
+            dimension_name: self.index.positions[dimension_name]
             for dimension_name in self.dimension_names
         }
 
         # Plotting
         self.palette = Colorblind8
+        self.persistent = persistent
+
+        # Instrumentation
+        self.instrument = instrument
+        self.last_interaction = None
+        self._recorder = None
+        self._stats_pane = None
 
         super().__init__(**params)
 
+    def selection(self: DashboardBaseClass) -> dict[str, list[int]]:
+        """Positions of the selected chains and coordinates of the selected random variable.
+
+        Positions are looked up in the coordinate index, see `CoordinateIndex`.
+
+        Returns
+        -------
+        dict[str, list[int]]
+            Dimension names as keys and lists of selected positions as values.
+        """
+        positions = self.index.positions
+        mask = {"chain": [positions["chain"][chain] for chain in self.chain_selector]}
+        for dimension_name in self.index.variable_dims[self.rv_selector]:
+            dimension_value = getattr(self, f"{dimension_name}_selector")
+            mask[dimension_name] = [positions[dimension_name][dimension_value]]
+        return mask
+
+    def selection_key(self: DashboardBaseClass) -> tuple:
+        """Hashable key of the selected random variable, chains and coordinates."""
+        mask = self.selection()
+        return (self.rv_selector, *((name, tuple(values)) for name, values in mask.items()))
+
+    def select(self: DashboardBaseClass, posterior=None):
+        """Samples of the selected random variable, coordinates and chains.
+
+        Parameters
+        ----------
+        posterior : xr.Dataset, optional
+            Posterior to select from. Defaults to the posterior of the dashboard.
+
+        Returns
+        -------
+        np.ndarray
+            Array with the selected chains along the first axis and the draws along the second.
+            Slices of the posterior of the dashboard are kept in memory, up to
+            `max_resident_bytes`.
+        """
+        mask = self.selection()
+
+        def read():
+            # Index before reading, so lazy backends only read the selected slice.
+            data = (self.posterior if posterior is None else posterior)[self.rv_selector]
+            data = data.isel(mask).values
+            if len(data.shape) == 1:
+                data = data.reshape(1, -1)
+            return data
+
+        with self.phase("select"):
+            if posterior is not None:
+                return read()
+            return self.resident.get_or_compute(self.selection_key(), read)
+
+    def cached(self: DashboardBaseClass, kind: str, compute, *extra):
+        """Look up a result for the current selection in the shared result cache.
+
+        The key holds the posterior, `kind`, the selected random variable, chains and
+        coordinates, and `extra`, so dashboards showing the same posterior share results.
+
+        Parameters
+        ----------
+        kind : str
+            Name of the result, e.g. "marginal".
+        compute : Callable[[], Any]
+            Function computing the result when it is not cached.
+        *extra : Hashable
+            Other parameters the result depends on, e.g. the chain aggregation mode.
+
+        Returns
+        -------
+        Any
+            The cached or computed result. It is shared, so it must not be modified.
+        """
+        key = (cache.token(self.posterior), kind, *self.selection_key(), *extra)
+        return self.results.get_or_compute(key, compute)
+
+    def compute_marginal(self: DashboardBaseClass) -> dict[str, dict[str, np.ndarray]]:
+        """Kernel density estimates of the selected chains, separately or aggregated.
+
+        The densities of all chains are computed at once on a shared grid, see
+        `arviz_dashboard.kde.kde`, or looked up in the artifact of the dashboard, and scaled to
+        a maximum of one.
+        """
+
+        def compute():
+            aggregate = self.chain_aggregation == "aggregate"
+            if self.artifact is not None:
+                support, density, bandwidth = self.artifact.marginal(
+                    self.rv_selector,
+                    self.selection(),
+                    aggregate,
+                )
+            else:
+                data = self.select()
+                support, density, bandwidth = kde(
+                    data.reshape(data.shape[0], -1),
+                    aggregate=aggregate,
+                )
+            maximum = density.max(axis=1, keepdims=True)
+            density = np.divide(density, maximum, out=np.zeros_like(density), where=maximum > 0)
+            if aggregate:
+                rows = {"0": -1}
+            else:
+                rows = {f"{chain}": i for i, chain in enumerate(self.chain_selector)}
+            return {
+                chain: {
+                    "support": support,
+                    "density": density[row],
+                    "bandwidth": bandwidth[row : row + 1 or None],
+                }
+                for chain, row in rows.items()
+            }
+
+        return self.cached("marginal", compute, self.chain_aggregation)
+
     def _compute(self: DashboardBaseClass):
         raise NotImplementedError("To be implemented by the inheriting class.")
 
     def compute(self: DashboardBaseClass):
         """Compute the data needed for the dashboard for the selected random variable."""
-        return self._compute()
+        with self.phase("statistics"):
+            return self._compute()
 
     def _plot(self: DashboardBaseClass, *args):
         raise NotImplementedError("To be implemented by the inheriting class.")
 
     def plot(self: DashboardBaseClass, *args):
         """Plots for the dashboard."""
-        return self._plot(*args)
+        with self.interaction() as recorder:
+            with self.phase("render"):
+                layout = self._plot(*args)
+            if recorder is not None:
+                recorder.models = [pane.object for pane in layout.select(pn.pane.Bokeh)]
+        return layout
+
+    def _create_figures(self: DashboardBaseClass):
+        raise NotImplementedError("To be implemented by the inheriting class.")
+
+    def _update_figures(self: DashboardBaseClass, data: dict) -> None:
+        raise NotImplementedError("To be implemented by the inheriting class.")
+
+    def update(self: DashboardBaseClass, *events) -> None:
+        """Show the current selection in the persistent figures, replacing only their data."""
+        with self.interaction() as recorder:
+            if recorder is not None:
+                sources = [
+                    source
+                    for pane in self._layout.select(pn.pane.Bokeh)
+                    for source in pane.object.select(type=ColumnDataSource)
+                ]
+                previous = [source.data for source in sources]
+            data = self.compute()
+            # Send the changes of all sources to the browser in one message.
+            with pn.io.hold(), self.phase("render"):
+                self._update_figures(data)
+            if recorder is not None:
+                # Only the sources whose data was replaced are sent to the browser.
+                recorder.models = [
+                    source.data
+                    for source, data in zip(sources, previous)
+                    if source.data is not data
+                ]
 
-    def show(self: DashboardBaseClass) -> None:
+    def phase(self: DashboardBaseClass, name: str) -> contextlib.AbstractContextManager:
+        """Time a phase of the interaction being recorded, if any, see `interaction`."""
+        if self._recorder is None:
+            return contextlib.nullcontext()
+        return self._recorder.phase(name)
+
+    @contextlib.contextmanager
+    def interaction(self: DashboardBaseClass) -> Iterator[Recorder | None]:
+        """Record the phases, payload and cache hits of showing the current selection.
+
+        Does nothing, and yields None, without `instrument` or within another interaction.
+        Otherwise yields a `Recorder`, whose `models` are measured once the context exits.
+        The recorded `Interaction` is kept in `last_interaction`, emitted to the logger and
+        hooks of `arviz_dashboard.instrumentation`, and shown in the stats pane, if any.
+        """
+        if not self.instrument or self._recorder is not None:
+            yield None
+            return
+        caches = [self.results, self.resident]
+        hits = sum(cache.hits for cache in caches)
+        misses = sum(cache.misses for cache in caches)
+        start = time.perf_counter()
+        self._recorder = recorder = Recorder()
+        try:
+            yield recorder
+            with recorder.phase("serialize"):
+                size = payload_bytes(recorder.models)
+        finally:
+            self._recorder = None
+        selection = {"chain": list(self.chain_selector)}
+        for dimension_name in self.index.variable_dims[self.rv_selector]:
+            selection[dimension_name] = getattr(self, f"{dimension_name}_selector")
+        interaction = Interaction(
+            dashboard=type(self).__name__,
+            variable=self.rv_selector,
+            selection=selection,
+            phases=recorder.phases,
+            total=time.perf_counter() - start,
+            payload_bytes=size,
+            cache_hits=sum(cache.hits for cache in caches) - hits,
+            cache_misses=sum(cache.misses for cache in caches) - misses,
+        )
+        self.last_interaction = interaction
+        emit(interaction)
+        if self._stats_pane is not None:
+            self._stats_pane.object = format_interaction(interaction)
+
+    def add_lines(
+        self: DashboardBaseClass,
+        fig: figure,
+        names: list[str],
+        **line_kwargs,
+    ) -> dict[str, tuple[ColumnDataSource, GlyphRenderer, HoverTool]]:
+        """Add one line glyph with its own data source and hover tool for each name.
+
+        Parameters
+        ----------
+        fig : figure
+            Bokeh figure to add the lines to.
+        names : list[str]
+            Names of the lines, usually the chains. The n-th line gets the n-th palette color.
+        **line_kwargs
+            Other arguments for `figure.line`.
+
+        Returns
+        -------
+        dict[str, tuple[ColumnDataSource, GlyphRenderer, HoverTool]]
+            The data source, glyph renderer and hover tool of every line, by name. The lines
+            start empty and hidden, see `show_lines`.
+        """
+        lines = {}
+        for i, name in enumerate(names):
+            color = self.palette[i % len(self.palette)]
+            cds = ColumnDataSource(data={"x": [], "y": []})
+            glyph = fig.line(
+                x="x",
+                y="y",
+                source=cds,
+                line_alpha=0.6,
+                line_color=color,
+                hover_line_alpha=1.0,
+                hover_line_color=color,
+                visible=False,
+                **line_kwargs,
+            )
+            tips = HoverTool(renderers=[glyph], tooltips=[("Chain", name)])
+            fig.add_tools(tips)
+            lines[name] = (cds, glyph, tips)
+        return lines
+
+    def show_lines(
+        self: DashboardBaseClass,
+        lines: dict[str, tuple[ColumnDataSource, GlyphRenderer, HoverTool]],
+        data: dict[str, dict[str, np.ndarray]],
+        tooltip_field: str,
+    ) -> None:
+        """Replace the data of the lines created by `add_lines`.
+
+        Parameters
+        ----------
+        lines : dict[str, tuple[ColumnDataSource, GlyphRenderer, HoverTool]]
+            Lines created by `add_lines`.
+        data : dict[str, dict[str, np.ndarray]]
+            Names of the lines to show as keys, and their "x" and "y" arrays as values. The
+            other lines are emptied and hidden.
+        tooltip_field : {"x", "y"}
+            Column shown next to the random variable in the hover tools.
+        """
+        for name, (cds, glyph, tips) in lines.items():
+            if name in data:
+                cds.data = {"x": data[name]["x"], "y": data[name]["y"]}
+                glyph.visible = True
+                tooltips = [("Chain", name), (self.rv_selector, f"@{tooltip_field}")]
+                if tips.tooltips != tooltips:
+                    tips.tooltips = tooltips
+            elif glyph.visible:
+                cds.data = {"x": [], "y": []}
+                glyph.visible = False
+
+    def create_marginal_figure(self: DashboardBaseClass) -> figure:
+        """Persistent figure for the output of `compute_marginal`, see `show_marginal`."""
+        fig = figure()
+        plots.style_figure(fig, self.rv_selector)
+        self._marginal_lines = self.add_lines(
+            fig,
+            [f"{chain}" for chain in self.chains] + ["aggregate"],
+            line_width=2.0,
+        )
+        return fig
+
+    def show_marginal(self: DashboardBaseClass, fig: figure, data: dict) -> None:
+        """Show the output of `compute_marginal` in the figure of `create_marginal_figure`."""
+        if self.chain_aggregation == "aggregate":
+            data = {"aggregate": data["0"]}
+        self.show_lines(
+            self._marginal_lines,
+            {
+                chain: {"x": chain_data["support"], "y": chain_data["density"]}
+                for chain, chain_data in data.items()
+            },
+            tooltip_field="x",
+        )
+        fig.title.text = self.rv_selector
+        self._marginal_sources = {chain: self._marginal_lines[chain][0] for chain in data}
+
+    def show(self: DashboardBaseClass, stats: bool = False) -> None:
         """Shows the dashboard in a Jupyter environment.
 
+        Parameters
+        ----------
+        stats : bool, default False
+            If `True`, instrument the dashboard and add a collapsible pane showing the phases,
+            payload and cache hits of the last interaction, see `interaction`.
+
         Returns
         -------
         None
             Renders the dashboard directly in the notebook.
         """
-        return pn.Row(self.param, self.plot)
+        load_extension()
+        if stats:
+            self.instrument = True
+            self._stats_pane = pn.pane.Markdown("")
+        if not self.persistent:
+            layout = self.plot
+        else:
+            self._layout = layout = self._create_figures()
+            self.update()
+            self.param.watch(self.update, [name for name in self.param if name != "name"])
+        if stats:
+            layout = pn.Column(layout, pn.Card(self._stats_pane, title="Stats", collapsed=True))
+        return pn.Row(self.param, layout)
@@ -2,29 +2,361 @@
 Module for creating a dashboard to compare ELPD (Expected Log Point Density) of models.
 """
 
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
 import arviz as az
-import bokeh.io
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import panel as pn
+from arviz.plots.plot_utils import format_coords_as_labels
+from bokeh.models import ColumnDataSource, Span
 from bokeh.palettes import Category10
 from bokeh.plotting import figure
 
-# Set up Bokeh for notebook output
-bokeh.io.reset_output()
-bokeh.io.output_notebook()
-pn.extension()
+from arviz_dashboard import cache
+from arviz_dashboard.artifact import PosteriorArtifact
+from arviz_dashboard.loading import ModelLoader, panel_callback
+from arviz_dashboard.panel.notebook import display
+
+
+def compute_elpd(idata, ic: str) -> az.ELPDData:
+    """
+    Compute the pointwise ELPD of one model.
+
+    Parameters
+    ----------
+    idata : az.InferenceData | az.ELPDData | PosteriorArtifact
+        Model with a log likelihood group, its already computed pointwise `ELPDData`, or an
+        artifact holding it, see `arviz_dashboard.artifact`.
+    ic : str
+        The information criterion, "loo" or "waic".
+
+    Returns
+    -------
+    az.ELPDData
+        The ELPD of the model, with its pointwise values.
+    """
+    if isinstance(idata, az.ELPDData):
+        return idata
+    if isinstance(idata, PosteriorArtifact):
+        return idata.elpd(ic)
+    if ic == "loo":
+        return az.loo(idata, pointwise=True)
+    if ic == "waic":
+        return az.waic(idata, pointwise=True)
+    raise ValueError(f"Unknown information criterion {ic!r}, expected 'loo' or 'waic'.")
+
+
+class ELPDStore:
+    """
+    Pointwise ELPD of every model, computed once per model and information criterion.
+
+    The ELPD is also kept in the shared result cache, `arviz_dashboard.cache.results`, so
+    stores built from the same `InferenceData` objects, e.g. by every session of a served
+    dashboard, compute it once.
+
+    Parameters
+    ----------
+    idatas_cmp : dict
+        A dictionary with model names as keys, and `InferenceData` objects with a log likelihood
+        group, or already computed pointwise `ELPDData` objects, as values.
+    """
+
+    def __init__(self, idatas_cmp: dict) -> None:
+        self.idatas_cmp = idatas_cmp
+        self._elpd = {}
+        self._pending: dict[tuple[str, str], Future] = {}
+        self._pairwise = {}
+        self._compare = {}
+
+    def get(self, model: str, ic: str) -> az.ELPDData:
+        """
+        Return the pointwise ELPD of a model, computing it the first time it is asked for.
+
+        Parameters
+        ----------
+        model : str
+            Name of the model.
+        ic : str
+            The information criterion, "loo" or "waic".
+
+        Returns
+        -------
+        az.ELPDData
+            The ELPD of the model, with its pointwise values.
+        """
+        key = (model, ic)
+        pending = self._pending.get(key)
+        if key not in self._elpd and pending is not None and pending.exception() is None:
+            # Computed by `compute_all`. If its worker failed, it is computed again here, so
+            # the error is raised to the caller and a later call can still succeed.
+            self._elpd[key] = pending.result()
+        if key not in self._elpd:
+            idata = self.idatas_cmp[model]
+            self._elpd[key] = cache.results.get_or_compute(
+                (cache.token(idata), "elpd", ic),
+                lambda: compute_elpd(idata, ic),
+            )
+        return self._elpd[key]
+
+    def compute_all(
+        self,
+        ics: tuple[str, ...] = ("loo", "waic"),
+        max_workers: int | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> None:
+        """
+        Compute the pointwise ELPD of every model up front, in a process pool.
+
+        The workers are spawned rather than forked, as models may still be opened by the
+        threads of a `ModelLoader`, which a forked process would inherit mid-read.
+
+        Parameters
+        ----------
+        ics : tuple[str, ...], default ("loo", "waic")
+            The information criteria to compute.
+        max_workers : int | None, default None
+            Maximum number of processes. If None, one per CPU.
+        on_progress : Callable[[int, int], None] | None, default None
+            Function called with the number of computed and of all ELPD, first with none
+            computed and then every time the ELPD of a model is computed.
+
+        Notes
+        -----
+        An ELPD whose worker raises is skipped, and computed again by `get` when asked for.
+        """
+        for ic in ics:
+            for model in self.idatas_cmp:
+                shared = cache.results.get((cache.token(self.idatas_cmp[model]), "elpd", ic))
+                if shared is not None:
+                    self._elpd[(model, ic)] = shared
+        keys = [
+            (model, ic)
+            for ic in ics
+            for model in self.idatas_cmp
+            if (model, ic) not in self._elpd
+        ]
+        if on_progress is not None:
+            on_progress(0, len(keys))
+        if not keys:
+            return
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            futures = {}
+            for model, ic in keys:
+                future = executor.submit(compute_elpd, self.idatas_cmp[model], ic)
+                futures[future] = (model, ic)
+                self._pending[(model, ic)] = future
+            for done, future in enumerate(as_completed(futures), start=1):
+                model, ic = futures[future]
+                try:
+                    if future.exception() is None:
+                        self._elpd[(model, ic)] = future.result()
+                        cache.results.put(
+                            (cache.token(self.idatas_cmp[model]), "elpd", ic),
+                            self._elpd[(model, ic)],
+                        )
+                finally:
+                    self._pending.pop((model, ic))
+                if on_progress is not None:
+                    on_progress(done, len(keys))
+
+    def start_all(
+        self,
+        ics: tuple[str, ...] = ("loo", "waic"),
+        max_workers: int | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> Future:
+        """
+        Run `compute_all` in a background thread.
+
+        Parameters
+        ----------
+        ics, max_workers, on_progress
+            See `compute_all`. `on_progress` is called from the background thread, so it
+            should hand the work over to the dashboard, e.g. with `panel_callback`.
+
+        Returns
+        -------
+        Future
+            Future resolving once every ELPD is computed.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="elpd")
+        future = executor.submit(self.compute_all, ics, max_workers, on_progress)
+        executor.shutdown(wait=False)
+        return future
+
+    def pairwise(self, ic: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Return the ELPD differences of every pair of models, and their standard errors.
+
+        Both matrices are computed once per information criterion, from the pointwise ELPD of
+        all models together.
+
+        Parameters
+        ----------
+        ic : str
+            The information criterion, "loo" or "waic".
+
+        Returns
+        -------
+        tuple[pd.DataFrame, pd.DataFrame]
+            The ELPD of the row model minus the ELPD of the column model, and the standard
+            error of that difference, computed as in `az.compare`.
+        """
+        if ic not in self._pairwise:
+            models = list(self.idatas_cmp)
+            pointwise = np.stack(
+                [np.ravel(self.get(model, ic)[f"{ic}_i"].values) for model in models],
+            )
+            totals = pointwise.sum(axis=1)
+            covariance = np.atleast_2d(np.cov(pointwise, bias=True))
+            variance = np.diag(covariance)
+            diff_variance = variance[:, None] + variance[None, :] - 2 * covariance
+            diff = totals[:, None] - totals[None, :]
+            se = np.sqrt(pointwise.shape[1] * np.clip(diff_variance, 0, None))
+            self._pairwise[ic] = (
+                pd.DataFrame(diff, index=models, columns=models),
+                pd.DataFrame(se, index=models, columns=models),
+            )
+        return self._pairwise[ic]
+
+    def compare(self, models: list[str], ic: str = "loo") -> pd.DataFrame:
+        """
+        Return the `az.compare` table of several models, computed once per selection.
+
+        Parameters
+        ----------
+        models : list[str]
+            Names of the models.
+        ic : str, default "loo"
+            The information criterion, "loo" or "waic".
+
+        Returns
+        -------
+        pd.DataFrame
+            The comparison table.
+        """
+        key = (tuple(models), ic)
+        if key not in self._compare:
+            self._compare[key] = az.compare(self.select(models, ic), ic=ic)
+        return self._compare[key]
+
+    def select(self, models: list[str], ic: str) -> dict[str, az.ELPDData]:
+        """
+        Return the pointwise ELPD of several models, as expected by `az.plot_elpd`.
+
+        Parameters
+        ----------
+        models : list[str]
+            Names of the models.
+        ic : str
+            The information criterion, "loo" or "waic".
+
+        Returns
+        -------
+        dict[str, az.ELPDData]
+            Model names as keys and their ELPD as values.
+        """
+        return {model: self.get(model, ic) for model in models}
+
+
+def pointwise_differences(elpd1: az.ELPDData, elpd2: az.ELPDData, ic: str) -> np.ndarray:
+    """
+    Compute the pointwise ELPD differences between two models, as shown by `az.plot_elpd`.
+
+    Parameters
+    ----------
+    elpd1 : az.ELPDData
+        Pointwise ELPD of the first model.
+    elpd2 : az.ELPDData
+        Pointwise ELPD of the second model.
+    ic : str
+        The information criterion, "loo" or "waic".
+
+    Returns
+    -------
+    np.ndarray
+        Flat array with the ELPD of the first model minus the ELPD of the second model, for
+        every observation.
+    """
+    return np.ravel(elpd1[f"{ic}_i"].values - elpd2[f"{ic}_i"].values)
+
+
+def count_observations(differences: np.ndarray) -> dict[str, int]:
+    """
+    Count the observations favouring each model.
+
+    Parameters
+    ----------
+    differences : np.ndarray
+        Pointwise ELPD differences, see `pointwise_differences`.
+
+    Returns
+    -------
+    dict[str, int]
+        The number of positive and negative differences, under "positive" and "negative".
+    """
+    return {
+        "positive": int(np.count_nonzero(differences > 0)),
+        "negative": int(np.count_nonzero(differences < 0)),
+    }
 
 
-def dashboard_elpd(idatas_cmp: dict) -> None:
+def dashboard_elpd(
+    idatas_cmp: dict,
+    eager: bool = False,
+    max_workers: int | None = None,
+    prefetch: bool = True,
+) -> None:
     """
     Create a dashboard for comparing ELPD (Expected Log Point Density) between models.
 
     Parameters
     ----------
     idatas_cmp : dict
-        A dictionary containing comparison data for models.
+        A dictionary containing comparison data for models, see `ELPDStore`. The ELPD of every
+        model is computed once, and reused by all the views of the dashboard. Values can also
+        be paths or loader callables, see `ModelLoader`. Models are then opened in background
+        threads, and the plots show a loading indicator until the selected models are opened.
+    eager : bool, default False
+        If True, compute LOO and WAIC for all models up front in a process pool, in the
+        background, showing a progress bar, and add a table with the ELPD differences of every
+        pair of models. Any pair selection is then only a lookup. The processes are spawned, so
+        scripts must create the dashboard under `if __name__ == "__main__":`.
+    max_workers : int | None, default None
+        Maximum number of processes used in the eager mode. If None, one per CPU.
+    prefetch : bool, default True
+        If True, start opening every model in the background right away. Otherwise a model is
+        opened the first time it is selected.
     """
+    if not isinstance(idatas_cmp, ModelLoader):
+        idatas_cmp = ModelLoader(idatas_cmp)
+    if prefetch:
+        idatas_cmp.prefetch()
+    store = ELPDStore(idatas_cmp)
     models = list(idatas_cmp.keys())
+    computing = None
+    if eager:
+        progress = pn.indicators.Progress(name="Computing ELPD", value=0, width=400)
+        progress_pane = pn.Column("Computing LOO and WAIC of every model...", progress)
+
+        def show_progress(done: int, total: int) -> None:
+            progress.max = max(total, 1)
+            progress.value = done
+            progress_pane.visible = done < total
+
+        # The ELPD is computed while the dashboard is shown, and the progress is updated on
+        # the document of the session, so it also moves in served dashboards.
+        computing = store.start_all(
+            max_workers=max_workers,
+            on_progress=panel_callback(show_progress),
+        )
     model_selection1 = pn.widgets.Select(value=models[0], options=models, name="Model 1")
     model_selection2 = pn.widgets.Select(value=models[1], options=models, name="Model 2")
     thre_slider = pn.widgets.FloatSlider(
@@ -48,20 +380,51 @@ def dashboard_elpd(idatas_cmp: dict) -> None:
     )
     str_pane = pn.pane.Str("", styles={"font-size": "12pt", "color": "red"})
 
+    # The ELPD plot is created once. Changing the models or the information criterion replaces
+    # the data of its source, and moving the slider only moves the threshold lines.
+    elpd_source = ColumnDataSource(data={"x": [], "y": [], "label": []})
+    elpd_summary = {"mean": 0.0, "std": 0.0}
+    elpd_plot = figure(
+        height=300,
+        width=500,
+        y_axis_label="ELPD difference",
+        tooltips=[("Observation", "@label"), ("ELPD difference", "@y")],
+    )
+    elpd_plot.scatter(x="x", y="y", source=elpd_source, size=6, color=Category10[10][0])
+    thre_lines = [
+        Span(dimension="width", location=0, line_dash="dashed", line_color=Category10[10][1])
+        for _ in range(2)
+    ]
+    for thre_line in thre_lines:
+        elpd_plot.add_layout(thre_line)
+    elpd_plot.toolbar.logo = None
+    elpd_pane = pn.pane.Bokeh(elpd_plot)
+
+    def refresh_elpd_plot() -> None:
+        update_elpd_plot(model_selection1.value, model_selection2.value, ic_group.value)
+
+    @pn.depends(thre_slider.param.value, watch=True)
+    def update_elpd_threshold(thre_slider: float) -> None:
+        """
+        Move the threshold lines of the ELPD plot.
+
+        Parameters
+        ----------
+        thre_slider : float
+            The threshold value, in standard deviations from the mean ELPD difference.
+        """
+        thre_lines[0].location = elpd_summary["mean"] - thre_slider * elpd_summary["std"]
+        thre_lines[1].location = elpd_summary["mean"] + thre_slider * elpd_summary["std"]
+
     @pn.depends(
         model_selection1.param.value,
         model_selection2.param.value,
-        thre_slider.param.value,
         ic_group.param.value,
+        watch=True,
     )
-    def get_elpd_plot(
-        model_selection1: str,
-        model_selection2: str,
-        thre_slider: float,
-        ic_group: str,
-    ):
+    def update_elpd_plot(model_selection1: str, model_selection2: str, ic_group: str) -> None:
         """
-        Generate an ELPD plot for the selected models.
+        Show the pointwise ELPD differences of the selected models in the ELPD plot.
 
         Parameters
         ----------
@@ -69,47 +432,49 @@ def dashboard_elpd(idatas_cmp: dict) -> None:
             The first model selected for comparison.
         model_selection2 : str
             The second model selected for comparison.
-        thre_slider : float
-            The threshold value for the ELPD plot.
         ic_group : str
             The information criterion to be used for the plot.
-
-        Returns
-        -------
-        figure
-            A Bokeh figure object representing the ELPD plot.
         """
         if model_selection1 == model_selection2:
             str_pane.object = "Please try again. You can only compare two different models."
-            return None
+            return
+        selected = [model_selection1, model_selection2]
+        if computing is not None and not computing.done():
+            elpd_pane.loading = True
+            refresh = panel_callback(refresh_elpd_plot)
+            computing.add_done_callback(lambda _: refresh())
+            return
+        if not all(idatas_cmp.is_loaded(model) for model in selected):
+            # Draw again with the values of the widgets at that time, once both are opened.
+            elpd_pane.loading = True
+            idatas_cmp.when_loaded(selected, panel_callback(refresh_elpd_plot))
+            return
+        elpd_pane.loading = False
 
-        dict_cmp = {x: idatas_cmp[x] for x in [model_selection1, model_selection2]}
-        _, scatter_plt = plt.subplots()
-
-        # Generate the plot
-        az.plot_elpd(
-            dict_cmp,
-            plot_kwargs={"marker": "."},
-            threshold=thre_slider,
-            ic=ic_group,
-            ax=scatter_plt,
-        )
-        y_min, y_max = scatter_plt.get_ylim()
-        scatter_plt.set_ylim(round(y_min, 1), round(y_max, 1))
+        elpd1 = store.get(model_selection1, ic_group)
+        differences = pointwise_differences(elpd1, store.get(model_selection2, ic_group), ic_group)
+        elpd_source.data = {
+            "x": np.arange(differences.size),
+            "y": differences,
+            "label": format_coords_as_labels(elpd1[f"{ic_group}_i"]),
+        }
+        elpd_plot.title.text = f"{model_selection1} - {model_selection2}"
+        elpd_summary["mean"] = float(differences.mean())
+        elpd_summary["std"] = float(differences.std())
+        update_elpd_threshold(thre_slider.value)
 
-        plt.close()
-        return scatter_plt.figure
+    refresh_elpd_plot()
 
+    # The bars count the observations on either side of zero, so they do not depend on the
+    # threshold, and moving the slider leaves them alone.
     @pn.depends(
         model_selection1.param.value,
         model_selection2.param.value,
-        thre_slider.param.value,
         ic_group.param.value,
     )
-    def get_stacked_bar_plot(
+    async def get_stacked_bar_plot(
         model_selection1: str,
         model_selection2: str,
-        thre_slider: float,
         ic_group: str,
     ):
         """
@@ -121,8 +486,6 @@ def dashboard_elpd(idatas_cmp: dict) -> None:
             The first model selected for comparison.
         model_selection2 : str
             The second model selected for comparison.
-        thre_slider : float
-            The threshold value for the stacked bar plot.
         ic_group : str
             The information criterion to be used for the plot.
 
@@ -134,21 +497,19 @@ def dashboard_elpd(idatas_cmp: dict) -> None:
         if model_selection1 == model_selection2:
             str_pane.object = "Please try again. You can only compare two different models."
             return None
+        await idatas_cmp.wait([model_selection1, model_selection2])
+        if computing is not None:
+            await asyncio.wrap_future(computing)
 
-        dict_cmp = {x: idatas_cmp[x] for x in [model_selection1, model_selection2]}
-        scatter_plt = az.plot_elpd(
-            dict_cmp,
-            plot_kwargs={"marker": "."},
-            threshold=thre_slider,
-            ic=ic_group,
+        # Count observations on the cached pointwise values, without rendering the ELPD plot
+        differences = pointwise_differences(
+            store.get(model_selection1, ic_group),
+            store.get(model_selection2, ic_group),
+            ic_group,
         )
-        scatter_ax = scatter_plt.figure.get_axes()[0]
-        plt.close()
-
-        # Extract observation counts
-        y_ob = scatter_ax.collections[0].get_offsets()[:, 1]
-        neg_count = sum(1 for y_ob_point in y_ob if y_ob_point < 0)
-        pos_count = sum(1 for y_ob_point in y_ob if y_ob_point > 0)
+        counts = count_observations(differences)
+        pos_count = counts["positive"]
+        neg_count = counts["negative"]
 
         # Prepare data for the stacked bar plot
         data = {
@@ -183,7 +544,7 @@ def dashboard_elpd(idatas_cmp: dict) -> None:
         return p
 
     @pn.depends(model_selection1.param.value, model_selection2.param.value)
-    def get_compare_plot(model_selection1: str, model_selection2: str):
+    async def get_compare_plot(model_selection1: str, model_selection2: str):
         """
         Compare models using the ELPD values and generate a comparison plot.
 
@@ -202,22 +563,56 @@ def dashboard_elpd(idatas_cmp: dict) -> None:
         if model_selection1 == model_selection2:
             str_pane.object = "Please try again. You can only compare two different models."
             return None
+        await idatas_cmp.wait([model_selection1, model_selection2])
+        if computing is not None:
+            await asyncio.wrap_future(computing)
 
-        dict_cmp = {x: idatas_cmp[x] for x in [model_selection1, model_selection2]}
-        model_compare = az.compare(dict_cmp)
+        model_compare = store.compare([model_selection1, model_selection2], "loo")
         compare_plt = az.plot_compare(model_compare, backend="bokeh", show=False)
         compare_plt.width = 400
         compare_plt.height = 300
 
         return compare_plt
 
+    @pn.depends(ic_group.param.value)
+    async def get_pairwise_table(ic_group: str):
+        """
+        Generate a table with the ELPD differences of every pair of models.
+
+        Parameters
+        ----------
+        ic_group : str
+            The information criterion to be used for the table.
+
+        Returns
+        -------
+        pn.pane.DataFrame
+            A table with the ELPD of the row model minus the ELPD of the column model, and the
+            standard error of the difference.
+        """
+        await asyncio.wrap_future(computing)
+        diff, se = store.pairwise(ic_group)
+        table = diff.round(2).astype(str) + " ± " + se.round(2).astype(str)
+        return pn.pane.DataFrame(table, name="Pairwise ELPD differences")
+
     # Display the dashboard
-    display(
-        pn.Column(
-            pn.Row(model_selection1, model_selection2),
-            pn.Row(thre_sel, pn.Column("Information Criterion:", ic_group)),
-            thre_slider,
-            str_pane,
-            pn.Row(get_elpd_plot, get_stacked_bar_plot, get_compare_plot),
-        ).servable(),
+    dashboard = pn.Column(
+        pn.Row(model_selection1, model_selection2),
+        pn.Row(thre_sel, pn.Column("Information Criterion:", ic_group)),
+        thre_slider,
+        str_pane,
+        pn.Row(
+            elpd_pane,
+            pn.panel(get_stacked_bar_plot, loading_indicator=True),
+            pn.panel(get_compare_plot, loading_indicator=True),
+        ),
     )
+    if eager:
+        dashboard.insert(0, progress_pane)
+        dashboard.append(
+            pn.Column(
+                "Pairwise ELPD differences (row - column):",
+                pn.panel(get_pairwise_table, loading_indicator=True),
+            ),
+        )
+    display(dashboard)
@@ -1,64 +1,91 @@
 from __future__ import annotations
 
-import arviz as az
-import bokeh.io
 import panel as pn
 import param
-from IPython.display import display
 
-bokeh.io.reset_output()
-bokeh.io.output_notebook()
-
-pn.extension()
+from arviz_dashboard.artifact import PosteriorArtifact
+from arviz_dashboard.catalog import ModelCatalog
+from arviz_dashboard.loading import ModelLoader, ModelSource, panel_callback
+from arviz_dashboard.panel.forest_bokeh import ForestPlot, RidgePlot
+from arviz_dashboard.panel.notebook import display
+from arviz_dashboard.summary import PosteriorSummary
 
 
 class ModelVar(param.Parameterized):
-    model = param.Selector("")
-    data_variable = param.Selector("")
-    coor_variable = param.Selector("")
+    model = param.Selector(objects=[])
+    data_variable = param.Selector(objects=[])
+    coor_variable = param.Selector(objects=[])
     index_key = ""
 
-    def __init__(self, idata_dict: dict[str, az.InferenceData], **params) -> None:
+    def __init__(self, idata_dict: dict[str, ModelSource], **params) -> None:
+        # Models given as paths or callables are opened in the background, and cataloged
+        # once they are opened.
+        if not isinstance(idata_dict, ModelLoader):
+            idata_dict = ModelLoader(idata_dict)
         self.idata_dict = idata_dict
+        self.catalog = ModelCatalog()
         self.models = list(self.idata_dict.keys())
         self.default_model = self.models[0]
         self.param["model"].objects = self.models
         self.param["model"].default = self.default_model
-        self.param["data_variable"].objects = list(
-            self.idata_dict[self.default_model].posterior.data_vars.variables
-        )
+        self.param["data_variable"].objects = []
+        if self._catalog_model(self.default_model, self._update_data_variables):
+            self.param["data_variable"].objects = self.catalog.variables(self.default_model)
         super().__init__(**params)
 
+    def _catalog_model(self: ModelVar, model: str, callback) -> bool:
+        """Catalog a model if it is opened, else open it and call `callback` once it is."""
+        if model in self.catalog:
+            return True
+        if not self.idata_dict.is_loaded(model):
+            self.idata_dict.when_loaded([model], panel_callback(callback))
+            return False
+        self.catalog.register(model, self.idata_dict[model].posterior)
+        return True
+
+    def summary(self: ModelVar, model: str) -> PosteriorSummary:
+        """Summary of an opened model, precomputed if it is an artifact, else cached."""
+        idata = self.idata_dict[model]
+        if isinstance(idata, PosteriorArtifact):
+            return idata.summary
+        return PosteriorSummary.of(idata.posterior)
+
+    @property
+    def coordinate_selection(self: ModelVar) -> dict:
+        """Dimension names and labels of the selected coordinates of the selected variable."""
+        if self.data_variable is None or self.model not in self.catalog:
+            return {}
+        selections = self.catalog.selections(self.model, self.data_variable)
+        return selections.get(self.coor_variable, {})
+
     @param.depends("model", watch=True)
     def _update_data_variables(self: ModelVar):
-        data_variables = list(self.idata_dict[self.model].posterior.data_vars.variables)
+        if not self._catalog_model(self.model, self._update_data_variables):
+            return
+        data_variables = self.catalog.variables(self.model)
         self.param["data_variable"].objects = data_variables
         if self.data_variable not in data_variables:
             self.data_variable = data_variables[0] if data_variables else None
+        else:
+            self._update_coordinates()
 
     @param.depends("data_variable", watch=True)
     def _update_coordinates(self: ModelVar):
-        if (
-            self.idata_dict[self.model]
-            .posterior.data_vars.variables[self.data_variable]
-            .ndim
-            > 2
-        ):
-            self.index_key = list(
-                dict(self.idata_dict[self.model].posterior.dims).keys()
-            )[2]
-            coor_variables = list(
-                self.idata_dict[self.model].posterior.indexes[self.index_key]
-            )
-        else:
-            coor_variables = [""]
+        # Variables with several dimensions get one option per combination of labels.
+        dims = self.catalog.entry(self.model, self.data_variable)["dims"]
+        self.index_key = dims[0] if len(dims) == 1 else ""
+        coor_variables = list(self.catalog.selections(self.model, self.data_variable))
         self.param["coor_variable"].objects = coor_variables
+        if self.coor_variable not in coor_variables:
+            self.coor_variable = coor_variables[0]
 
 
 class ForestDashboard(ModelVar):
-    def __init__(self, idata_dict) -> None:
-        self.idata_dict = idata_dict
-        super().__init__(self.idata_dict)
+    def __init__(self, idata_dict, prefetch: bool = True) -> None:
+        super().__init__(idata_dict)
+        # Without prefetching, a model is opened the first time it is selected.
+        if prefetch:
+            self.idata_dict.prefetch()
 
     def dashboard_forest(self):
         # define the widgets
@@ -103,62 +130,71 @@ class ForestDashboard(ModelVar):
             width=200,
         )
 
-        # construct widget
+        # The forest plot is drawn from the cached summaries of the models. The HDI slider
+        # and the ROPE only replace the data of their glyphs.
+        forest_plot = ForestPlot()
+        forest_pane = pn.pane.Bokeh(forest_plot.figure)
+
+        def refresh_forest_models():
+            update_forest_models(models_selection_widget.value)
+
         @pn.depends(
-            models_selection_widget.param.value,
-            hdi_slider.param.value,
             forestplot_rope_slider.param.value,
             self.param.data_variable,
             self.param.coor_variable,
+            watch=True,
         )
-        def get_forest_plot(
-            models_selection_widget: pn.widgets.MultiSelect,
-            hdi_slider: pn.widgets.FloatSlider,
-            forestplot_rope_slider: pn.widgets.RangeSlider,
-            data_variable: param.Selector,
-            coor_variable: param.Selector,
+        def update_forest_rope(
+            forestplot_rope_slider: tuple[float, float],
+            data_variable: str,
+            coor_variable: str,
         ):
-            # generate graph
-            data = []
-            for model in models_selection_widget:
-                data.append(self.idata_dict[model])
-            # add rope
-            rope = {}
-            # e.g. "school" is one dimension of the xarray.Variable
-            idata_dim_dict = {}
-            idata_dim_dict[self.index_key] = coor_variable
-            idata_dim_dict["rope"] = forestplot_rope_slider
-            rope[data_variable] = [idata_dim_dict]
-            # print(rope)
-            forest_plt = az.plot_forest(
-                data,
-                model_names=models_selection_widget,
-                rope=rope,
-                kind="forestplot",
-                hdi_prob=hdi_slider,
-                backend="bokeh",
-                figsize=(9, 9),
-                show=False,
-                combined=True,
-                colors="cycle",
+            forest_plot.show_rope(data_variable, self.coordinate_selection, forestplot_rope_slider)
+
+        @pn.depends(hdi_slider.param.value, watch=True)
+        def update_forest_hdi(hdi_slider: float):
+            forest_plot.show_hdi(hdi_slider)
+
+        @pn.depends(models_selection_widget.param.value, watch=True)
+        def update_forest_models(models_selection_widget: list[str]):
+            if not all(self.idata_dict.is_loaded(model) for model in models_selection_widget):
+                forest_pane.loading = True
+                self.idata_dict.when_loaded(
+                    models_selection_widget,
+                    panel_callback(refresh_forest_models),
+                )
+                return
+            forest_pane.loading = False
+            summaries = {model: self.summary(model) for model in models_selection_widget}
+            forest_plot.show_models(summaries, hdi_slider.value)
+            update_forest_rope(
+                forestplot_rope_slider.value,
+                self.data_variable,
+                self.coor_variable,
             )
-            # forest_plt is a narray as well as forest_plt[0],
-            # thus we used forest_plt[0][0] to get the figure
-            return forest_plt.base[0]
+
+        refresh_forest_models()
+
+        # The ridge plot lays out densities cached per model. Overlap, truncation and
+        # quantiles only change the layout of the cached curves.
+        ridge_plot = RidgePlot()
+        ridge_pane = pn.pane.Bokeh(ridge_plot.figure)
+
+        def refresh_ridge_models():
+            update_ridge_models(models_selection_widget.value)
 
         @pn.depends(
-            models_selection_widget.param.value,
             hdi_slider.param.value,
             ridgeplot_truncate_checkbox.param.value,
             ridgeplot_quantiles.param.value,
             ridgeplot_overlap_slider.param.value,
+            watch=True,
         )
-        def get_ridge_plot(
-            models_selection_widget: pn.widgets.MultiSelect,
-            hdi_slider: pn.widgets.FloatSlider,
-            ridgeplot_truncate_checkbox: pn.widgets.Checkbox,
-            ridgeplot_quantiles: pn.widgets.RangeSlider,
-            ridgeplot_overlap_slider: pn.widgets.FloatSlider,
+        def update_ridge_layout(
+            hdi_slider: float,
+            ridgeplot_truncate_checkbox: bool,
+            ridgeplot_quantiles: tuple[float, float],
+            ridgeplot_overlap_slider: float,
         ):
             # calculate the ridgeplot_quantiles
             quant_ls = sorted(list(ridgeplot_quantiles))
@@ -170,26 +206,34 @@ class ForestDashboard(ModelVar):
                 quant_ls.append(avg_quant)
                 quant_ls.sort()
 
-            # generate graph
-            data = []
-            for model_ in models_selection_widget:
-                data.append(self.idata_dict[model_])
-
-            ridge_plt = az.plot_forest(
-                data,
-                model_names=models_selection_widget,
-                kind="ridgeplot",
-                hdi_prob=hdi_slider,
-                ridgeplot_truncate=ridgeplot_truncate_checkbox,
-                ridgeplot_quantiles=quant_ls,
-                ridgeplot_overlap=ridgeplot_overlap_slider,
-                backend="bokeh",
-                figsize=(9, 9),
-                show=False,
-                combined=True,
-                colors="white",
+            ridge_plot.layout(
+                ridgeplot_overlap_slider,
+                ridgeplot_truncate_checkbox,
+                hdi_slider,
+                quant_ls,
+            )
+
+        @pn.depends(models_selection_widget.param.value, watch=True)
+        def update_ridge_models(models_selection_widget: list[str]):
+            if not all(self.idata_dict.is_loaded(model) for model in models_selection_widget):
+                ridge_pane.loading = True
+                self.idata_dict.when_loaded(
+                    models_selection_widget,
+                    panel_callback(refresh_ridge_models),
+                )
+                return
+            ridge_pane.loading = False
+            ridge_plot.show_models(
+                {model: self.summary(model) for model in models_selection_widget},
             )
-            return ridge_plt.base[0]
+            update_ridge_layout(
+                hdi_slider.value,
+                ridgeplot_truncate_checkbox.value,
+                ridgeplot_quantiles.value,
+                ridgeplot_overlap_slider.value,
+            )
+
+        refresh_ridge_models()
 
         plot_result_1 = pn.Column(
             pn.WidgetBox(
@@ -201,12 +245,12 @@ class ForestDashboard(ModelVar):
                 ),
                 forestplot_rope_slider,
             ),
-            get_forest_plot,
+            forest_pane,
         )
         plot_result_2 = pn.Column(
             pn.Row(ridgeplot_truncate_checkbox),
             pn.Row(ridgeplot_quantiles, ridgeplot_overlap_slider),
-            get_ridge_plot,
+            ridge_pane,
         )
         # show up in jupyter env
         display(
@@ -221,5 +265,5 @@ class ForestDashboard(ModelVar):
                         plot_result_2,
                     ),
                 ),
-            ).servable(),
+            ),
         )
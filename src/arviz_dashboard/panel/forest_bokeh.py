@@ -1,7 +1,301 @@
-from arviz.data.inference_data import InferenceData
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+from bokeh.models import FactorRange, FixedTicker
 from bokeh.models.sources import ColumnDataSource
+from bokeh.palettes import Category10
 from bokeh.plotting import figure
 
+from arviz_dashboard.summary import PosteriorSummary
+
+
+def summary_rows(summaries: dict[str, PosteriorSummary], palette: list[str]) -> list[dict]:
+    """One row per coordinate of every variable of every model, in the order of the summaries.
+
+    Parameters
+    ----------
+    summaries : dict[str, PosteriorSummary]
+        Model names as keys and their summaries as values.
+    palette : list[str]
+        Colors of the models, cycled.
+
+    Returns
+    -------
+    list[dict]
+        Rows with their "y" factor, "model", "variable", coordinate "selection" and "color".
+    """
+    rows = []
+    for i, (model, summary) in enumerate(summaries.items()):
+        color = palette[i % len(palette)]
+        for name, data_array in summary.mean.data_vars.items():
+            labels = [data_array[dim].values.tolist() for dim in data_array.dims]
+            for coordinates in itertools.product(*labels):
+                label = name
+                if coordinates:
+                    label = f"{name}[{', '.join(str(c) for c in coordinates)}]"
+                rows.append(
+                    {
+                        "y": (label, model),
+                        "model": model,
+                        "variable": name,
+                        "selection": dict(zip(data_array.dims, coordinates)),
+                        "color": color,
+                    },
+                )
+    return rows
+
+
+class ForestPlot:
+    """Bokeh forest plot drawn from cached posterior summaries.
+
+    The figure and its glyphs are created once. Every row is one coordinate of one variable
+    of one model. Changing the models replaces the rows, while changing the interval
+    probability or the ROPE only replaces the data of the interval or ROPE glyph.
+
+    Parameters
+    ----------
+    palette : list[str], default `Category10[10]`
+        Colors of the models, cycled.
+    """
+
+    def __init__(self: ForestPlot, palette: list[str] = Category10[10]) -> None:
+        self.palette = palette
+        self.summaries = {}
+        self.rows = []
+        self.interval_source = ColumnDataSource(
+            data={"y": [], "lower": [], "higher": [], "color": []},
+        )
+        self.mean_source = ColumnDataSource(data={"y": [], "mean": [], "color": []})
+        self.rope_source = ColumnDataSource(data={"y": [], "left": [], "right": []})
+        self.figure = figure(
+            y_range=FactorRange(),
+            height=600,
+            width=600,
+            tooltips=[("", "@y"), ("mean", "@mean")],
+        )
+        self.figure.hbar(
+            y="y",
+            left="left",
+            right="right",
+            height=0.9,
+            source=self.rope_source,
+            fill_color="#2a2eec",
+            fill_alpha=0.2,
+            line_alpha=0,
+        )
+        self.figure.segment(
+            x0="lower",
+            y0="y",
+            x1="higher",
+            y1="y",
+            source=self.interval_source,
+            line_width=2,
+            line_color="color",
+        )
+        self.figure.scatter(
+            x="mean",
+            y="y",
+            source=self.mean_source,
+            size=6,
+            color="color",
+        )
+        self.figure.outline_line_color = "black"
+        self.figure.toolbar.logo = None
+
+    def show_models(
+        self: ForestPlot,
+        summaries: dict[str, PosteriorSummary],
+        hdi_prob: float,
+    ) -> None:
+        """Show one row per coordinate of every variable of the given models.
+
+        Parameters
+        ----------
+        summaries : dict[str, PosteriorSummary]
+            Model names as keys and their summaries as values.
+        hdi_prob : float
+            Probability of the intervals.
+        """
+        self.summaries = summaries
+        self.rows = summary_rows(summaries, self.palette)
+        means = [
+            data_array.values.ravel()
+            for summary in summaries.values()
+            for data_array in summary.mean.data_vars.values()
+        ]
+        # Factors are drawn from the bottom up, so reverse them to show the first row on top.
+        # Rows of the same variable and coordinate are grouped, whatever their model.
+        groups = {}
+        for row in self.rows:
+            groups.setdefault(row["y"][0], []).append(row["y"])
+        self.figure.y_range.factors = [
+            factor for label in reversed(groups) for factor in reversed(groups[label])
+        ]
+        self.mean_source.data = {
+            "y": [row["y"] for row in self.rows],
+            "mean": np.concatenate(means) if means else [],
+            "color": [row["color"] for row in self.rows],
+        }
+        self.show_hdi(hdi_prob)
+
+    def show_hdi(self: ForestPlot, hdi_prob: float) -> None:
+        """Replace the intervals with the cached intervals at `hdi_prob`."""
+        bounds = [
+            summary.hdi(hdi_prob)[name].values.reshape(-1, 2)
+            for summary in self.summaries.values()
+            for name in summary.mean.data_vars
+        ]
+        bounds = np.concatenate(bounds) if bounds else np.empty((0, 2))
+        self.interval_source.data = {
+            "y": [row["y"] for row in self.rows],
+            "lower": bounds[:, 0],
+            "higher": bounds[:, 1],
+            "color": [row["color"] for row in self.rows],
+        }
+
+    def show_rope(
+        self: ForestPlot,
+        variable: str,
+        selection: dict,
+        rope: tuple[float, float],
+    ) -> None:
+        """Draw the region of practical equivalence on the rows of one variable.
+
+        Parameters
+        ----------
+        variable : str
+            Name of the variable.
+        selection : dict
+            Dimension names as keys and coordinate labels as values. Only the rows of these
+            coordinates get the ROPE. Empty labels match every coordinate.
+        rope : tuple[float, float]
+            Lower and upper bounds of the ROPE.
+        """
+        rows = [
+            row
+            for row in self.rows
+            if row["variable"] == variable
+            and all(
+                label in ("", None) or row["selection"].get(dim, label) == label
+                for dim, label in selection.items()
+            )
+        ]
+        self.rope_source.data = {
+            "y": [row["y"] for row in rows],
+            "left": [rope[0]] * len(rows),
+            "right": [rope[1]] * len(rows),
+        }
+
+
+class RidgePlot:
+    """Bokeh ridge plot drawn from cached posterior densities.
+
+    The densities of every row are computed once per model, see `PosteriorSummary.density`.
+    Changing the overlap, the truncation or the quantiles only lays out the cached curves
+    again, so its cost does not depend on the number of draws.
+
+    Parameters
+    ----------
+    palette : list[str], default `Category10[10]`
+        Colors of the quantile lines of the models, cycled.
+    """
+
+    def __init__(self: RidgePlot, palette: list[str] = Category10[10]) -> None:
+        self.palette = palette
+        self.summaries = {}
+        self.rows = []
+        self.ridge_source = ColumnDataSource(data={"xs": [], "ys": [], "label": []})
+        self.quantile_source = ColumnDataSource(
+            data={"x": [], "y0": [], "y1": [], "color": []},
+        )
+        self.figure = figure(height=600, width=600, tooltips=[("", "@label")])
+        self.figure.patches(
+            xs="xs",
+            ys="ys",
+            source=self.ridge_source,
+            fill_color="white",
+            line_color="black",
+        )
+        self.figure.segment(
+            x0="x",
+            y0="y0",
+            x1="x",
+            y1="y1",
+            source=self.quantile_source,
+            line_width=2,
+            line_color="color",
+        )
+        self.figure.yaxis.ticker = FixedTicker(ticks=[])
+        self.figure.outline_line_color = "black"
+        self.figure.toolbar.logo = None
+
+    def show_models(self: RidgePlot, summaries: dict[str, PosteriorSummary]) -> None:
+        """Use the rows of the given models. Call `layout` to draw them."""
+        self.summaries = summaries
+        self.rows = summary_rows(summaries, self.palette)
+        positions = np.arange(len(self.rows))[::-1]
+        self.figure.yaxis.ticker = FixedTicker(ticks=positions.tolist())
+        self.figure.yaxis.major_label_overrides = {
+            int(position): f"{row['y'][0]} ({row['model']})"
+            for position, row in zip(positions, self.rows)
+        }
+
+    def layout(
+        self: RidgePlot,
+        overlap: float,
+        truncate: bool,
+        hdi_prob: float,
+        quantiles: list[float],
+    ) -> None:
+        """Draw the cached densities.
 
-def create_sources(idata: InferenceData) -> ColumnDataSource:
-    posterior = idata["posterior"]
+        Parameters
+        ----------
+        overlap : float
+            Height of every density, in rows above one row. With zero the densities do not
+            overlap.
+        truncate : bool
+            If True, cut every density at its highest density interval.
+        hdi_prob : float
+            Probability of the interval used with `truncate`.
+        quantiles : list[float]
+            Quantiles drawn as vertical lines within every density.
+        """
+        height = 1 + overlap
+        xs, ys, labels = [], [], []
+        quantile_lines = {"x": [], "y0": [], "y1": [], "color": []}
+        position = len(self.rows) - 1
+        for summary in self.summaries.values():
+            hdi = summary.hdi(hdi_prob)
+            quantile_values = summary.quantile(quantiles)
+            for name in summary.mean.data_vars:
+                support, density = summary.density(name)
+                bounds = hdi[name].values.reshape(-1, 2)
+                values = quantile_values[name].values.reshape(len(quantiles), -1)
+                for i, row_density in enumerate(density):
+                    row = self.rows[len(labels)]
+                    keep = slice(None)
+                    if truncate:
+                        keep = (support >= bounds[i, 0]) & (support <= bounds[i, 1])
+                    row_support = support[keep]
+                    xs.append(np.concatenate([row_support, row_support[::-1]]))
+                    ys.append(
+                        np.concatenate(
+                            [
+                                position + height * row_density[keep],
+                                np.full(row_support.size, position),
+                            ],
+                        ),
+                    )
+                    labels.append(f"{row['y'][0]} ({row['model']})")
+                    quantile_lines["x"].extend(values[:, i])
+                    quantile_lines["y0"].extend([position] * len(quantiles))
+                    quantile_lines["y1"].extend(
+                        position + height * np.interp(values[:, i], support, row_density),
+                    )
+                    quantile_lines["color"].extend([row["color"]] * len(quantiles))
+                    position -= 1
+        self.ridge_source.data = {"xs": xs, "ys": ys, "label": labels}
+        self.quantile_source.data = quantile_lines
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 import arviz as az
 import panel as pn
 import param
@@ -8,25 +10,44 @@ from bokeh.models.tools import HoverTool
 from bokeh.palettes import Colorblind8
 from bokeh.plotting import figure
 
-from arviz_dashboard import plots, widgets
-from arviz_dashboard.dashboards import DashboardBaseClass
-
-pn.extension()
+from arviz_dashboard.artifact import PosteriorArtifact, is_artifact, open_artifact
+from arviz_dashboard.io import open_posterior
+from arviz_dashboard.panel import plots, widgets
+from arviz_dashboard.panel.dashboards import DashboardBaseClass
 
 
-def posterior_marginal1d(idata: az.InferenceData) -> None:
+def posterior_marginal1d(
+    idata: az.InferenceData | PosteriorArtifact | str | Path,
+    stats: bool = False,
+    **params,
+) -> None:
     """Dashboard for the one-dimensional marginals of random variable posteriors.
 
     Parameters
     ----------
-    idata : az.InferenceData
-        An ArviZ `InferenceData` object that contains the posterior for the model.
+    idata : az.InferenceData | PosteriorArtifact | str | Path
+        An ArviZ `InferenceData` object that contains the posterior for the model, or the path
+        to a netCDF file or zarr store with a posterior group. A posterior given by its path is
+        opened lazily, and only the slices the dashboard shows are read. An artifact, or its
+        path, shows the precomputed densities, see `arviz_dashboard.artifact`.
+    stats : bool, default False
+        If `True`, show the time spent in every phase of the last interaction, the size of
+        its payload and its cache hits, see `DashboardBaseClass.show`.
+    **params
+        Initial values for the parameters of the dashboard, `max_resident_bytes` or
+        `persistent`, see `DashboardBaseClass`.
 
     Returns
     -------
     None
         If in a Jupyter environment, then the dashboard will be directly displayed.
     """
+    if isinstance(idata, (str, Path)):
+        if is_artifact(idata):
+            idata = open_artifact(idata)
+        else:
+            idata = az.InferenceData(posterior=open_posterior(idata, lazy=True))
+
     # NOTE: See the docstring for `create_selectors` for a full description as to why we
     #       are creating objects this way. Briefly, we do not know the random variables
     #       used in a model, and this is a way to create them within the class below.
@@ -54,51 +75,19 @@ def posterior_marginal1d(idata: az.InferenceData) -> None:
 
         def _compute(self: PosteriorMarginal1d) -> dict[str, dict[str, list[float]]]:
             output = {}
-            rv_data_xarray = self.posterior[self.rv_selector]
-            rv_dimensions = list(rv_data_xarray.coords)
-            mask = {"chain": self.chain_selector}
-            for dimension_name in self.dimensions:
-                if dimension_name in rv_dimensions:
-                    dimension_value = getattr(self, f"{dimension_name}_selector")
-                    dimension_objects = self.dimensions[dimension_name]
-                    dimension_values = []
-                    for i, dimension_object in enumerate(dimension_objects):
-                        if dimension_object == dimension_value:
-                            dimension_values.append(i)
-                    mask[dimension_name] = dimension_values
-            data = rv_data_xarray[mask].data
-            if len(data.shape) == 1:
-                data = data.reshape(1, -1)
             for figure_name in self.figure_names:
                 output[figure_name] = {}
                 if figure_name == "marginal":
-                    if self.chain_aggregation == "separate":
-                        for i, chain in enumerate(self.chain_selector):
-                            chain_data = data[i]
-                            support, density, bandwidth = az.stats.kde(
-                                chain_data,
-                                bw_return=True,
-                            )
-                            density /= density.max()
-                            output[figure_name][f"{chain}"] = {
-                                "support": support.tolist(),
-                                "density": density.tolist(),
-                                "bandwidth": [float(bandwidth)],
-                            }
-                    if self.chain_aggregation == "aggregate":
-                        chain_data = data.reshape(1, -1)
-                        support, density, bandwidth = az.stats.kde(
-                            chain_data,
-                            bw_return=True,
-                        )
-                        density /= density.max()
-                        output[figure_name]["0"] = {
-                            "support": support.tolist(),
-                            "density": density.tolist(),
-                            "bandwidth": [float(bandwidth)],
-                        }
+                    output[figure_name] = self.compute_marginal()
             return output
 
+        def _create_figures(self: PosteriorMarginal1d) -> pn.Row:
+            self._figures = {"marginal": self.create_marginal_figure()}
+            return pn.Row(*self._figures.values())
+
+        def _update_figures(self: PosteriorMarginal1d, data: dict) -> None:
+            self.show_marginal(self._figures["marginal"], data["marginal"])
+
         def _plot(self: PosteriorMarginal1d, *args) -> figure:
             data = self.compute()
             figures = {}
@@ -135,5 +124,5 @@ def posterior_marginal1d(idata: az.InferenceData) -> None:
                     figures[figure_name] = fig
             return pn.Row(*figures.values())
 
-    dashboard = PosteriorMarginal1d(idata)
-    return dashboard.show()
+    dashboard = PosteriorMarginal1d(idata, **params)
+    return dashboard.show(stats=stats)
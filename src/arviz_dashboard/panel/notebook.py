@@ -0,0 +1,49 @@
+"""Set up Bokeh and Panel output the first time a dashboard is shown.
+
+Importing a dashboard module has no side effects. The Panel extension is loaded, and Bokeh
+output sent to the notebook, by the functions that show something, once per process. In a
+served session, see `arviz_dashboard.serve`, `display` adds the dashboard to the page instead.
+"""
+
+from __future__ import annotations
+
+import functools
+
+
+@functools.cache
+def load_extension() -> None:
+    """Load the Panel extension."""
+    import panel as pn
+
+    pn.extension()
+
+
+@functools.cache
+def setup_notebook() -> None:
+    """Load the Panel extension and send Bokeh output to the notebook."""
+    import bokeh.io
+
+    bokeh.io.reset_output()
+    bokeh.io.output_notebook()
+    load_extension()
+
+
+def display(layout) -> None:
+    """Show a dashboard in the notebook, or on the page of the served session.
+
+    Parameters
+    ----------
+    layout : pn.viewable.Viewable
+        Layout of the dashboard. It is marked as servable in both cases, so notebooks can also
+        be served with `panel serve`.
+    """
+    import panel as pn
+
+    doc = pn.state.curdoc
+    if doc is not None and doc.session_context is not None:
+        layout.servable()
+        return
+    from IPython.display import display as display_notebook
+
+    setup_notebook()
+    display_notebook(layout.servable())
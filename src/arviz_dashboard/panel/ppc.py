@@ -1,16 +1,86 @@
 import arviz as az
-import bokeh.io
-import matplotlib.pyplot as plt
+import numpy as np
 import panel as pn
-
-bokeh.io.reset_output()
-bokeh.io.output_notebook()
-
-
-pn.extension()
+from bokeh.models import ColumnDataSource, Span
+from bokeh.plotting import figure
+
+from arviz_dashboard.panel.elpd import ELPDStore
+from arviz_dashboard.panel.notebook import display
+
+GOOD_COLOR = "#1E88E5"
+BAD_COLOR = "#D81B60"
+
+# Recolor the k-hat points and the observed rug in the browser, so moving the threshold slider
+# does not need the kernel at all.
+THRESHOLD_CALLBACK = f"""
+const threshold = cb_obj.value
+for (const source of [khat_source, rug_source]) {{
+    const khat = source.data.khat
+    const colors = new Array(khat.length)
+    for (let i = 0; i < khat.length; i++) {{
+        colors[i] = khat[i] > threshold ? "{BAD_COLOR}" : "{GOOD_COLOR}"
+    }}
+    source.data.colors = colors
+    source.change.emit()
+}}
+"""
+
+
+def threshold_colors(khat, threshold):
+    """
+    Colors of k-hat values above and below the threshold, as applied by the slider callback.
+
+    Parameters
+    ----------
+    khat : np.ndarray
+        Pareto shape parameters.
+    threshold : float
+        The threshold value.
+
+    Returns
+    -------
+    np.ndarray
+        An array of colors.
+    """
+    return np.where(np.asarray(khat) > threshold, BAD_COLOR, GOOD_COLOR)
+
+
+def khat_bin_labels(khat, good_k):
+    """
+    Labels of the number and percentage of k-hat values in each band of the k-hat plot.
+
+    The bands are delimited by `good_k` and one, as the dashed lines of the plot, and the
+    labels are placed like the `show_bins` labels of `az.plot_khat`.
+
+    Parameters
+    ----------
+    khat : np.ndarray
+        Pareto shape parameters.
+    good_k : float
+        Threshold of the first band.
+
+    Returns
+    -------
+    dict[str, list]
+        Positions and texts of the labels, under "x", "y" and "text".
+    """
+    khat = np.asarray(khat)
+    ymin, ymax = khat.min(), khat.max()
+    bin_edges = np.array([ymin, good_k, 1, ymax])
+    bin_edges = bin_edges[(bin_edges >= ymin) & (bin_edges <= ymax)]
+    labels = {"x": [], "y": [], "text": []}
+    if bin_edges.size < 2:
+        return labels
+    counts, _ = np.histogram(khat, bin_edges)
+    for i, count in enumerate(counts):
+        labels["x"].append(khat.size - 0.5)
+        labels["y"].append(bin_edges[i : i + 2].mean())
+        labels["text"].append(f"{count} ({count / khat.size * 100:.1f}%)")
+    return labels
 
 
 def dashboard_ppc(idatas_cmp):
+    store = ELPDStore(idatas_cmp)
     model_selection1 = pn.widgets.Select(
         value=None, options=list(idatas_cmp.keys()), name="Model1"
     )
@@ -18,8 +88,17 @@ def dashboard_ppc(idatas_cmp):
         name="Threshold Value", start=0, end=1, step=0.05, value=0.7, width=200
     )
 
-    @pn.depends(model_selection1.param.value, thre_slider.param.value)
-    def get_ppc_plot(model_selection1, thre_slider):
+    # Sources shared by the k-hat plot and the observed rug of the PPC plot. The threshold
+    # only changes their "colors" column, which is computed in the browser.
+    khat_source = ColumnDataSource(data={"x": [], "khat": [], "colors": []})
+    rug_source = ColumnDataSource(data={"_": [], "khat": [], "colors": []})
+    thre_slider.jscallback(
+        args={"khat_source": khat_source, "rug_source": rug_source},
+        value=THRESHOLD_CALLBACK,
+    )
+
+    @pn.depends(model_selection1.param.value)
+    def get_ppc_plot(model_selection1):
         ppc_plt = az.plot_ppc(
             idatas_cmp[model_selection1],
             data_pairs={"y": "y"},
@@ -27,90 +106,74 @@ def dashboard_ppc(idatas_cmp):
             show=False,
             observed_rug=True,
         )
-        vars(
-            vars(vars(ppc_plt[0][0])["_property_values"]["renderers"][2])[
-                "_property_values"
-            ]["glyph"]
-        )["_property_values"]["line_color"] = "colors"
-
-        ##get the list of x valus corresponded to the khat plot
-        observed_rug_ls = list(
-            vars(
-                vars(vars(ppc_plt[0][0])["_property_values"]["renderers"][2])[
-                    "_property_values"
-                ]["data_source"]
-            )["_property_values"]["data"]["_"]
+        rug_renderer = next(
+            renderer
+            for renderer in ppc_plt[0][0].renderers
+            if "_" in renderer.data_source.data
         )
-
-        ##generate the list of colors
-        ### step1 get the khat_color
-        loo_radon = az.loo(idatas_cmp[model_selection1], pointwise=True)
-        khat_plt = az.plot_khat(loo_radon, show_bins=True, backend="bokeh", show=False)
-
-        colors = []
-        glyph_len = len(vars(khat_plt)["_property_values"]["renderers"])
-
-        for location in range(glyph_len):
-            glyph = vars(vars(khat_plt)["_property_values"]["renderers"][location])[
-                "_property_values"
-            ]["glyph"]
-            if str(glyph)[0:4] != "Text":
-                y_value = vars(glyph)["_property_values"]["y"]
-                if y_value > thre_slider:
-                    colors.append("#D81B60")
-
-                else:
-                    colors.append("#1E88E5")
-
-        ### step2 sort the x values
-        temp_rug_ls = sorted(observed_rug_ls)
-        rug_color = dict()
-        for id_ in range(len(temp_rug_ls)):
-            rug_color[temp_rug_ls[id_]] = colors[id_]
-
-        ## step3 get the final colors
-        colors_final = []
-        for rug in observed_rug_ls:
-            colors_final.append(rug_color[rug])
-
-        vars(
-            vars(vars(ppc_plt[0][0])["_property_values"]["renderers"][2])[
-                "_property_values"
-            ]["data_source"]
-        )["_property_values"]["data"]["colors"] = colors_final
+        observed_rug = np.asarray(rug_renderer.data_source.data["_"])
+        khats = store.get(model_selection1, "loo").pareto_k.values.ravel()
+        # The rug holds the observed data in observation order, which is also the order of the
+        # k-hat values of `az.loo`, so the n-th rug point gets the n-th value as is.
+        if khats.size != observed_rug.size:
+            raise ValueError(
+                f"The rug has {observed_rug.size} points but there are {khats.size} k-hat values.",
+            )
+
+        rug_source.data = {
+            "_": observed_rug,
+            "khat": khats,
+            "colors": threshold_colors(khats, thre_slider.value),
+        }
+        rug_renderer.data_source = rug_source
+        rug_renderer.glyph.line_color = "colors"
 
         return ppc_plt[0][0]
 
-    @pn.depends(model_selection1.param.value, thre_slider.param.value)
-    def get_khat_plot(model_selection1, thre_slider):
-        loo_radon = az.loo(idatas_cmp[model_selection1], pointwise=True)
-        khat_plt = az.plot_khat(loo_radon, show_bins=True, backend="bokeh", show=False)
-
-        colors = []
-        glyph_len = len(vars(khat_plt)["_property_values"]["renderers"])
-
-        for location in range(glyph_len):
-            glyph = vars(vars(khat_plt)["_property_values"]["renderers"][location])[
-                "_property_values"
-            ]["glyph"]
-            if str(glyph)[0:4] != "Text":
-                y_value = vars(glyph)["_property_values"]["y"]
-                if y_value > thre_slider:
-                    colors.append("#D81B60")
-
-                else:
-                    colors.append("#1E88E5")
-
-        khat_plt_update = az.plot_khat(
-            loo_radon, color=colors, show_bins=True, backend="bokeh", show=False
+    @pn.depends(model_selection1.param.value)
+    def get_khat_plot(model_selection1):
+        loo_radon = store.get(model_selection1, "loo")
+        khats = loo_radon.pareto_k.values.ravel()
+        khat_source.data = {
+            "x": np.arange(khats.size),
+            "khat": khats,
+            "colors": threshold_colors(khats, thre_slider.value),
+        }
+
+        khat_plt = figure(
+            height=300,
+            width=500,
+            x_axis_label="Data Point",
+            y_axis_label="Shape parameter k",
+            tooltips=[("k-hat", "@khat")],
         )
-        # khat_plt_update.width=400
-        # khat_plt_update.height=300
-        return khat_plt_update
+        khat_plt.scatter(
+            x="x",
+            y="khat",
+            source=khat_source,
+            marker="cross",
+            size=10,
+            line_color="colors",
+            fill_color="colors",
+        )
+        good_k = loo_radon.get("good_k", 0.7)
+        for hline in [0, good_k, 1]:
+            khat_plt.add_layout(
+                Span(location=hline, dimension="width", line_color="grey", line_dash="dashed")
+            )
+        # The bands are fixed by the dashed lines, so the labels do not follow the slider.
+        khat_plt.text(
+            source=ColumnDataSource(data=khat_bin_labels(khats, good_k)),
+            x="x",
+            y="y",
+            text="text",
+            text_font_size="10px",
+        )
+        return khat_plt
 
     # show up
     display(
         pn.Column(
             pn.Row(model_selection1), thre_slider, pn.Row(get_ppc_plot, get_khat_plot)
-        ).servable()
+        )
     )
@@ -1,33 +1,75 @@
 from __future__ import annotations
 
+import queue
+from functools import partial
+from pathlib import Path
+
 import arviz as az
+import numpy as np
 import panel as pn
 import param
+import xarray as xr
+from bokeh.events import RangesUpdate
 from bokeh.models.callbacks import CustomJS
 from bokeh.models.sources import ColumnDataSource
 from bokeh.models.tools import HoverTool
 from bokeh.palettes import Colorblind8
 from bokeh.plotting import figure
 
-from arviz_dashboard import plots, widgets
-from arviz_dashboard.dashboards import DashboardBaseClass
-
-pn.extension()
+from arviz_dashboard.artifact import PosteriorArtifact, is_artifact, open_artifact
+from arviz_dashboard.downsample import MIN_POINTS, downsample
+from arviz_dashboard.io import open_posterior
+from arviz_dashboard.panel import plots, widgets
+from arviz_dashboard.panel.dashboards import DashboardBaseClass
+from arviz_dashboard.streaming import PosteriorTail, RunningDensity
 
 
-def trace(idata: az.InferenceData) -> None:
+def trace(
+    idata: az.InferenceData | PosteriorArtifact | str | Path,
+    follow: bool = False,
+    stats: bool = False,
+    **params,
+) -> None:
     """Dashboard for trace plots of random variable posteriors.
 
     Parameters
     ----------
-    idata : az.InferenceData
-        An ArviZ `InferenceData` object that contains the posterior for the model.
+    idata : az.InferenceData | PosteriorArtifact | str | Path
+        An ArviZ `InferenceData` object that contains the posterior for the model, or the path
+        to a netCDF file or zarr store with a posterior group. A posterior given by its path is
+        opened lazily, and only the slices the dashboard shows are read. An artifact, or its
+        path, shows the precomputed densities and thinned draws, see
+        `arviz_dashboard.artifact`.
+    follow : bool, default False
+        If `True`, watch the file at `idata` while a sampler appends draws to it. New draws are
+        streamed to the trace plot, and the densities and chain summaries are updated with
+        them, without reading the whole posterior again.
+    stats : bool, default False
+        If `True`, show the time spent in every phase of the last interaction, the size of
+        its payload and its cache hits, see `DashboardBaseClass.show`.
+    **params
+        Initial values for the parameters of the dashboard, e.g. `max_points` or
+        `downsample_method`, or `max_resident_bytes` or `persistent`, see
+        `DashboardBaseClass`.
 
     Returns
     -------
     None
         If in a Jupyter environment, then the dashboard will be directly displayed.
     """
+    path = None
+    if isinstance(idata, (str, Path)) and is_artifact(idata):
+        idata = open_artifact(idata)
+    if isinstance(idata, PosteriorArtifact):
+        if follow:
+            raise ValueError("An artifact cannot follow a running sampler.")
+    elif isinstance(idata, (str, Path)):
+        path = Path(idata)
+        # Without following, the posterior is read lazily, one selected slice at a time.
+        idata = az.InferenceData(posterior=open_posterior(path, lazy=not follow))
+    elif follow:
+        raise ValueError("Following a running sampler requires the path of its posterior file.")
+
     # NOTE: See the docstring for `create_selectors` for a full description as to why we
     #       are creating objects this way. Briefly, we do not know the random variables
     #       used in a model, and this is a way to create them within the class below.
@@ -43,67 +85,149 @@ def trace(idata: az.InferenceData) -> None:
         """
 
         chain_aggregation = param.Selector(objects=["separate", "aggregate"])
+        max_points = param.Integer(
+            default=2000,
+            bounds=(MIN_POINTS, None),
+            doc="Maximum number of points drawn for each trace line.",
+        )
+        downsample_method = param.Selector(objects=["lttb", "minmax"])
         figure_names = ["marginal", "trace"]
 
         def __init__(self: Trace, idata: az.InferenceData, **params) -> None:
             # Initialize param and the base class
             super().__init__(idata, **params)
-            self.num_draws = self.posterior.dims["draw"]
+            self.num_draws = self.posterior.sizes["draw"]
+            self.tail = None
+
+        def follow(self: Trace, path: str | Path) -> None:
+            """Append the draws a running sampler adds to the posterior file at `path`.
+
+            The file is watched from a background thread, and the new draws are applied to the
+            figures from a periodic callback, on the thread that owns the Bokeh document.
+            """
+            self._new_draws = queue.Queue()
+            self._summary = pn.pane.Markdown("")
+            self.tail = PosteriorTail(path, num_draws=self.num_draws)
+            self.tail.follow(self._new_draws.put)
+            pn.state.add_periodic_callback(self._append_new_draws, period=500)
+
+        def _append_new_draws(self: Trace) -> None:
+            new_draws = []
+            while not self._new_draws.empty():
+                new_draws.append(self._new_draws.get_nowait())
+            if not new_draws:
+                return
+            new_draws = xr.concat(new_draws, dim="draw")
+            start = self.num_draws
+            self.posterior = xr.concat([self.posterior, new_draws], dim="draw")
+            self.num_draws = self.posterior.sizes["draw"]
+            self.resident.clear()
+
+            # Only the new draws of the shown selection are sent to the browser.
+            data = self.select(new_draws)
+            data = data.reshape(data.shape[0], -1)
+            for i, (chain, (cds, draws)) in enumerate(self._trace_sources.items()):
+                x, y = downsample(data[i], self.max_points, self.downsample_method)
+                cds.stream({"x": start + x, "y": y})
+                self._trace_sources[chain] = (cds, np.concatenate([draws, data[i]]))
+            self._density.update(data)
+            self._update_running_stats()
+
+        def _start_running_stats(self: Trace) -> None:
+            data = self.select()
+            self._density = RunningDensity(data.shape[0])
+            self._density.update(data.reshape(data.shape[0], -1))
+            self._update_running_stats()
+
+        def _update_running_stats(self: Trace) -> None:
+            aggregate = self.chain_aggregation == "aggregate"
+            support, density = self._density.density(aggregate=aggregate)
+            for cds, chain_density in zip(self._marginal_sources.values(), density):
+                cds.data = {"x": support, "y": chain_density}
+            moments = self._density.moments
+            rows = [
+                f"| {chain} | {count:.0f} | {mean:.4g} | {np.sqrt(variance):.4g} |"
+                for chain, count, mean, variance in zip(
+                    self.chain_selector,
+                    moments.count,
+                    moments.mean,
+                    moments.variance,
+                )
+            ]
+            self._summary.object = "\n".join(
+                [
+                    f"**{self.rv_selector}**, R-hat: {moments.rhat():.4f}",
+                    "",
+                    "| Chain | Draws | Mean | SD |",
+                    "| --- | --- | --- | --- |",
+                    *rows,
+                ],
+            )
 
         def _compute(self: Trace) -> dict[str, dict[str, list[float]]]:
             output = {}
-            rv_data_xarray = self.posterior[self.rv_selector]
-            rv_dimensions = list(rv_data_xarray.coords)
-            mask = {"chain": self.chain_selector}
-            for dimension_name in self.dimensions:
-                if dimension_name in rv_dimensions:
-                    dimension_value = getattr(self, f"{dimension_name}_selector")
-                    dimension_objects = self.dimensions[dimension_name]
-                    dimension_values = []
-                    for i, dimension_object in enumerate(dimension_objects):
-                        if dimension_object == dimension_value:
-                            dimension_values.append(i)
-                    mask[dimension_name] = dimension_values
-            data = rv_data_xarray[mask].data
-            if len(data.shape) == 1:
-                data = data.reshape(1, -1)
             for figure_name in self.figure_names:
                 output[figure_name] = {}
                 if figure_name == "marginal":
-                    if self.chain_aggregation == "separate":
-                        for i, chain in enumerate(self.chain_selector):
-                            chain_data = data[i]
-                            support, density, bandwidth = az.stats.kde(
-                                chain_data,
-                                bw_return=True,
-                            )
-                            density /= density.max()
-                            output[figure_name][f"{chain}"] = {
-                                "support": support.tolist(),
-                                "density": density.tolist(),
-                                "bandwidth": [float(bandwidth)],
-                            }
-                    if self.chain_aggregation == "aggregate":
-                        chain_data = data.reshape(1, -1)
-                        support, density, bandwidth = az.stats.kde(
-                            chain_data,
-                            bw_return=True,
-                        )
-                        density /= density.max()
-                        output[figure_name]["0"] = {
-                            "support": support.tolist(),
-                            "density": density.tolist(),
-                            "bandwidth": [float(bandwidth)],
-                        }
+                    output[figure_name] = self.compute_marginal()
                 if figure_name == "trace":
-                    for i, chain in enumerate(self.chain_selector):
-                        chain_data = data[i]
-                        output[figure_name][f"{chain}"] = {
-                            "x": list(range(self.num_draws)),
-                            "y": chain_data.tolist(),
-                        }
+                    output[figure_name] = self.cached(
+                        "trace",
+                        self._compute_trace,
+                        self.max_points,
+                        self.downsample_method,
+                    )
+            return output
+
+        def _compute_trace(self: Trace) -> dict[str, dict[str, np.ndarray]]:
+            output = {}
+            data = self.select()
+            for i, chain in enumerate(self.chain_selector):
+                chain_data = data[i].ravel()
+                x, y = downsample(chain_data, self.max_points, self.downsample_method)
+                if self.artifact is not None:
+                    # Thinned draws are drawn at the draw numbers they had in the run.
+                    x = self.artifact.posterior["draw"].values[x]
+                output[f"{chain}"] = {"x": x, "y": y, "draws": chain_data}
             return output
 
+        def _refine(self: Trace, sources: dict, event: RangesUpdate) -> None:
+            # Downsample the draws in the visible x-range again, so zooming in shows the trace
+            # at full resolution once the range holds fewer draws than `max_points`. Artifacts
+            # only hold the thinned draws, which are already shown.
+            if self.artifact is not None:
+                return
+            start = 0 if event.x0 is None else int(event.x0)
+            stop = None if event.x1 is None else int(event.x1) + 2
+            for cds, draws in sources.values():
+                x, y = downsample(draws, self.max_points, self.downsample_method, start, stop)
+                cds.data = {"x": x, "y": y}
+
+        def _create_figures(self: Trace) -> pn.Row | pn.Column:
+            marginal_figure = self.create_marginal_figure()
+            trace_figure = figure()
+            plots.style_figure(trace_figure, self.rv_selector)
+            self._trace_lines = self.add_lines(trace_figure, [f"{chain}" for chain in self.chains])
+            # Updated in place, so the range callback always refines the shown chains.
+            self._trace_sources = {}
+            trace_figure.on_event(RangesUpdate, partial(self._refine, self._trace_sources))
+            marginal_figure.x_range = trace_figure.y_range
+            self._figures = {"marginal": marginal_figure, "trace": trace_figure}
+            row = pn.Row(marginal_figure, trace_figure)
+            if self.tail is not None:
+                return pn.Column(row, self._summary)
+            return row
+
+        def _update_figures(self: Trace, data: dict) -> None:
+            self.show_marginal(self._figures["marginal"], data["marginal"])
+            self.show_lines(self._trace_lines, data["trace"], tooltip_field="y")
+            self._figures["trace"].title.text = self.rv_selector
+            self._trace_sources.clear()
+            for chain, chain_data in data["trace"].items():
+                self._trace_sources[chain] = (self._trace_lines[chain][0], chain_data["draws"])
+            if self.tail is not None:
+                self._start_running_stats()
+
         def _plot(self: Trace, *args) -> figure:
             data = self.compute()
             figures = {}
@@ -111,6 +235,7 @@ def trace(idata: az.InferenceData) -> None:
                 if figure_name == "marginal":
                     fig = figure()
                     plots.style_figure(fig, self.rv_selector)
+                    self._marginal_sources = {}
                     for i, (chain, chain_data) in enumerate(figure_data.items()):
                         if self.chain_aggregation == "aggregate":
                             color = self.palette[0]
@@ -137,10 +262,12 @@ def trace(idata: az.InferenceData) -> None:
                             tooltips=[("Chain", chain), (self.rv_selector, "@x")],
                         )
                         fig.add_tools(tips)
+                        self._marginal_sources[chain] = cds
                     figures[figure_name] = fig
                 if figure_name == "trace":
                     fig = figure()
                     plots.style_figure(fig, self.rv_selector)
+                    sources = {}
                     for i, (chain, chain_data) in enumerate(figure_data.items()):
                         color = self.palette[i]
                         cds = ColumnDataSource(
@@ -160,9 +287,17 @@ def trace(idata: az.InferenceData) -> None:
                             tooltips=[("Chain", chain), (self.rv_selector, "@y")],
                         )
                         fig.add_tools(tips)
+                        sources[chain] = (cds, chain_data["draws"])
+                    fig.on_event(RangesUpdate, partial(self._refine, sources))
+                    self._trace_sources = sources
                     figures[figure_name] = fig
             figures["marginal"].x_range = figures["trace"].y_range
+            if self.tail is not None:
+                self._start_running_stats()
+                return pn.Column(pn.Row(*figures.values()), self._summary)
             return pn.Row(*figures.values())
 
-    dashboard = Trace(idata)
-    return dashboard.show()
+    dashboard = Trace(idata, **params)
+    if follow:
+        dashboard.follow(path)
+    return dashboard.show(stats=stats)
@@ -4,10 +4,16 @@ This module contains the classes that define data models used for the correspond
 files, found in `arviz_dashboard/ts`.
 """
 
+from __future__ import annotations
+
 import itertools
-from typing import TypedDict
+from typing import TYPE_CHECKING, Literal, TypedDict
+
+import numpy as np
 
-from xarray.core.datatree import DataTree
+if TYPE_CHECKING:
+    from xarray import DataArray
+    from xarray.core.datatree import DataTree
 
 
 class PosteriorData(TypedDict):
@@ -17,6 +23,29 @@ class PosteriorData(TypedDict):
     num_draws: int
 
 
+class VariableManifest(TypedDict):
+    dims: list[str]
+    shape: list[int]
+    dtype: str
+
+
+class PosteriorBuffers(TypedDict):
+    transport: Literal["binary"]
+    dropdowns: dict
+    manifest: dict[str, VariableManifest]
+    buffers: dict[str, memoryview]
+    num_chains: int
+    num_draws: int
+
+
+class PosteriorIndex(TypedDict):
+    lazy: Literal[True]
+    transport: Literal["json", "binary"]
+    dropdowns: dict
+    num_chains: int
+    num_draws: int
+
+
 class PosteriorModel:
     def update(self, original_dictionary: dict, update_with: dict) -> dict:
         for key, value in update_with.items():
@@ -26,100 +55,331 @@ class PosteriorModel:
                 original_dictionary[key] = value
         return original_dictionary
 
-    def parse_posterior_data(self, idata: DataTree) -> PosteriorData:
+    def coordinate_labels(self, data_array: DataArray) -> dict[str, list]:
+        """Labels of every coordinate of a data variable, other than `chain` and `draw`.
+
+        Only the coordinate arrays are read, never the samples of the data variable.
+
+        Parameters
+        ----------
+        data_array : DataArray
+            Posterior samples for one data variable.
+
+        Returns
+        -------
+        dict[str, list]
+            Coordinate names as keys, in dimension order, and their labels as values.
+        """
+        return {
+            dim: data_array[dim].values.tolist()
+            for dim in data_array.dims
+            if dim not in {"chain", "draw"}
+        }
+
+    def nest_chain_data(self, values, coordinates: list[str], labels: dict[str, list]) -> dict:
+        """Nest an array of chain data under its coordinate labels.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Array with shape `(*coordinates, chain, draw)`.
+        coordinates : list[str]
+            Names of the coordinates, in the same order as the leading axes of `values`.
+        labels : dict[str, list]
+            Coordinate labels for every name in `coordinates`.
+
+        Returns
+        -------
+        dict
+            Nested dictionary of the form
+            `{coordinate_name1: {coordinate_value1: {..., "chain": [[...], ...]}}}`.
+        """
+        if not coordinates:
+            return {"chain": values.tolist()}
+        coordinate, *remaining = coordinates
+        return {
+            coordinate: {
+                label: self.nest_chain_data(sub_values, remaining, labels)
+                for label, sub_values in zip(labels[coordinate], values)
+            },
+        }
+
+    def parse_data_variable(self, data_array: DataArray) -> tuple[dict, dict]:
+        """Parse a single data variable straight from its array.
+
+        The variable is transposed so the coordinate axes lead and the chain and draw axes
+        trail, which lets us slice the chain data for every coordinate combination without
+        ever leaving NumPy.
+
+        Parameters
+        ----------
+        data_array : DataArray
+            Posterior samples for one data variable.
+
+        Returns
+        -------
+        tuple[dict, dict]
+            The dropdowns and the nested chain data for the data variable.
+        """
+        labels = self.coordinate_labels(data_array)
+        coordinates = list(labels)
+        values = data_array.transpose(*coordinates, "chain", "draw").values
+        return labels, self.nest_chain_data(values, coordinates, labels)
+
+    def parse_data_variable_pandas(self, data_array: DataArray) -> tuple[dict, dict]:
+        """Parse a single data variable by pivoting it through a pandas DataFrame.
+
+        This is the original implementation, kept as a reference for
+        `parse_data_variable`. It is much slower and uses several times the memory of the
+        variable, so it should only be used for comparisons.
+
+        Parameters
+        ----------
+        data_array : DataArray
+            Posterior samples for one data variable.
+
+        Returns
+        -------
+        tuple[dict, dict]
+            The dropdowns and the nested chain data for the data variable.
+        """
+        dropdowns = {}
+        data = {}
+
+        # Determine if there are any coordinates associated with the given `data_variable`.
+        # These are hierarchical values associated with the `data_variable`, and must retain
+        # their order.
+        coordinates = list(data_array.coords)
+        # Remove the `chain` and `draw` coordinate from the set of coordinate variables for the
+        # given `data_variable`. We do not need them for finding coordinate names.
+        coordinates = [coord for coord in coordinates if coord not in {"chain", "draw"}]
+
+        # If no coordinates were found for the given `data_variable`, then we can extract the
+        # chain data and add it to the data.
+        if not coordinates:
+            data["chain"] = data_array.data.tolist()
+
+        # If we have coordinates associated with the `data_variable`, then we need to work
+        # harder to extract them so we retain their hierarchy.
+        ignore_columns = [*coordinates, "chain", "draw"]
+        if coordinates:
+            coordinates_df = data_array.to_dataframe().reset_index()
+
+            # Fill in the dropdowns data.
+            for coordinate in coordinates:
+                if coordinate not in dropdowns:
+                    dropdowns[coordinate] = []
+                dimensions = coordinates_df[coordinate].unique()
+                dropdowns[coordinate] = dimensions.tolist()
+
+            values = [column for column in coordinates_df.columns if column not in ignore_columns]
+            # Using a pivot we can transform the "long-format" dataframe into a
+            # "wide-format" for data extraction.
+            coordinate_chains_df = (
+                coordinates_df.pivot_table(
+                    index=[*coordinates, "chain"],
+                    columns="draw",
+                    values=values,
+                )
+                .droplevel(level=0, axis="columns")
+                .reset_index()
+            )
+            # We group by the coordinates in order to extract chain data, and create a nested
+            # dictionary that we can add it to.
+            grouped = coordinate_chains_df.groupby(coordinates)
+            groups = grouped.groups
+            coordinate_names_and_values = []
+            for group in groups:
+                group_name = group
+                if not isinstance(group_name, tuple):
+                    group_name = (group,)
+                group_df = grouped.get_group(group_name)
+                chain_data = group_df.set_index([*coordinates, "chain"]).to_numpy().tolist()
+                grouped_df = group_df.set_index(coordinates)
+                # The `zip` gives us the following structure
+                # [(coordinate_name1, coordinate_value1), (...), ...]. We flatten the list using
+                # itertools to give [coordinate_name1, coordinate_value1, ...].
+                values = grouped_df.index.drop_duplicates().to_list()
+                if isinstance(values[0], tuple):
+                    values = values[0]
+                coord_names_and_values = list(
+                    itertools.chain.from_iterable(
+                        zip(
+                            grouped_df.index.names,
+                            values,
+                        ),
+                    ),
+                )
+                # We create a list of nested dictionaries from the grouped dataframe
+                # coordinates.
+                temp_dict = {"chain": chain_data}
+                for coord_name_and_value in list(coord_names_and_values)[::-1]:
+                    temp_dict = {coord_name_and_value: temp_dict}
+                coordinate_names_and_values.append(temp_dict)
+            # Next we create the highly nested dictionary from the `coordinate_names_and_values`
+            # list.
+            for item in coordinate_names_and_values:
+                data = self.update(data, item)
+        return dropdowns, data
+
+    def parse_posterior_data(
+        self,
+        idata: DataTree,
+        engine: Literal["numpy", "pandas"] = "numpy",
+    ) -> PosteriorData:
+        """Parse the posterior into the nested layout used by the TypeScript widgets.
+
+        Parameters
+        ----------
+        idata : DataTree
+            Data tree (or ArviZ `InferenceData` object) that contains the posterior.
+        engine : {"numpy", "pandas"}, default "numpy"
+            Use the vectorized NumPy path, or the original pandas pivot path.
+
+        Returns
+        -------
+        PosteriorData
+            The dropdowns, nested posterior data, and the number of chains and draws.
+        """
+        if engine == "numpy":
+            parse = self.parse_data_variable
+        elif engine == "pandas":
+            parse = self.parse_data_variable_pandas
+        else:
+            raise ValueError(f"Unknown engine {engine!r}, expected 'numpy' or 'pandas'.")
+
         posterior = idata["posterior"]
-        data_variables = posterior.data_vars
         num_chains = len(posterior.coords["chain"].data)
         num_draws = len(posterior.coords["draw"].data)
 
         data = {}
         dropdowns = {}
-        for data_variable in data_variables:
-            dropdowns[data_variable] = {}
-            data[data_variable] = {}
-
-            # Determine if there are any coordinates associated with the given `data_variable`.
-            # These are hierarchical values associated with the `data_variable`, and must retain
-            # their order.
-            coordinates = list(posterior[data_variable].coords)
-            # Remove the `chain` and `draw` coordinate from the set of coordinate variables for the
-            # given `data_variable`. We do not need them for finding coordinate names.
-            coordinates = [coord for coord in coordinates if coord not in {"chain", "draw"}]
-
-            # If no coordinates were found for the given `data_variable`, then we can extract the
-            # chain data and add it to the data.
-            if not coordinates:
-                chain_data = posterior[data_variable].data.tolist()
-                data[data_variable]["chain"] = chain_data
-
-            # If we have coordinates associated with the `data_variable`, then we need to work
-            # harder to extract them so we retain their hierarchy.
-            ignore_columns = [*coordinates, "chain", "draw"]
-            if coordinates:
-                coordinates_df = posterior[data_variable].to_dataframe().reset_index()
-
-                # Fill in the dropdowns data.
-                for coordinate in coordinates:
-                    if coordinate not in dropdowns[data_variable]:
-                        dropdowns[data_variable][coordinate] = []
-                    dimensions = coordinates_df[coordinate].unique()
-                    dropdowns[data_variable][coordinate] = dimensions.tolist()
-
-                values = [
-                    column for column in coordinates_df.columns if column not in ignore_columns
-                ]
-                # Using a pivot we can transform the "long-format" dataframe into a
-                # "wide-format" for data extraction.
-                coordinate_chains_df = (
-                    coordinates_df.pivot_table(
-                        index=[*coordinates, "chain"],
-                        columns="draw",
-                        values=values,
-                    )
-                    .droplevel(level=0, axis="columns")
-                    .reset_index()
-                )
-                # We group by the coordinates in order to extract chain data, and create a nested
-                # dictionary that we can add it to.
-                grouped = coordinate_chains_df.groupby(coordinates)
-                groups = grouped.groups
-                coordinate_names_and_values = []
-                for group in groups:
-                    group_name = group
-                    if not isinstance(group_name, tuple):
-                        group_name = (group,)
-                    group_df = grouped.get_group(group_name)
-                    chain_data = group_df.set_index([*coordinates, "chain"]).to_numpy().tolist()
-                    grouped_df = group_df.set_index(coordinates)
-                    # The `zip` gives us the following structure
-                    # [(coordinate_name1, coordinate_value1), (...), ...]. We flatten the list using
-                    # itertools to give [coordinate_name1, coordinate_value1, ...].
-                    values = grouped_df.index.drop_duplicates().to_list()
-                    if isinstance(values[0], tuple):
-                        values = values[0]
-                    coord_names_and_values = list(
-                        itertools.chain.from_iterable(
-                            zip(
-                                grouped_df.index.names,
-                                values,
-                            ),
-                        ),
-                    )
-                    # We create a list of nested dictionaries from the grouped dataframe
-                    # coordinates.
-                    temp_dict = {"chain": chain_data}
-                    for coord_name_and_value in list(coord_names_and_values)[::-1]:
-                        temp_dict = {coord_name_and_value: temp_dict}
-                    coordinate_names_and_values.append(temp_dict)
-                # Next we create the highly nested dictionary from the `coordinate_names_and_values`
-                # list.
-                keys = {}
-                for item in coordinate_names_and_values:
-                    keys = self.update(keys, item)
-                data[data_variable] = keys
+        for data_variable in posterior.data_vars:
+            dropdowns[data_variable], data[data_variable] = parse(posterior[data_variable])
         return {
             "dropdowns": dropdowns,
             "posterior": data,
             "num_chains": num_chains,
             "num_draws": num_draws,
         }
+
+    def data_variable_buffer(self, data_array: DataArray) -> tuple[VariableManifest, memoryview]:
+        """Expose the samples of a data variable as a raw little-endian buffer.
+
+        The array keeps its `(chain, draw, *coordinates)` layout, so for the usual C-ordered
+        posterior no copy is made. Only non-float data, big-endian data, or arrays whose
+        dimensions are stored in a different order are converted.
+
+        Parameters
+        ----------
+        data_array : DataArray
+            Posterior samples for one data variable.
+
+        Returns
+        -------
+        tuple[VariableManifest, memoryview]
+            The dims, shape and dtype of the buffer, and a flat byte view of the samples.
+        """
+        coordinates = [dim for dim in data_array.dims if dim not in {"chain", "draw"}]
+        dims = ["chain", "draw", *coordinates]
+        values = np.ascontiguousarray(data_array.transpose(*dims).values)
+        if values.dtype not in {np.dtype("<f4"), np.dtype("<f8")}:
+            dtype = "<f4" if values.dtype.kind == "f" and values.dtype.itemsize == 4 else "<f8"
+            values = values.astype(dtype)
+        manifest = {"dims": dims, "shape": list(values.shape), "dtype": values.dtype.name}
+        return manifest, memoryview(values).cast("B")
+
+    def parse_posterior_buffers(self, idata: DataTree) -> PosteriorBuffers:
+        """Parse the posterior into raw buffers and a small JSON manifest.
+
+        The buffers are sent to the front end through the binary channel of the widget
+        instead of being boxed into nested lists of floats, and read there as typed arrays.
+
+        Parameters
+        ----------
+        idata : DataTree
+            Data tree (or ArviZ `InferenceData` object) that contains the posterior.
+
+        Returns
+        -------
+        PosteriorBuffers
+            The dropdowns, the manifest and buffer of every data variable, and the number of
+            chains and draws.
+        """
+        posterior = idata["posterior"]
+        dropdowns = {}
+        manifest = {}
+        buffers = {}
+        for data_variable in posterior.data_vars:
+            data_array = posterior[data_variable]
+            dropdowns[data_variable] = self.coordinate_labels(data_array)
+            manifest[data_variable], buffers[data_variable] = self.data_variable_buffer(
+                data_array,
+            )
+        return {
+            "transport": "binary",
+            "dropdowns": dropdowns,
+            "manifest": manifest,
+            "buffers": buffers,
+            "num_chains": len(posterior.coords["chain"].data),
+            "num_draws": len(posterior.coords["draw"].data),
+        }
+
+    def parse_posterior_index(
+        self,
+        idata: DataTree,
+        transport: Literal["json", "binary"] = "json",
+    ) -> PosteriorIndex:
+        """Parse only the dropdown hierarchy of the posterior.
+
+        This is used by the lazy mode of the widgets, where the front end asks for one slice of
+        chain data at a time. Only the coordinates are read, so the cost depends on the size of
+        the coordinate index and not on the size of the posterior.
+
+        Parameters
+        ----------
+        idata : DataTree
+            Data tree (or ArviZ `InferenceData` object) that contains the posterior.
+        transport : {"json", "binary"}, default "json"
+            How the slices will be sent to the front end.
+
+        Returns
+        -------
+        PosteriorIndex
+            The dropdowns, and the number of chains and draws.
+        """
+        posterior = idata["posterior"]
+        return {
+            "lazy": True,
+            "transport": transport,
+            "dropdowns": {
+                data_variable: self.coordinate_labels(posterior[data_variable])
+                for data_variable in posterior.data_vars
+            },
+            "num_chains": len(posterior.coords["chain"].data),
+            "num_draws": len(posterior.coords["draw"].data),
+        }
+
+    def select_chain_data(self, data_array: DataArray, coordinates: list[int]) -> np.ndarray:
+        """Read the chain data of a data variable for one combination of coordinates.
+
+        Parameters
+        ----------
+        data_array : DataArray
+            Posterior samples for one data variable.
+        coordinates : list[int]
+            Position of the selected label of every coordinate, in dimension order.
+
+        Returns
+        -------
+        np.ndarray
+            Array with shape `(chain, draw)`.
+        """
+        dims = [dim for dim in data_array.dims if dim not in {"chain", "draw"}]
+        if len(coordinates) != len(dims):
+            raise ValueError(
+                f"Expected {len(dims)} coordinate positions for {data_array.name!r}, "
+                f"got {len(coordinates)}.",
+            )
+        selection = dict(zip(dims, coordinates))
+        return data_array.isel(selection).transpose("chain", "draw").values
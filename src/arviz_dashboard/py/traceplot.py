@@ -1,21 +1,201 @@
 from pathlib import Path
+from typing import Literal
 
 import anywidget
+import numpy as np
 import traitlets
+import xarray as xr
 from xarray.core.datatree import DataTree
 
+from arviz_dashboard.artifact import PosteriorArtifact, is_artifact, open_artifact
+from arviz_dashboard.downsample import MIN_POINTS, downsample, thin
+from arviz_dashboard.io import open_posterior
 from arviz_dashboard.py.models import PosteriorModel
+from arviz_dashboard.streaming import PosteriorTail
 
 
 class Traceplot(anywidget.AnyWidget, PosteriorModel):
+    """Trace and density plots of the posterior, rendered in the front end.
+
+    Parameters
+    ----------
+    idata : DataTree | PosteriorArtifact | str | Path
+        Data tree (or ArviZ `InferenceData` object) that contains the posterior, or the path to
+        a netCDF file or zarr store with a posterior group. An artifact, or its path, shows its
+        thinned draws, see `arviz_dashboard.artifact`.
+    transport : {"json", "binary"}, default "json"
+        With "json" the draws are sent as nested lists of floats. With "binary" only a small
+        manifest of dims, shapes and dtypes is sent as JSON, and the draws of every data
+        variable go through the binary channel of the widget as a raw typed-array buffer.
+    lazy : bool, default False
+        If `True`, only the dropdown hierarchy is sent when the widget is created. The front
+        end then asks for the chain data of one data variable and coordinate selection at a
+        time, and keeps the slices it received in a bounded cache.
+    cache_size : int, default 32
+        Maximum number of slices kept by the front end in the lazy mode.
+    max_points : int | None, default None
+        Maximum number of points sent for each trace line in the lazy mode, at least four. The
+        traces are downsampled in the kernel with `downsample_method`, and the density plot is
+        computed from evenly thinned draws. The front end asks again for a draw range at full
+        resolution when it holds fewer draws than `max_points`. If `None`, every draw is sent.
+    downsample_method : {"lttb", "minmax"}, default "lttb"
+        Algorithm used to downsample the trace lines, see `arviz_dashboard.downsample`.
+    follow : bool, default False
+        If `True`, watch the file at `idata` while a sampler appends draws to it. Only the new
+        draws are sent to the front end, as incremental messages. Views of the widget created
+        after that still start from the draws available when the widget was created.
+    """
+
     _esm = Path(__file__).parent.parent.resolve() / "static" / "traceplot.js"
     data = traitlets.Dict().tag(sync=True)
+    cache_size = traitlets.Integer(32).tag(sync=True)
+    max_points = traitlets.Integer(None, allow_none=True).tag(sync=True)
     # hierarchy = traitlets.Dict().tag(sync=True)
     # num_chains = traitlets.Integer().tag(sync=True)
     # num_draws = traitlets.Integer().tag(sync=True)
 
-    def __init__(self, idata: DataTree) -> None:
-        data = self.parse_posterior_data(idata=idata)
+    def __init__(
+        self,
+        idata: DataTree | PosteriorArtifact | str | Path,
+        transport: Literal["json", "binary"] = "json",
+        *,
+        lazy: bool = False,
+        cache_size: int = 32,
+        max_points: int | None = None,
+        downsample_method: Literal["lttb", "minmax"] = "lttb",
+        follow: bool = False,
+    ) -> None:
+        if transport not in {"json", "binary"}:
+            raise ValueError(f"Unknown transport {transport!r}, expected 'json' or 'binary'.")
+        if max_points is not None and not lazy:
+            raise ValueError("Downsampling with `max_points` requires `lazy=True`.")
+        if max_points is not None and max_points < MIN_POINTS:
+            raise ValueError(f"`max_points` must be at least {MIN_POINTS}, got {max_points}.")
+        path = None
+        draws = None
+        if isinstance(idata, (str, Path)) and is_artifact(idata):
+            idata = open_artifact(idata)
+        if isinstance(idata, PosteriorArtifact):
+            if follow:
+                raise ValueError("An artifact cannot follow a running sampler.")
+            draws = idata.posterior["draw"].values
+            idata = {"posterior": idata.posterior}
+        elif isinstance(idata, (str, Path)):
+            path = Path(idata)
+            # The lazy mode only reads the slices the front end asks for.
+            idata = {"posterior": open_posterior(path, lazy=lazy and not follow)}
+        elif follow:
+            raise ValueError("Following a running sampler requires the path of its posterior file.")
+        self.posterior = idata["posterior"]
+        self.transport = transport
+        self.lazy = lazy
+        self.tail = None
+        self.draws = draws
+        self.downsample_method = downsample_method
+        if lazy:
+            data = self.parse_posterior_index(idata=idata, transport=transport)
+        elif transport == "json":
+            data = self.parse_posterior_data(idata=idata)
+        else:
+            data = self.parse_posterior_buffers(idata=idata)
+        if draws is not None:
+            # Thinned draws are drawn at the draw numbers they had in the run.
+            data["draws"] = draws.tolist()
         # self.num_chains = len(idata["posterior"].coords["chain"])
         # self.num_draws = len(idata["posterior"].coords["draw"])
-        super().__init__(data=data)
+        super().__init__(data=data, cache_size=cache_size, max_points=max_points)
+        if lazy:
+            self.on_msg(self._handle_custom_msg)
+        if follow:
+            self.follow(path)
+
+    def follow(self, path: str | Path) -> None:
+        """Send the draws a running sampler appends to the posterior file at `path`.
+
+        Parameters
+        ----------
+        path : str | Path
+            Path to the netCDF file or zarr store written by the sampler.
+        """
+        self.tail = PosteriorTail(path, num_draws=self.posterior.sizes["draw"])
+        self.tail.follow(self._append_new_draws)
+
+    def _append_new_draws(self, new_draws: xr.Dataset) -> None:
+        """Send only the new draws to the front end, which appends them to its data."""
+        self.posterior = xr.concat([self.posterior, new_draws], dim="draw")
+        message = {"type": "append", "num_draws": self.posterior.sizes["draw"]}
+        if self.lazy:
+            # The front end drops its cached slices and asks again for the one it shows.
+            self.send(message)
+        elif self.transport == "binary":
+            manifest = {}
+            buffers = []
+            for data_variable in new_draws.data_vars:
+                manifest[data_variable], buffer = self.data_variable_buffer(
+                    new_draws[data_variable],
+                )
+                buffers.append(buffer)
+            message["variables"] = list(manifest)
+            message["manifest"] = manifest
+            self.send(message, buffers)
+        else:
+            message["posterior"] = {
+                data_variable: self.parse_data_variable(new_draws[data_variable])[1]
+                for data_variable in new_draws.data_vars
+            }
+            self.send(message)
+
+    def _handle_custom_msg(self, widget: "Traceplot", content: dict, buffers: list) -> None:
+        """Reply to a request from the front end for one slice of chain data."""
+        if content.get("type") != "fetch":
+            return
+        chain_data = self.select_chain_data(
+            self.posterior[content["data_variable"]],
+            content["coordinates"],
+        )
+        reply = {
+            "type": "slice",
+            "key": content["key"],
+            "shape": list(chain_data.shape),
+        }
+        if self.max_points is not None:
+            self._send_downsampled(reply, chain_data, content.get("draw_range"))
+        elif self.transport == "binary":
+            chain_data = np.ascontiguousarray(chain_data, dtype="<f8")
+            reply["dtype"] = chain_data.dtype.name
+            self.send(reply, [memoryview(chain_data).cast("B")])
+        else:
+            reply["chain"] = chain_data.tolist()
+            self.send(reply)
+
+    def _send_downsampled(
+        self,
+        reply: dict,
+        chain_data: np.ndarray,
+        draw_range: list[int] | None,
+    ) -> None:
+        """Send the downsampled traces of every chain, and thinned draws for the densities."""
+        start, stop = draw_range if draw_range is not None else (0, None)
+        if self.draws is not None:
+            # The range is given in draw numbers of the run, not positions of the thinned draws.
+            start = int(np.searchsorted(self.draws, start))
+            stop = None if stop is None else int(np.searchsorted(self.draws, stop))
+        traces = [
+            downsample(draws, self.max_points, self.downsample_method, start, stop)
+            for draws in chain_data
+        ]
+        if self.draws is not None:
+            traces = [(self.draws[x], y) for x, y in traces]
+        kde_data = thin(chain_data, self.max_points)
+        reply["downsampled"] = True
+        reply["kde_shape"] = list(kde_data.shape)
+        if self.transport == "binary":
+            arrays = [*(array for trace in traces for array in trace), kde_data]
+            arrays = [np.ascontiguousarray(array, dtype="<f8") for array in arrays]
+            reply["dtype"] = "float64"
+            self.send(reply, [memoryview(array).cast("B") for array in arrays])
+        else:
+            reply["x"] = [x.tolist() for x, _ in traces]
+            reply["y"] = [y.tolist() for _, y in traces]
+            reply["kde"] = kde_data.tolist()
+            self.send(reply)
@@ -0,0 +1,167 @@
+"""Serve the dashboards to several users with Panel.
+
+Every session of a served dashboard opens its runs with `load_run`, which keeps them in the
+process-wide `arviz_dashboard.cache.runs`. Sessions showing the same run share its posterior
+object, and with it every result cached for it in `arviz_dashboard.cache.results`: densities,
+downsampled traces, summaries and ELPD. Opening a new session on a loaded run only renders.
+
+Runs can also be given as artifacts, see `arviz_dashboard.artifact`, whose results are all
+computed ahead of time. Artifacts hold no posterior predictive draws for the PPC dashboard.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from arviz_dashboard import cache
+from arviz_dashboard.artifact import PosteriorArtifact, is_artifact, open_artifact
+from arviz_dashboard.io import modified_time_ns, open_inference_data, open_posterior
+
+if TYPE_CHECKING:
+    import arviz as az
+
+DASHBOARDS = ("trace", "marginal", "forest", "elpd", "ppc")
+
+# Dashboards of a single run get one page per run, the others compare all runs on one page.
+SINGLE_RUN_DASHBOARDS = ("trace", "marginal")
+# Dashboards reading groups other than the posterior, which are always opened in full.
+FULL_RUN_DASHBOARDS = ("elpd", "ppc")
+
+
+def load_run(path: str | Path, lazy: bool = False) -> az.InferenceData | PosteriorArtifact:
+    """Open a run once per process, and again only after its file changes.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to a netCDF file or zarr store written by ArviZ, or to an artifact.
+    lazy : bool, default False
+        If `True`, only open the posterior group, lazily, see `open_posterior`, so runs larger
+        than memory can be served. Otherwise every group is opened. Artifacts are always read
+        in memory.
+
+    Returns
+    -------
+    az.InferenceData | PosteriorArtifact
+        The run, shared by every caller until it is evicted from `arviz_dashboard.cache.runs`.
+    """
+    path = Path(path).resolve()
+
+    def load() -> az.InferenceData | PosteriorArtifact:
+        import arviz as az
+
+        if is_artifact(path):
+            return open_artifact(path)
+        if lazy:
+            return az.InferenceData(posterior=open_posterior(path, lazy=True))
+        return open_inference_data(path)
+
+    return cache.runs.get_or_compute((str(path), modified_time_ns(path), lazy), load)
+
+
+def model_names(paths: list[Path]) -> dict[str, Path]:
+    """Name runs by their file names without suffix, or by their paths if these collide."""
+    stems = [path.stem for path in paths]
+    if len(set(stems)) == len(stems):
+        return dict(zip(stems, paths))
+    return {str(path): path for path in paths}
+
+
+def create_app(dashboard: str, paths: list[Path], lazy: bool = False) -> Callable[[], None]:
+    """Function building a dashboard on the page of every new session.
+
+    Parameters
+    ----------
+    dashboard : {"trace", "marginal", "forest", "elpd", "ppc"}
+        Name of the dashboard.
+    paths : list[Path]
+        Runs shown by the dashboard. The trace and marginal dashboards show the first one.
+    lazy : bool, default False
+        Whether the trace, marginal and forest dashboards open the posteriors lazily, see
+        `load_run`. The ELPD and PPC dashboards always open every group.
+
+    Returns
+    -------
+    Callable[[], None]
+        Function for `pn.serve`, adding the dashboard to the current document.
+    """
+    models = model_names(paths)
+
+    def app() -> None:
+        if dashboard == "trace":
+            from arviz_dashboard.panel.trace.trace import trace
+
+            trace(load_run(paths[0], lazy)).servable()
+        elif dashboard == "marginal":
+            from arviz_dashboard.panel.marginal.one_d import posterior_marginal1d
+
+            posterior_marginal1d(load_run(paths[0], lazy)).servable()
+        elif dashboard == "forest":
+            from arviz_dashboard.panel.forest import ForestDashboard
+
+            loaders = {name: partial(load_run, path, lazy) for name, path in models.items()}
+            ForestDashboard(loaders).dashboard_forest()
+        elif dashboard == "elpd":
+            from arviz_dashboard.panel.elpd import dashboard_elpd
+
+            dashboard_elpd({name: partial(load_run, path) for name, path in models.items()})
+        elif dashboard == "ppc":
+            from arviz_dashboard.panel.ppc import dashboard_ppc
+
+            dashboard_ppc({name: load_run(path) for name, path in models.items()})
+        else:
+            raise ValueError(f"Unknown dashboard {dashboard!r}, expected one of {DASHBOARDS}.")
+
+    return app
+
+
+def serve(
+    paths: list[str | Path],
+    dashboard: str = "trace",
+    lazy: bool = False,
+    max_runs: int | None = None,
+    max_result_bytes: int | None = None,
+    **kwargs,
+) -> None:
+    """Serve a dashboard of some runs with `pn.serve`, sharing data across sessions.
+
+    Parameters
+    ----------
+    paths : list[str | Path]
+        Paths to netCDF files or zarr stores written by ArviZ, or to artifacts.
+    dashboard : {"trace", "marginal", "forest", "elpd", "ppc"}, default "trace"
+        Name of the dashboard. The trace and marginal dashboards are served on one page per
+        run, named after its file, the others on a single page comparing all runs.
+    lazy : bool, default False
+        See `create_app`.
+    max_runs : int | None, default None
+        Maximum number of runs kept open, see `arviz_dashboard.cache.runs`. If None, keep the
+        current bound.
+    max_result_bytes : int | None, default None
+        Maximum size of the computed results shared by all sessions, see
+        `arviz_dashboard.cache.results`. If None, keep the current bound.
+    **kwargs
+        Passed to `pn.serve`, e.g. `port`, `address`, `show` or `websocket_origin`.
+    """
+    import panel as pn
+
+    if dashboard not in DASHBOARDS:
+        raise ValueError(f"Unknown dashboard {dashboard!r}, expected one of {DASHBOARDS}.")
+    paths = [Path(path) for path in paths]
+    if max_runs is not None:
+        cache.runs.max_items = max_runs
+    if max_result_bytes is not None:
+        cache.results.max_bytes = max_result_bytes
+    if dashboard in SINGLE_RUN_DASHBOARDS:
+        apps = {
+            name: create_app(dashboard, [path], lazy) for name, path in model_names(paths).items()
+        }
+    else:
+        apps = {dashboard: create_app(dashboard, paths, lazy)}
+    # Open the runs before the first session, so no user waits for them.
+    for path in paths:
+        load_run(path, lazy and dashboard not in FULL_RUN_DASHBOARDS)
+    pn.serve(apps if len(apps) > 1 else next(iter(apps.values())), **kwargs)
@@ -0,0 +1 @@
+export default {render() {}}
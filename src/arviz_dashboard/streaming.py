@@ -0,0 +1,238 @@
+"""Follow a posterior file while a sampler is still appending draws to it.
+
+A `PosteriorTail` watches a netCDF or zarr file with `watchfiles`, and hands only the draws
+that were added since the last change to a callback. `RunningMoments` and `RunningDensity`
+keep per-chain summaries and densities that are updated with those new draws, instead of being
+recomputed from the whole posterior.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import watchfiles
+import xarray as xr
+
+from arviz_dashboard.io import open_dataset
+from arviz_dashboard.kde import scott_bandwidth, smooth_counts
+
+
+class PosteriorTail:
+    """Read the draws appended to a posterior file since the last read.
+
+    Parameters
+    ----------
+    path : str | Path
+        Path to the netCDF file or zarr store written by the sampler.
+    group : str, default "posterior"
+        Group of the file holding the posterior.
+    num_draws : int, default 0
+        Number of draws that have already been read.
+    """
+
+    def __init__(self, path: str | Path, group: str = "posterior", num_draws: int = 0) -> None:
+        # The file watcher reports absolute paths, with symbolic links resolved.
+        self.path = Path(path).resolve()
+        self.group = group
+        self.num_draws = num_draws
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def read_new_draws(self) -> xr.Dataset | None:
+        """Read the draws added since the last read.
+
+        Returns
+        -------
+        xr.Dataset | None
+            The new draws, or `None` if there are none or if the file could not be read. A
+            file that is being written can be unreadable for a moment, in which case the draws
+            are picked up on the next change.
+        """
+        try:
+            with open_dataset(self.path, self.group) as dataset:
+                if dataset.sizes["draw"] <= self.num_draws:
+                    return None
+                new_draws = dataset.isel(draw=slice(self.num_draws, None)).load()
+        except (OSError, KeyError, ValueError):
+            return None
+        self.num_draws += new_draws.sizes["draw"]
+        return new_draws
+
+    def follow(self, callback: Callable[[xr.Dataset], None]) -> None:
+        """Call `callback` with the new draws every time the file changes.
+
+        The file is watched from a daemon thread, so `callback` is called from that thread.
+
+        Parameters
+        ----------
+        callback : Callable[[xr.Dataset], None]
+            Function called with the dataset of new draws.
+        """
+        if self._thread is not None:
+            raise RuntimeError(f"Already following {self.path}.")
+
+        def watch_filter(change: watchfiles.Change, path: str) -> bool:
+            return Path(path) == self.path or self.path in Path(path).parents
+
+        def run() -> None:
+            for _ in watchfiles.watch(
+                self.path.parent,
+                watch_filter=watch_filter,
+                stop_event=self._stop_event,
+            ):
+                new_draws = self.read_new_draws()
+                if new_draws is not None:
+                    callback(new_draws)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name=f"tail-{self.path.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop following the file."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+
+class RunningMoments:
+    """Count, mean and variance of several series, updated in batches.
+
+    Batches are merged with the parallel algorithm of Chan et al., so the moments never need
+    the draws that were already seen.
+
+    Parameters
+    ----------
+    num_series : int
+        Number of series, usually the number of chains.
+    """
+
+    def __init__(self, num_series: int) -> None:
+        self.count = np.zeros(num_series)
+        self.mean = np.zeros(num_series)
+        self.m2 = np.zeros(num_series)
+
+    def update(self, samples: np.ndarray) -> None:
+        """Add a batch of draws with shape `(num_series, num_draws)`."""
+        count = samples.shape[1]
+        if count == 0:
+            return
+        mean = samples.mean(axis=1)
+        m2 = ((samples - mean[:, None]) ** 2).sum(axis=1)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta**2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Sample variance of every series."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.m2 / (self.count - 1)
+
+    def rhat(self) -> float:
+        """Potential scale reduction factor of Gelman and Rubin, from the running moments."""
+        if self.count.shape[0] < 2 or self.count.min() < 2:
+            return np.nan
+        num_draws = self.count.min()
+        within = self.variance.mean()
+        between = num_draws * self.mean.var(ddof=1)
+        pooled = (num_draws - 1) / num_draws * within + between / num_draws
+        return float(np.sqrt(pooled / within))
+
+
+class RunningDensity:
+    """Binned kernel density estimates of several series, updated in batches.
+
+    Draws are counted in bins on a grid shared by all series. When new draws fall outside the
+    grid its bin width is doubled, merging pairs of bins, so the counts stay exact. Densities
+    are computed by smoothing the counts with a Gaussian kernel.
+
+    Parameters
+    ----------
+    num_series : int
+        Number of series, usually the number of chains.
+    num_bins : int, default 512
+        Number of bins of the grid. Must be even.
+    """
+
+    def __init__(self, num_series: int, num_bins: int = 512) -> None:
+        if num_bins % 2:
+            raise ValueError("The number of bins must be even.")
+        self.num_bins = num_bins
+        self.counts = np.zeros((num_series, num_bins))
+        self.moments = RunningMoments(num_series)
+        self.lower = None
+        self.bin_width = None
+
+    def _extend(self, minimum: float, maximum: float) -> None:
+        if self.lower is None:
+            span = maximum - minimum
+            padding = 0.05 * span if span > 0 else 0.5
+            self.lower = minimum - padding
+            self.bin_width = (span + 2 * padding) / self.num_bins
+            return
+        half = self.num_bins // 2
+        while minimum < self.lower or maximum >= self.lower + self.num_bins * self.bin_width:
+            merged = self.counts.reshape(self.counts.shape[0], half, 2).sum(axis=2)
+            self.counts = np.zeros_like(self.counts)
+            if minimum < self.lower:
+                self.counts[:, half:] = merged
+                self.lower -= self.num_bins * self.bin_width
+            else:
+                self.counts[:, :half] = merged
+            self.bin_width *= 2
+
+    def update(self, samples: np.ndarray) -> None:
+        """Add a batch of draws with shape `(num_series, num_draws)`."""
+        samples = samples[:, np.isfinite(samples).all(axis=0)]
+        if samples.shape[1] == 0:
+            return
+        self._extend(float(samples.min()), float(samples.max()))
+        bins = ((samples - self.lower) / self.bin_width).astype(np.int64)
+        bins = np.clip(bins, 0, self.num_bins - 1)
+        offsets = np.arange(samples.shape[0])[:, None] * self.num_bins
+        self.counts += np.bincount(
+            (bins + offsets).ravel(),
+            minlength=self.counts.size,
+        ).reshape(self.counts.shape)
+        self.moments.update(samples)
+
+    def density(self, aggregate: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """Density of every series, or of all series together.
+
+        Parameters
+        ----------
+        aggregate : bool, default False
+            If `True`, return one density for the draws of all series.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The bin centers, and the densities with shape `(num_series, num_bins)`, or
+            `(1, num_bins)` when aggregated. Each density is scaled to a maximum of one.
+        """
+        counts = self.counts
+        count = self.moments.count
+        variance = self.moments.variance
+        if aggregate:
+            counts = counts.sum(axis=0, keepdims=True)
+            total = count.sum()
+            mean = (self.moments.mean * count).sum() / total
+            m2 = (self.moments.m2 + count * (self.moments.mean - mean) ** 2).sum()
+            count = np.array([total])
+            variance = np.array([m2 / (total - 1)])
+        # Scott's rule of thumb, with at least one bin width so the estimate is never spiky.
+        bandwidth = scott_bandwidth(variance, count)
+        bandwidth = np.where(np.isfinite(bandwidth), bandwidth, self.bin_width)
+        bandwidth = np.maximum(bandwidth, self.bin_width)
+        density = smooth_counts(counts, self.bin_width, bandwidth)
+        maximum = density.max(axis=1, keepdims=True)
+        density = np.divide(density, maximum, out=np.zeros_like(density), where=maximum > 0)
+        support = self.lower + (np.arange(self.num_bins) + 0.5) * self.bin_width
+        return support, density
@@ -0,0 +1,307 @@
+"""Posterior summaries computed once and looked up by the dashboards.
+
+A `PosteriorSummary` sorts the draws of every variable once, with the chains combined, and
+computes from them the highest density intervals at a grid of probabilities, quantiles, means
+and densities. Changing the interval probability in a dashboard is then a lookup. Only a thinned
+copy of the sorted draws is kept, so a summary stays small next to the posterior.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import xarray as xr
+
+from arviz_dashboard import cache
+from arviz_dashboard.kde import kde
+
+HDI_PROBS = tuple(np.round(np.linspace(0, 1, 21), 2))
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+SUPPORT_POINTS = 1001
+
+
+def sorted_draws(posterior: xr.Dataset) -> dict[str, xr.DataArray]:
+    """Draws of every variable with the chains combined, sorted along a last "sample" dim.
+
+    Parameters
+    ----------
+    posterior : xr.Dataset
+        Posterior with "chain" and "draw" dimensions.
+
+    Returns
+    -------
+    dict[str, xr.DataArray]
+        Variable names as keys and sorted draws as values. Non-finite draws are sorted last.
+    """
+    output = {}
+    for name, data_array in posterior.data_vars.items():
+        # Stack and read one variable at a time, so a lazily opened posterior is never read
+        # in full at once.
+        data_array = data_array.stack(sample=("chain", "draw"))
+        data_array = data_array.transpose(..., "sample").drop_vars(["sample", "chain", "draw"])
+        output[name] = data_array.copy(data=np.sort(data_array.values, axis=-1))
+    return output
+
+
+def hdi_from_sorted(values: np.ndarray, hdi_probs: np.ndarray) -> np.ndarray:
+    """Highest density intervals of sorted draws, at several probabilities.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Draws sorted along the last axis.
+    hdi_probs : np.ndarray
+        Probabilities of the intervals.
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape `(len(hdi_probs), *values.shape[:-1], 2)` with the lower and upper
+        bounds of every interval. The interval with probability one spans all the draws.
+    """
+    num_draws = values.shape[-1]
+    output = np.empty((len(hdi_probs), *values.shape[:-1], 2))
+    for i, hdi_prob in enumerate(hdi_probs):
+        # Same interval as `az.hdi`: the narrowest window holding `floor(p * n)` more draws.
+        interval_idx_inc = min(int(np.floor(hdi_prob * num_draws)), num_draws - 1)
+        widths = values[..., interval_idx_inc:] - values[..., : num_draws - interval_idx_inc]
+        lower = np.argmin(widths, axis=-1)[..., None]
+        output[i, ..., 0] = np.take_along_axis(values, lower, axis=-1)[..., 0]
+        output[i, ..., 1] = np.take_along_axis(values, lower + interval_idx_inc, axis=-1)[..., 0]
+    return output
+
+
+def quantiles_from_sorted(values: np.ndarray, quantiles: np.ndarray) -> np.ndarray:
+    """Quantiles of sorted draws, with linear interpolation.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Draws sorted along the last axis.
+    quantiles : np.ndarray
+        Quantiles to compute, between zero and one.
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape `(len(quantiles), *values.shape[:-1])`.
+    """
+    positions = np.asarray(quantiles) * (values.shape[-1] - 1)
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, values.shape[-1] - 1)
+    weight = positions - below
+    return np.moveaxis(
+        values[..., below] * (1 - weight) + values[..., above] * weight,
+        -1,
+        0,
+    )
+
+
+def thin_sorted(values: np.ndarray, num_points: int = SUPPORT_POINTS) -> np.ndarray:
+    """Quantiles of sorted draws at evenly spaced probabilities, from zero to one.
+
+    Quantiles read from the thinned draws with `quantiles_from_sorted` are exact at the
+    probabilities of the grid, and interpolated linearly between them.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Draws sorted along the last axis.
+    num_points : int, default `SUPPORT_POINTS`
+        Number of draws to keep. If the draws are not more than that, all of them are kept.
+
+    Returns
+    -------
+    np.ndarray
+        The thinned draws, still sorted along the last axis.
+    """
+    if values.shape[-1] <= num_points:
+        return values
+    return np.moveaxis(quantiles_from_sorted(values, np.linspace(0, 1, num_points)), 0, -1)
+
+
+def thin_sorted_draws(data_array: xr.DataArray) -> xr.DataArray:
+    """Thin sorted draws from `sorted_draws` along their "sample" dim, see `thin_sorted`."""
+    values = thin_sorted(data_array.values)
+    return data_array.isel(sample=slice(values.shape[-1])).copy(data=values)
+
+
+def densities_from_sorted(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Densities of every coordinate of a variable, on a shared grid.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Draws sorted along the last axis.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The grid shared by all coordinates, and the densities with one row per coordinate, in
+        C order, each scaled to a maximum of one.
+    """
+    support, density, _ = kde(values.reshape(-1, values.shape[-1]))
+    maximum = density.max(axis=1, keepdims=True)
+    density = np.divide(density, maximum, out=np.zeros_like(density), where=maximum > 0)
+    return support, density
+
+
+class PosteriorSummary:
+    """Means, quantiles, highest density intervals and densities of every variable.
+
+    Every result is computed from the sorted draws when the summary is created, and then only
+    a thinned copy of the sorted draws is kept, see `thin_sorted`. The summary of a posterior
+    larger than the shared result cache is therefore still cached. A lazily opened posterior
+    is read one variable at a time.
+
+    Parameters
+    ----------
+    posterior : xr.Dataset
+        Posterior with "chain" and "draw" dimensions.
+    hdi_probs : tuple[float, ...], default `HDI_PROBS`
+        Probabilities of the precomputed intervals. Other probabilities are rounded to the
+        nearest of them, see `hdi`.
+    quantiles : tuple[float, ...], default `QUANTILES`
+        Precomputed quantiles. Other quantiles are read from the thinned sorted draws.
+
+    Attributes
+    ----------
+    sorted : dict[str, xr.DataArray]
+        The thinned sorted draws of every variable, see `sorted_draws` and `thin_sorted`.
+    mean : xr.Dataset
+        Mean of every variable.
+    hdis : xr.Dataset
+        Intervals of every variable, with "hdi_prob" and "hdi" dimensions.
+    quantiles : xr.Dataset
+        Quantiles of every variable, with a "quantile" dimension.
+    """
+
+    def __init__(
+        self,
+        posterior: xr.Dataset,
+        hdi_probs: tuple[float, ...] = HDI_PROBS,
+        quantiles: tuple[float, ...] = QUANTILES,
+    ) -> None:
+        self.sorted = {}
+        self._densities = {}
+        hdi_probs = np.asarray(hdi_probs)
+        quantiles = np.asarray(quantiles)
+        means = {}
+        hdis = {}
+        quantile_values = {}
+        for name, data_array in sorted_draws(posterior).items():
+            dims = data_array.dims[:-1]
+            values = data_array.values
+            means[name] = (dims, values.mean(axis=-1))
+            hdis[name] = (("hdi_prob", *dims, "hdi"), hdi_from_sorted(values, hdi_probs))
+            quantile_values[name] = (("quantile", *dims), quantiles_from_sorted(values, quantiles))
+            self._densities[name] = densities_from_sorted(values)
+            self.sorted[name] = thin_sorted_draws(data_array)
+        coords = {
+            name: coord
+            for name, coord in posterior.coords.items()
+            if "chain" not in coord.dims and "draw" not in coord.dims
+        }
+        self.mean = xr.Dataset(means, coords=coords)
+        self.hdis = xr.Dataset(
+            hdis,
+            coords={**coords, "hdi_prob": hdi_probs, "hdi": ["lower", "higher"]},
+        )
+        self.quantiles = xr.Dataset(quantile_values, coords={**coords, "quantile": quantiles})
+
+    @classmethod
+    def restore(
+        cls,
+        draws: xr.Dataset,
+        mean: xr.Dataset,
+        hdis: xr.Dataset,
+        quantiles: xr.Dataset,
+        densities: dict[str, tuple[np.ndarray, np.ndarray]] | None = None,
+    ) -> PosteriorSummary:
+        """Summary of precomputed results, e.g. read from an artifact.
+
+        Parameters
+        ----------
+        draws : xr.Dataset
+            Posterior the sorted draws are taken from, for quantiles that are not precomputed.
+            It can be a thinned posterior, see `arviz_dashboard.artifact`.
+        mean, hdis, quantiles : xr.Dataset
+            The `mean`, `hdis` and `quantiles` attributes of a summary.
+        densities : dict[str, tuple[np.ndarray, np.ndarray]] | None, default None
+            Precomputed outputs of `density`, by variable name.
+
+        Returns
+        -------
+        PosteriorSummary
+            The summary, without computing anything but sorting `draws`.
+        """
+        summary = cls.__new__(cls)
+        summary.sorted = {
+            name: thin_sorted_draws(data_array) for name, data_array in sorted_draws(draws).items()
+        }
+        summary._densities = dict(densities or {})
+        summary.mean = mean
+        summary.hdis = hdis
+        summary.quantiles = quantiles
+        return summary
+
+    @classmethod
+    def of(cls, posterior: xr.Dataset) -> PosteriorSummary:
+        """The summary of `posterior`, computed once and kept in the shared result cache."""
+        return cache.results.get_or_compute(
+            (cache.token(posterior), "summary"),
+            lambda: cls(posterior),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the thinned sorted draws, the precomputed results and the densities."""
+        return (
+            sum(data_array.nbytes for data_array in self.sorted.values())
+            + self.mean.nbytes
+            + self.hdis.nbytes
+            + self.quantiles.nbytes
+            + sum(
+                support.nbytes + density.nbytes for support, density in self._densities.values()
+            )
+        )
+
+    def hdi(self, hdi_prob: float) -> xr.Dataset:
+        """Intervals of every variable at the precomputed probability nearest to `hdi_prob`."""
+        return self.hdis.sel(hdi_prob=hdi_prob, method="nearest")
+
+    def quantile(self, quantiles: list[float]) -> xr.Dataset:
+        """Quantiles of every variable, looked up if precomputed or else read from thinned draws."""
+        quantiles = np.asarray(quantiles)
+        # Compare with a tolerance, as quantiles from sliders are sums of rounded floats.
+        precomputed = np.isclose(quantiles[:, None], self.quantiles["quantile"].values)
+        if precomputed.any(axis=1).all():
+            return self.quantiles.sel(quantile=quantiles, method="nearest")
+        return xr.Dataset(
+            {
+                name: (
+                    ("quantile", *data_array.dims[:-1]),
+                    quantiles_from_sorted(data_array.values, quantiles),
+                )
+                for name, data_array in self.sorted.items()
+            },
+            coords={**self.mean.coords, "quantile": quantiles},
+        )
+
+    def density(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """Densities of every coordinate of a variable, see `densities_from_sorted`.
+
+        Parameters
+        ----------
+        name : str
+            Name of the variable.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The grid shared by all coordinates of the variable, and the densities with one
+            row per coordinate, in C order, each scaled to a maximum of one.
+        """
+        if name not in self._densities:
+            # Restored summaries without precomputed densities estimate them from thinned draws.
+            self._densities[name] = densities_from_sorted(self.sorted[name].values)
+        return self._densities[name]
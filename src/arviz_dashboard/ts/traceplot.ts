@@ -2,7 +2,14 @@ import * as Plot from "@observablehq/plot"
 import {density1d} from "fast-kde/src/density1d"
 
 import {linearRange} from "arvizjs/src/lib/stats/array"
-import {getNestedObject} from "./utils"
+import {
+    LRUCache,
+    appendNested,
+    chainDraws,
+    concatDraws,
+    getNestedObject,
+    typedArrayFromView,
+} from "./utils"
 
 function determine_num_grid_columns(dropdowns) {
     let num_dimensions = 0
@@ -29,10 +36,148 @@ function render({model, el}) {
     const dropdowns = data.dropdowns
     const posterior = data.posterior
     const num_chains = data.num_chains
-    const num_draws = data.num_draws
+    let num_draws = data.num_draws
+    // Draw numbers of thinned draws from an artifact, which are not 0..num_draws - 1.
+    const draws = data.draws
+    const last_draw = draws !== undefined ? draws[draws.length - 1] : num_draws - 1
+    const binary = data.transport === "binary"
+    const lazy = data.lazy === true
+    const manifest = data.manifest
     const num_grid_columns = determine_num_grid_columns(dropdowns)
     const grid_template_columns = create_grid_template_string(num_grid_columns)
 
+    // With the binary transport, wrap the buffer of every data variable in a typed array once.
+    const values = {}
+    if (binary && !lazy) {
+        for (let data_variable in manifest) {
+            values[data_variable] = typedArrayFromView(
+                data.buffers[data_variable],
+                manifest[data_variable].dtype,
+            )
+        }
+    }
+
+    function coordinate_cell(data_variable_name: string, coordinate_values: string[]) {
+        // Flat index of the selected coordinate labels in the row-major coordinate axes.
+        const shape = manifest[data_variable_name].shape.slice(2)
+        const coordinates = Object.keys(dropdowns[data_variable_name])
+        let cell = 0
+        for (let i = 0; i < coordinates.length; i++) {
+            const labels = dropdowns[data_variable_name][coordinates[i]].map(String)
+            cell = cell * shape[i] + labels.indexOf(coordinate_values[i])
+        }
+        return cell
+    }
+
+    // In the lazy mode, slices of chain data are requested from the kernel one selection at a
+    // time, and kept in a bounded cache.
+    const slice_cache = new LRUCache<any>(model.get("cache_size"))
+    const pending_slices = new Set<string>()
+    model.on("change:cache_size", () => {
+        slice_cache.max_size = model.get("cache_size")
+    })
+    model.on("msg:custom", (msg, buffers) => {
+        if (msg.type === "append") {
+            append_draws(msg, buffers)
+            return
+        }
+        if (msg.type !== "slice") {
+            return
+        }
+        pending_slices.delete(msg.key)
+        slice_cache.set(msg.key, parse_slice(msg, buffers))
+        update_plot()
+    })
+
+    function append_draws(msg, buffers: DataView[]) {
+        // A running sampler added draws to the posterior. Only the new draws are sent, except
+        // in the lazy mode where the cached slices are dropped and fetched again.
+        if (lazy) {
+            slice_cache.clear()
+        } else if (binary) {
+            for (let i = 0; i < msg.variables.length; i++) {
+                const data_variable = msg.variables[i]
+                const new_manifest = msg.manifest[data_variable]
+                values[data_variable] = concatDraws(
+                    values[data_variable],
+                    manifest[data_variable].shape,
+                    typedArrayFromView(buffers[i], new_manifest.dtype),
+                    new_manifest.shape,
+                )
+                manifest[data_variable].shape[1] += new_manifest.shape[1]
+            }
+        } else {
+            for (let data_variable in msg.posterior) {
+                appendNested(posterior[data_variable], msg.posterior[data_variable])
+            }
+        }
+        num_draws = msg.num_draws
+        for (let draw_input of draw_range_inputs) {
+            draw_input.max = `${num_draws - 1}`
+        }
+        update_plot()
+    }
+
+    function parse_slice(msg, buffers: DataView[]) {
+        const slice = {shape: msg.shape, downsampled: msg.downsampled === true}
+        if (!slice.downsampled) {
+            slice["chain"] = binary ? typedArrayFromView(buffers[0], msg.dtype) : msg.chain
+            return slice
+        }
+        // Downsampled slices hold the trace of every chain, and thinned draws for the KDEs.
+        if (!binary) {
+            return {...slice, x: msg.x, y: msg.y, kde: msg.kde}
+        }
+        const num_chains = msg.shape[0]
+        const x = new Array()
+        const y = new Array()
+        for (let chain_num = 0; chain_num < num_chains; chain_num++) {
+            x.push(Array.from(typedArrayFromView(buffers[2 * chain_num], msg.dtype)))
+            y.push(Array.from(typedArrayFromView(buffers[2 * chain_num + 1], msg.dtype)))
+        }
+        const kde_values = typedArrayFromView(buffers[2 * num_chains], msg.dtype)
+        const kde_draws = msg.kde_shape[1]
+        const kde = new Array()
+        for (let chain_num = 0; chain_num < num_chains; chain_num++) {
+            kde.push(
+                Array.from(kde_values.subarray(chain_num * kde_draws, (chain_num + 1) * kde_draws)),
+            )
+        }
+        return {...slice, x: x, y: y, kde: kde}
+    }
+
+    function request_slice(
+        key: string,
+        data_variable_name: string,
+        coordinates: number[],
+        draw_range: number[] | null,
+    ) {
+        if (pending_slices.has(key)) {
+            return
+        }
+        pending_slices.add(key)
+        model.send({
+            type: "fetch",
+            key: key,
+            data_variable: data_variable_name,
+            coordinates: coordinates,
+            draw_range: draw_range,
+        })
+    }
+
+    function slice_chain_draws(slice, chain_num: number) {
+        if (slice.downsampled) {
+            return slice.y[chain_num]
+        }
+        if (binary) {
+            const num_draws = slice.shape[1]
+            return Array.from(
+                slice.chain.subarray(chain_num * num_draws, (chain_num + 1) * num_draws),
+            )
+        }
+        return slice.chain[chain_num]
+    }
+
     // Create a div for the traceplot.
     const traceplot_div = document.createElement("div")
     traceplot_div.style.width = "100%"
@@ -97,6 +242,30 @@ function render({model, el}) {
         chains_div.appendChild(chain_label)
     }
 
+    // With downsampled traces, let the user choose a range of draws to refine. The kernel sends
+    // the range at full resolution once it holds fewer draws than `max_points`.
+    const draw_range_inputs = new Array()
+    if (lazy && model.get("max_points") !== null) {
+        for (let [name, value] of [
+            ["First draw", 0],
+            ["Last draw", last_draw],
+        ]) {
+            const draw_label = document.createElement("label")
+            draw_label.innerHTML = name as string
+            draw_label.style.marginLeft = "10px"
+            const draw_input = document.createElement("input")
+            draw_input.type = "number"
+            draw_input.min = "0"
+            draw_input.max = `${last_draw}`
+            draw_input.value = `${value}`
+            draw_input.style.width = "80px"
+            draw_input.addEventListener("change", update_plot)
+            chains_div.appendChild(draw_label)
+            chains_div.appendChild(draw_input)
+            draw_range_inputs.push(draw_input)
+        }
+    }
+
     // Append the chains to the element.
     el.appendChild(chains_div)
 
@@ -190,12 +359,35 @@ function render({model, el}) {
             coordinate_names.push(extra_dimension_name)
         }
 
+        // Find the slice of chain data for the selection, or ask the kernel for it. The plot is
+        // updated again once the slice arrives.
+        let slice = undefined
+        if (lazy) {
+            const coordinate_positions = new Array()
+            for (let i = 0; i < extra_dimensions.length; i++) {
+                const extra_dimension = extra_dimensions[i] as HTMLSelectElement
+                coordinate_positions.push(extra_dimension.selectedIndex)
+            }
+            let draw_range = null
+            if (draw_range_inputs.length !== 0) {
+                const first_draw = Number(draw_range_inputs[0].value)
+                const last_draw = Number(draw_range_inputs[1].value)
+                draw_range = [Math.min(first_draw, last_draw), Math.max(first_draw, last_draw) + 1]
+            }
+            const key = JSON.stringify([data_variable_name, coordinate_positions, draw_range])
+            slice = slice_cache.get(key)
+            if (slice === undefined) {
+                request_slice(key, data_variable_name, coordinate_positions, draw_range)
+                return
+            }
+        }
+
         // Set a few plot aesthetics for the traceplot.
         let opacity = 0.5
         let tip = true
 
         // Determine the x-range from the number of draws found in the posterior data.
-        let x = linearRange(0, num_draws, 1, false)
+        let x = draws !== undefined ? draws : linearRange(0, num_draws, 1, false)
         let y_name = `${data_variable_name}`
         let chain_lines = new Array()
         let kde_lines = new Array()
@@ -208,7 +400,18 @@ function render({model, el}) {
 
             // Get the y-values for the traceplot from the posterior data.
             let y = new Array()
-            if (extra_dimensions.length !== 0) {
+            if (lazy) {
+                y = slice_chain_draws(slice, chain_num)
+            } else if (binary) {
+                y = Array.from(
+                    chainDraws(
+                        values[data_variable_name],
+                        manifest[data_variable_name].shape,
+                        chain_num,
+                        coordinate_cell(data_variable_name, extra_dimension_names),
+                    ),
+                )
+            } else if (extra_dimensions.length !== 0) {
                 y = getNestedObject(
                     posterior,
                     [data_variable_name].concat([...coordinate_names, "chain", chain_num]),
@@ -217,10 +420,16 @@ function render({model, el}) {
                 y = posterior[data_variable_name]["chain"][chain_num]
             }
 
+            // Downsampled traces come with their own draw indices for every chain.
+            let chain_x = x
+            if (lazy && slice.downsampled) {
+                chain_x = slice.x[chain_num]
+            }
+
             // Plot the traceplot data.
             let plot_data = new Array()
-            for (let i = 0; i < x.length; i++) {
-                let datum = {Draw: x[i], chain: `Chain: ${chain_num}`}
+            for (let i = 0; i < chain_x.length; i++) {
+                let datum = {Draw: chain_x[i], chain: `Chain: ${chain_num}`}
                 datum[y_name] = y[i]
                 plot_data.push(datum)
             }
@@ -235,7 +444,8 @@ function render({model, el}) {
             )
 
             // Compute the 1D KDE of the data.
-            const kde = density1d(y, {bins: 512})
+            const kde_data = lazy && slice.downsampled ? slice.kde[chain_num] : y
+            const kde = density1d(kde_data, {bins: 512})
             const points: {x: number; y: number}[] = Array.from(kde)
             const kde_x = new Array()
             const kde_y = new Array()
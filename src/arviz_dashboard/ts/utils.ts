@@ -4,6 +4,109 @@ export const getNestedObject = (nested_object: Object, path_array: Array<string>
     }, nested_object)
 }
 
+export const typedArrayFromView = (view: DataView, dtype: string): Float32Array | Float64Array => {
+    const TypedArray = dtype === "float32" ? Float32Array : Float64Array
+    const bytes_per_element = TypedArray.BYTES_PER_ELEMENT
+    // Typed arrays need an offset aligned with their element size, otherwise we have to copy.
+    if (view.byteOffset % bytes_per_element !== 0) {
+        const buffer = view.buffer.slice(view.byteOffset, view.byteOffset + view.byteLength)
+        return new TypedArray(buffer)
+    }
+    return new TypedArray(view.buffer, view.byteOffset, view.byteLength / bytes_per_element)
+}
+
+export const chainDraws = (
+    values: Float32Array | Float64Array,
+    shape: number[],
+    chain: number,
+    cell: number,
+): Float32Array | Float64Array => {
+    // The values have a `(chain, draw, ...coordinates)` layout, and `cell` is the flat index
+    // of the selected coordinates.
+    const num_draws = shape[1]
+    const num_cells = shape.slice(2).reduce((total, size) => total * size, 1)
+    const start = chain * num_draws * num_cells + cell
+    if (num_cells === 1) {
+        return values.subarray(start, start + num_draws)
+    }
+    const draws = new Float64Array(num_draws)
+    for (let draw = 0; draw < num_draws; draw++) {
+        draws[draw] = values[start + draw * num_cells]
+    }
+    return draws
+}
+
+export class LRUCache<V> {
+    // A `Map` iterates in insertion order, so re-inserting on every read keeps the least
+    // recently used entry first.
+    max_size: number
+    entries: Map<string, V>
+
+    constructor(max_size: number) {
+        this.max_size = max_size
+        this.entries = new Map()
+    }
+
+    get(key: string): V | undefined {
+        const value = this.entries.get(key)
+        if (value !== undefined) {
+            this.entries.delete(key)
+            this.entries.set(key, value)
+        }
+        return value
+    }
+
+    clear() {
+        this.entries.clear()
+    }
+
+    set(key: string, value: V) {
+        this.entries.delete(key)
+        this.entries.set(key, value)
+        while (this.entries.size > Math.max(this.max_size, 1)) {
+            this.entries.delete(this.entries.keys().next().value)
+        }
+    }
+}
+
+export const concatDraws = (
+    values: Float32Array | Float64Array,
+    shape: number[],
+    new_values: Float32Array | Float64Array,
+    new_shape: number[],
+): Float32Array | Float64Array => {
+    // Both arrays have a `(chain, draw, ...coordinates)` layout, so the draws of every chain
+    // are copied block by block.
+    const TypedArray =
+        values.constructor === new_values.constructor ? values.constructor : Float64Array
+    const num_chains = shape[0]
+    const chain_size = values.length / num_chains
+    const new_chain_size = new_values.length / num_chains
+    const concatenated = new (TypedArray as any)(values.length + new_values.length)
+    for (let chain = 0; chain < num_chains; chain++) {
+        const offset = chain * (chain_size + new_chain_size)
+        concatenated.set(values.subarray(chain * chain_size, (chain + 1) * chain_size), offset)
+        concatenated.set(
+            new_values.subarray(chain * new_chain_size, (chain + 1) * new_chain_size),
+            offset + chain_size,
+        )
+    }
+    return concatenated
+}
+
+export const appendNested = (nested_object: Object, new_object: Object) => {
+    // Walk both nested posterior objects, and append the new draws of every chain.
+    for (let key in new_object) {
+        if (key === "chain") {
+            nested_object[key] = nested_object[key].map((draws: number[], chain: number) =>
+                draws.concat(new_object[key][chain]),
+            )
+        } else {
+            appendNested(nested_object[key], new_object[key])
+        }
+    }
+}
+
 export const sum = (data: number[]): number => {
     if (!data || data.length === 0) {
         return NaN
@@ -0,0 +1,37 @@
+import arviz as az
+import numpy as np
+import pytest
+import xarray as xr
+
+
+@pytest.fixture
+def idata() -> az.InferenceData:
+    """Inference data of a normal model with unknown mean, with unsorted observations "y"."""
+    rng = np.random.default_rng(0)
+    num_chains, num_draws, num_observations = 4, 200, 20
+    observed = rng.normal(size=num_observations)
+    mu = observed.mean() + rng.normal(size=(num_chains, num_draws, 1)) / np.sqrt(num_observations)
+    coords = {
+        "chain": np.arange(num_chains),
+        "draw": np.arange(num_draws),
+        "obs": np.arange(num_observations),
+    }
+    sample_dims = ("chain", "draw", "obs")
+    return az.InferenceData(
+        posterior=xr.Dataset(
+            {
+                "mu": (("chain", "draw"), mu[..., 0]),
+                "theta": (("chain", "draw", "group"), mu + rng.normal(size=mu.shape[:-1] + (5,))),
+            },
+            coords={"chain": coords["chain"], "draw": coords["draw"], "group": np.arange(5)},
+        ),
+        log_likelihood=xr.Dataset(
+            {"y": (sample_dims, -0.5 * ((observed - mu) ** 2 + np.log(2 * np.pi)))},
+            coords=coords,
+        ),
+        posterior_predictive=xr.Dataset(
+            {"y": (sample_dims, mu + rng.normal(size=mu.shape[:-1] + (num_observations,)))},
+            coords=coords,
+        ),
+        observed_data=xr.Dataset({"y": (("obs",), observed)}, coords={"obs": coords["obs"]}),
+    )
@@ -0,0 +1,26 @@
+import numpy as np
+
+from arviz_dashboard.artifact import compile_artifact, open_artifact
+from arviz_dashboard.py.traceplot import Traceplot
+
+
+def test_thinned_draws_keep_their_draw_numbers(idata, tmp_path):
+    artifact = open_artifact(compile_artifact(idata, tmp_path / "run.dashboard.nc", max_draws=50))
+
+    assert artifact.draw_stride == 4
+    np.testing.assert_array_equal(artifact.posterior["draw"], np.arange(0, 200, 4))
+
+
+def test_traceplot_draws_artifacts_at_their_draw_numbers(idata, tmp_path):
+    artifact = open_artifact(compile_artifact(idata, tmp_path / "run.dashboard.nc", max_draws=50))
+    widget = Traceplot(artifact, lazy=True, max_points=10)
+    replies = []
+    widget.send = lambda reply, buffers=None: replies.append(reply)
+
+    assert widget.data["draws"] == list(range(0, 200, 4))
+    request = {"type": "fetch", "key": "mu", "data_variable": "mu", "coordinates": []}
+    widget._handle_custom_msg(widget, {**request, "draw_range": None}, [])
+    widget._handle_custom_msg(widget, {**request, "draw_range": [100, 120]}, [])
+
+    assert all(x[0] == 0 and x[-1] == 196 for x in replies[0]["x"])
+    assert all(x == [100, 104, 108, 112, 116] for x in replies[1]["x"])
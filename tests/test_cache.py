@@ -0,0 +1,60 @@
+import arviz as az
+import numpy as np
+import xarray as xr
+
+from arviz_dashboard import cache
+from arviz_dashboard.cache import LRUCache, nbytes
+from arviz_dashboard.panel.dashboards import CoordinateIndex
+from arviz_dashboard.panel.forest import ForestDashboard
+from arviz_dashboard.summary import PosteriorSummary, sorted_draws
+
+
+def posterior(seed: int, num_draws: int = 500) -> xr.Dataset:
+    rng = np.random.default_rng(seed)
+    return xr.Dataset(
+        {"theta": (("chain", "draw", "school"), rng.normal(size=(4, num_draws, 8)))},
+        coords={"chain": np.arange(4), "draw": np.arange(num_draws), "school": list("abcdefgh")},
+    )
+
+
+def test_nbytes_counts_summary_draws():
+    summary = PosteriorSummary(posterior(0))
+    assert nbytes(summary) >= summary.sorted["theta"].nbytes
+
+
+def test_nbytes_counts_coordinate_index_and_elpd(idata):
+    assert nbytes(CoordinateIndex(idata.posterior)) > 100
+    elpd = az.loo(idata, pointwise=True)
+    assert nbytes(elpd) >= elpd.loo_i.nbytes + elpd.pareto_k.nbytes
+
+
+def test_summaries_past_max_bytes_are_evicted():
+    summaries = [PosteriorSummary(posterior(seed)) for seed in range(4)]
+    results = LRUCache(max_bytes=int(2.5 * nbytes(summaries[0])))
+    for i, summary in enumerate(summaries):
+        results.put(i, summary)
+
+    assert list(results._entries) == [2, 3]
+    assert results.nbytes <= results.max_bytes
+
+
+def test_large_posteriors_are_summarized_once(monkeypatch):
+    idatas = {
+        f"model{seed}": az.InferenceData(posterior=posterior(seed, num_draws=5000))
+        for seed in range(2)
+    }
+    # Each posterior is larger than the cache, but their summaries fit.
+    monkeypatch.setattr(cache, "results", LRUCache(max_bytes=idatas["model0"].posterior.nbytes))
+    calls = []
+    monkeypatch.setattr(
+        "arviz_dashboard.summary.sorted_draws",
+        lambda draws: calls.append(draws) or sorted_draws(draws),
+    )
+    dashboard = ForestDashboard(idatas, prefetch=False)
+
+    for model in ["model0", "model1"] * 3:
+        dashboard.summary(model).hdi(0.9)
+        dashboard.summary(model).density("theta")
+        dashboard.summary(model).quantile([0.3, 0.7])
+
+    assert len(calls) == 2
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from arviz_dashboard.downsample import MIN_POINTS, downsample, lttb, minmax
+
+
+@pytest.fixture
+def draws() -> np.ndarray:
+    return np.random.default_rng(0).normal(size=1000).cumsum()
+
+
+@pytest.mark.parametrize("select", [lttb, minmax])
+@pytest.mark.parametrize("num_points", [MIN_POINTS, 5, 10, 101, 999])
+def test_selection_keeps_endpoints_within_num_points(draws, select, num_points):
+    indices = select(draws, num_points)
+
+    assert len(indices) <= num_points
+    assert indices[0] == 0
+    assert indices[-1] == len(draws) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_exactly_num_points(draws):
+    assert len(lttb(draws, 3)) == 3
+    assert len(lttb(draws, 100)) == 100
+
+
+def test_minmax_keeps_the_extremes(draws):
+    indices = minmax(draws, 10)
+
+    assert np.argmin(draws) in indices
+    assert np.argmax(draws) in indices
+
+
+@pytest.mark.parametrize("select", [lttb, minmax])
+def test_selection_keeps_short_draws(select):
+    np.testing.assert_array_equal(select(np.arange(5.0), 10), np.arange(5))
+
+
+@pytest.mark.parametrize("num_points", [1, 2, 3])
+def test_minmax_and_downsample_require_min_points(draws, num_points):
+    with pytest.raises(ValueError, match="at least"):
+        minmax(draws, num_points)
+    with pytest.raises(ValueError, match="at least"):
+        downsample(draws, num_points)
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_window(draws, method):
+    # The windows `Trace._refine` asks for, from the visible x-range of the trace plot.
+    x, y = downsample(draws, 50, method, start=200, stop=700)
+
+    assert len(x) <= 50
+    assert x[0] == 200
+    assert x[-1] == 699
+    assert np.all(np.diff(x) > 0)
+    np.testing.assert_array_equal(y, draws[x])
+
+
+def test_downsample_keeps_every_draw_of_short_windows(draws):
+    x, y = downsample(draws, 50, "lttb", start=300, stop=320)
+
+    np.testing.assert_array_equal(x, np.arange(300, 320))
+    np.testing.assert_array_equal(y, draws[300:320])
+
+
+def test_downsample_clips_the_window(draws):
+    x, _ = downsample(draws, 50, "minmax", start=-10, stop=2000)
+
+    assert x[0] == 0
+    assert x[-1] == len(draws) - 1
+    assert len(x) <= 50
+
+
+def test_downsample_without_num_points_keeps_every_draw(draws):
+    x, y = downsample(draws, None, start=10, stop=20)
+
+    np.testing.assert_array_equal(x, np.arange(10, 20))
+    np.testing.assert_array_equal(y, draws[10:20])
+
+
+def test_downsample_rejects_unknown_methods(draws):
+    with pytest.raises(ValueError, match="Unknown method"):
+        downsample(draws, 50, "mean")
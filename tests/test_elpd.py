@@ -0,0 +1,21 @@
+import arviz as az
+import pytest
+
+from arviz_dashboard.panel.elpd import ELPDStore
+
+
+def test_failed_elpd_is_computed_again(idata):
+    # Without a log likelihood group, the LOO of the model raises.
+    failing = az.InferenceData(posterior=idata.posterior)
+    store = ELPDStore({"good": idata, "bad": failing})
+    progress = []
+    store.compute_all(ics=("loo",), max_workers=2, on_progress=lambda *args: progress.append(args))
+
+    assert progress[-1] == (2, 2)
+    assert not store._pending
+    assert store.get("good", "loo").loo_i.shape == (20,)
+    with pytest.raises(TypeError):
+        store.get("bad", "loo")
+
+    store.idatas_cmp["bad"] = idata
+    assert store.get("bad", "loo").loo_i.shape == (20,)
@@ -0,0 +1,27 @@
+from arviz_dashboard.instrumentation import payload_bytes
+from arviz_dashboard.panel.dashboards import DashboardBaseClass
+from arviz_dashboard.panel.trace.trace import trace
+
+
+def test_update_payload_counts_changed_sources(idata, monkeypatch):
+    shown = []
+    show = DashboardBaseClass.show
+
+    def record_show(self, stats=False):
+        shown.append(self)
+        return show(self, stats)
+
+    monkeypatch.setattr(DashboardBaseClass, "show", record_show)
+    trace(idata, instrument=True)
+    (dashboard,) = shown
+    marginal_lines = dashboard._marginal_lines
+    shown_chains = [chain for chain, (_, glyph, _) in marginal_lines.items() if glyph.visible]
+    trace_sources = [source for source, _, _ in dashboard._trace_lines.values()]
+
+    # Aggregating the chains only empties the shown chain densities and fills the aggregate one.
+    dashboard.chain_aggregation = "aggregate"
+
+    changed = [marginal_lines[chain][0].data for chain in [*shown_chains, "aggregate"]]
+    payload = dashboard.last_interaction["payload_bytes"]
+    assert payload == payload_bytes(changed)
+    assert payload < payload_bytes(changed + [source.data for source in trace_sources])
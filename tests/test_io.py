@@ -0,0 +1,28 @@
+import os
+
+from arviz_dashboard.io import modified_time_ns
+
+
+def test_zarr_stores_are_timed_by_their_metadata(tmp_path):
+    store = tmp_path / "run.zarr"
+    (store / "posterior" / "mu").mkdir(parents=True)
+    for name in [".zmetadata", "posterior/.zgroup", "posterior/mu/.zarray", "posterior/mu/0.0"]:
+        (store / name).write_bytes(b"")
+        os.utime(store / name, ns=(0, 10**18))
+    store_time = store.stat().st_mtime_ns
+
+    assert modified_time_ns(store) == 10**18
+
+    # Rewriting chunks and their metadata leaves the time of the store directory unchanged.
+    (store / "posterior" / "mu" / "0.0").write_bytes(b"new")
+    os.utime(store / ".zmetadata", ns=(0, 2 * 10**18))
+    assert store.stat().st_mtime_ns == store_time
+    assert modified_time_ns(store) == 2 * 10**18
+
+
+def test_files_are_timed_by_their_modification(tmp_path):
+    path = tmp_path / "run.nc"
+    path.write_bytes(b"")
+    os.utime(path, ns=(0, 10**18))
+
+    assert modified_time_ns(path) == 10**18
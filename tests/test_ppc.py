@@ -0,0 +1,34 @@
+import arviz as az
+import numpy as np
+from bokeh.models import GlyphRenderer
+
+from arviz_dashboard.panel import ppc
+from arviz_dashboard.panel.ppc import khat_bin_labels
+
+
+def test_rug_khat_follows_observation_order(idata, monkeypatch):
+    observed = idata.observed_data["y"].values
+    assert not (np.diff(observed) >= 0).all()
+    outputs = []
+    monkeypatch.setattr(ppc, "display", outputs.append)
+    ppc.dashboard_ppc({"model": idata})
+    root = outputs[0].get_root()
+    (rug_source,) = {
+        renderer.data_source
+        for renderer in root.select({"type": GlyphRenderer})
+        if "_" in renderer.data_source.data
+    }
+    khat = az.loo(idata, pointwise=True).pareto_k.values.ravel()
+
+    for x, rug_value in zip(rug_source.data["_"], rug_source.data["khat"]):
+        (observation,) = np.flatnonzero(observed == x)
+        assert rug_value == khat[observation]
+
+
+def test_khat_bin_labels_count_every_band():
+    khat = np.array([-0.1, 0.2, 0.3, 0.8, 0.9, 1.2, 0.5, 0.1])
+
+    labels = khat_bin_labels(khat, 0.7)
+
+    assert labels["text"] == ["5 (62.5%)", "2 (25.0%)", "1 (12.5%)"]
+    np.testing.assert_allclose(labels["y"], [0.3, 0.85, 1.1])
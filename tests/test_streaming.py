@@ -0,0 +1,37 @@
+import threading
+
+import numpy as np
+import xarray as xr
+
+from arviz_dashboard.streaming import PosteriorTail
+
+
+def write_posterior(path, num_draws: int) -> None:
+    rng = np.random.default_rng(num_draws)
+    xr.Dataset(
+        {"mu": (("chain", "draw"), rng.normal(size=(2, num_draws)))},
+        coords={"chain": np.arange(2), "draw": np.arange(num_draws)},
+    ).to_netcdf(path, group="posterior", engine="h5netcdf")
+
+
+def test_follow_relative_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_posterior("stream.nc", 10)
+    received = []
+    appended = threading.Event()
+
+    def callback(new_draws: xr.Dataset) -> None:
+        received.append(new_draws)
+        appended.set()
+
+    tail = PosteriorTail("stream.nc", num_draws=10)
+    tail.follow(callback)
+    try:
+        # Give the watcher time to start before the file changes.
+        threading.Event().wait(0.5)
+        write_posterior("stream.nc", 15)
+        assert appended.wait(timeout=10)
+    finally:
+        tail.stop()
+
+    assert received[0].sizes["draw"] == 5